@@ -125,6 +125,8 @@ hardware_manager::hardware_manager(server_settings* settings, bool sw_loop_init,
 
     //set the thread state
     A_rx_thread_operation = false;
+    A_rx_packets = 0;
+    B_rx_packets = 0;
     A_tx_thread_operation = false;
     B_rx_thread_operation = false;
     B_tx_thread_operation = false;
@@ -291,6 +293,10 @@ bool hardware_manager::preset_usrp(usrp_param* requested_config){
 
     set_streams();
 
+    //packet counts reported at the end of this measure
+    A_rx_packets = 0;
+    B_rx_packets = 0;
+
     if(not sw_loop){
         check_tuning();
     }
@@ -1376,6 +1382,11 @@ void hardware_manager::software_rx_thread(
                 warapped_buffer.errors = 0;
                 warapped_buffer.front_end_code = front_end_c;
                 while(not Rx_queue->push(warapped_buffer))std::this_thread::sleep_for(std::chrono::microseconds(1));
+                if(front_end == 'A'){
+                    A_rx_packets = counter;
+                }else{
+                    B_rx_packets = counter;
+                }
                 acc_samp += current_settings->buffer_len;
             }else{
                 taken = false;
@@ -1585,6 +1596,11 @@ void hardware_manager::single_rx_thread(
                     print_warning("RX queue is experencing some delay. This may cause troubles in real time acquisition.");
                 }
             }
+            if(front_end == 'A'){
+                A_rx_packets = counter;
+            }else{
+                B_rx_packets = counter;
+            }
 
         }catch (boost::thread_interrupted &){ active = false; }
     }
@@ -1610,6 +1626,22 @@ void hardware_manager::single_rx_thread(
     BOOST_LOG_TRIVIAL(debug) << "Thread joined";
 }
 
+std::string hardware_manager::rx_packets_report(){
+    std::stringstream ss;
+    bool first = true;
+    ss << "{\"packets\": {";
+    if(A_rx_packets > 0){
+        ss << "\"" << get_front_end_name('B') << "\": " << A_rx_packets;
+        first = false;
+    }
+    if(B_rx_packets > 0){
+        if(not first) ss << ", ";
+        ss << "\"" << get_front_end_name('D') << "\": " << B_rx_packets;
+    }
+    ss << "}}";
+    return ss.str();
+}
+
 void hardware_manager::flush_rx_streamer(uhd::rx_streamer::sptr &rx_streamer) {
    constexpr double timeout { 0.010 }; // 10ms
    constexpr size_t size { 1048576 };
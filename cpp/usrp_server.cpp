@@ -99,7 +99,8 @@ int main(int argc, char **argv){
                     boost::this_thread::sleep_for(boost::chrono::milliseconds{500});
                     //if (async.chk_new_command())done = thread_manager.stop(true); //this is not working
                 }
-                json_res = new std::string(server_ack("EOM: end of measurement"));
+                //the packets sent per frontend let the client close the file as soon as they are received
+                json_res = new std::string(server_ack("EOM: end of measurement " + usrp.rx_packets_report()));
                 BOOST_LOG_TRIVIAL(info) << "Measure ended";
                 async.send_async(json_res);
             }else{
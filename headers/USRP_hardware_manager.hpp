@@ -110,6 +110,16 @@ class hardware_manager{
         //! @brief Represent the state of the frontend B receiver thread operation status.
         std::atomic<bool> A_rx_thread_operation;
 
+        //! @brief Packets pushed in the rx queue by the frontend A receiver thread during the last measure.
+        std::atomic<int> A_rx_packets;
+
+        //! @brief Packets pushed in the rx queue by the frontend B receiver thread during the last measure.
+        std::atomic<int> B_rx_packets;
+
+        //! @brief JSON report of the packets sent per frontend, appended to the end of measurement ack.
+        //! The format is {"packets": {"A_RX2": N, "B_RX2": M}}, frontends that did not receive are omitted.
+        std::string rx_packets_report();
+
         //! @brief Vector of board properties, each element of the vector represent a frontend.
         std::vector<D_board_prop> usrp_props;
 
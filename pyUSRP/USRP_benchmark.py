@@ -0,0 +1,615 @@
+########################################################################################
+##                                                                                    ##
+##  THIS LIBRARY IS PART OF THE SOFTWARE DEVELOPED BY THE JET PROPULSION LABORATORY   ##
+##  IN THE CONTEXT OF THE GPU ACCELERATED FLEXIBLE RADIOFREQUENCY READOUT PROJECT     ##
+##                                                                                    ##
+########################################################################################
+
+import numpy as np
+import h5py
+import sys
+import os
+import json
+import time
+import shutil
+import platform
+import datetime
+from threading import Thread
+
+# import submodules
+from USRP_low_level import *
+from USRP_files import *
+from USRP_connections import *
+from USRP_simulator import *
+from USRP_noise import calculate_noise
+from USRP_fitting import vna_fit, extimate_peak_number, S21_func
+import USRP_connections
+
+# number of repetitions of each timed call, the best time is reported
+BENCHMARK_REPEAT = 3
+
+# sizes used by run_benchmarks(): (full, quick)
+BENCHMARK_SIZES = {
+    'channels': ([1, 10, 100, 500], [1, 10]),
+    'noise_channels': (100, 4),
+    'noise_time': (10., 1.),
+    'noise_rate': (1e8, 1e7),
+    'noise_decimation': (100, 100),
+    'packets': (1000, 100),
+    'packet_samples': (100000, 10000),
+    'write_mb': (1000., 50.),
+    'vna_points': (int(2e6), int(2e5)),
+    'vna_resonators': (50, 5),
+    'window': (int(1e5), int(1e4)),
+}
+
+
+def _time_call(function, repeat=BENCHMARK_REPEAT, setup=None, verbose=False):
+    '''
+    Time a function call.
+
+    :param function: callable with no arguments.
+    :param repeat: number of repetitions.
+    :param setup: optional callable with no arguments executed (and not timed) before each repetition.
+    :param verbose: if False the standard output of the function is silenced.
+
+    :return a list containing the duration of each repetition in seconds.
+    '''
+    runs = []
+    for i in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.time()
+        if verbose:
+            function()
+        else:
+            with nostdout():
+                function()
+        runs.append(time.time() - start)
+    return runs
+
+
+def _result(name, parameters, runs, amount=None, unit=None):
+    '''
+    Format a benchmark result.
+
+    :param name: name of the benchmark.
+    :param parameters: dictionary of the parameters of the benchmark.
+    :param runs: list of durations in seconds.
+    :param amount: quantity processed in each run (i.e. MB, channels, resonators).
+    :param unit: unit of the throughput (amount / second).
+
+    :return dictionary.
+    '''
+    best = min(runs)
+    res = {
+        'name': name,
+        'parameters': parameters,
+        'runs': runs,
+        'seconds': best,
+        'median_seconds': float(np.median(runs)),
+    }
+    if amount is not None:
+        res['throughput'] = amount / best if best > 0 else float('inf')
+        res['unit'] = unit
+    print_debug("%s %s: %.3f s%s" % (name, str(parameters), best,
+                                      "" if amount is None else " (%.2f %s)" % (res['throughput'], unit)))
+    return res
+
+
+def synthetic_parameters(n_chan, measure_t, rate, decimation, wave_type="DIRECT", front_end="A", buffer_len=int(1e6)):
+    '''
+    Build a global_parameter object describing a noise acquisition similar to the ones issued by Get_noise().
+
+    :param n_chan: number of tones.
+    :param measure_t: duration of the acquisition in seconds.
+    :param rate: sampling rate in Sps.
+    :param decimation: decimation factor.
+    :param wave_type: DSP descriptor of the receiver.
+    :param front_end: front end letter.
+    :param buffer_len: length of the server buffer.
+
+    :return a checked global_parameter object.
+    '''
+    tones = [int(-rate / 4. + i * (rate / 2.) / max(n_chan, 1)) for i in range(n_chan)]
+    TX_frontend = front_end + "_TXRX"
+    RX_frontend = front_end + "_RX2"
+    param = global_parameter()
+    param.set(TX_frontend, "mode", "TX")
+    param.set(TX_frontend, "buffer_len", buffer_len)
+    param.set(TX_frontend, "samples", rate * measure_t)
+    param.set(TX_frontend, "rate", rate)
+    param.set(TX_frontend, "bw", 2 * rate)
+    param.set(TX_frontend, "wave_type", ["TONES" for x in tones])
+    param.set(TX_frontend, "ampl", [1. / n_chan for x in tones])
+    param.set(TX_frontend, "freq", tones)
+    param.set(TX_frontend, "rf", 300e6)
+    param.set(TX_frontend, "fft_tones", 100)
+
+    param.set(RX_frontend, "mode", "RX")
+    param.set(RX_frontend, "buffer_len", buffer_len)
+    param.set(RX_frontend, "samples", rate * measure_t)
+    param.set(RX_frontend, "rate", rate)
+    param.set(RX_frontend, "bw", 2 * rate)
+    param.set(RX_frontend, "wave_type", [wave_type for x in tones])
+    param.set(RX_frontend, "ampl", [1. / n_chan for x in tones])
+    param.set(RX_frontend, "freq", tones)
+    param.set(RX_frontend, "rf", 300e6)
+    param.set(RX_frontend, "fft_tones", 0 if wave_type == "DIRECT" else max(int(decimation), 10))
+    param.set(RX_frontend, "decim", int(decimation) if wave_type == "DIRECT" else 0)
+    param.set(RX_frontend, "pf_average", 1)
+    param.self_check()
+    return param
+
+
+def make_synthetic_noise_file(filename, n_chan=10, measure_t=1., rate=1e7, decimation=100, wave_type="DIRECT",
+                              block_samples=int(1e5), layout=None):
+    '''
+    Write a noise acquisition file with the same layout created by Packets_to_file() and Param_to_H5(), filled with
+    synthesized samples.
+
+    :param filename: name of the file to create (overwritten if present).
+    :param n_chan: number of channels.
+    :param measure_t: duration of the acquisition in seconds.
+    :param rate: sampling rate in Sps.
+    :param decimation: decimation factor.
+    :param wave_type: DSP descriptor of the receiver.
+    :param block_samples: samples per channel written at once.
+    :param layout: raw data layout policy (see raw_data_layout()).
+
+    :return the name of the file.
+    '''
+    filename = format_filename(filename)
+    param = synthetic_parameters(n_chan, measure_t, rate, decimation, wave_type=wave_type)
+    rx_name = param.get_active_rx_param()[0]
+    total, channels = simulated_data_len(param.parameters[rx_name])
+
+    fv = h5py.File(filename, 'w')
+    Param_to_H5(fv, param, layout=layout, meas_type="Noise")
+    dataset = fv["raw_data0"][rx_name]["data"]
+    if dataset.shape[1] < total:
+        dataset.resize(total, 1)
+    written = 0
+    while written < total:
+        spc = min(block_samples, total - written)
+        packet = synthesize_packet(param.parameters[rx_name], written, spc, channels)
+        dataset[:, written:written + spc] = np.reshape(packet, (spc, channels)).T
+        written += spc
+    dataset.attrs.__setitem__("samples", total)
+    dataset.attrs.__setitem__("start_epoch", time.time())
+    fv.close()
+    return filename
+
+
+def make_synthetic_VNA_file(filename, n_points=int(1e6), n_resonators=10, span=50e6, rf=300e6, Qr=2e4, Qe=4e4):
+    '''
+    Write a VNA file with the same layout created by Single_VNA() and VNA_analysis(), containing a synthetic S21
+    with n_resonators resonators equally spaced in the span. The Resonators group is initialized with the exact
+    resonant frequencies.
+
+    :param filename: name of the file to create (overwritten if present).
+    :param n_points: number of points in the scan.
+    :param n_resonators: number of resonators.
+    :param span: frequency span of the scan in Hz.
+    :param rf: LO frequency in Hz.
+    :param Qr: loaded quality factor of the resonators.
+    :param Qe: coupling quality factor of the resonators.
+
+    :return the name of the file.
+    '''
+    filename = format_filename(filename)
+    param = global_parameter()
+    for ant, mode in [("A_TXRX", "TX"), ("A_RX2", "RX")]:
+        param.set(ant, "mode", mode)
+        param.set(ant, "buffer_len", int(1e6))
+        param.set(ant, "samples", n_points)
+        param.set(ant, "rate", 1e8)
+        param.set(ant, "bw", 2e8)
+        param.set(ant, "wave_type", ["CHIRP"])
+        param.set(ant, "ampl", [1.])
+        param.set(ant, "freq", [-span / 2.])
+        param.set(ant, "chirp_f", [span / 2.])
+        param.set(ant, "swipe_s", [n_points])
+        param.set(ant, "chirp_t", [1.])
+        param.set(ant, "rf", rf)
+        param.set(ant, "decim", 1)
+    param.self_check()
+
+    frequency = rf + np.linspace(-span / 2., span / 2., n_points)
+    f0s = rf + (np.arange(n_resonators) + 0.5) * (span / n_resonators) - span / 2.
+    S21 = np.ones(n_points, dtype=np.complex128)
+    for f0 in f0s:
+        S21 *= S21_func(frequency, f0 / 1e6, 1., 0., 0., 1. / Qr, 1. / Qe, 0., 0.)
+
+    fv = h5py.File(filename, 'w')
+    Param_to_H5(fv, param, meas_type="VNA")
+    dataset = fv["raw_data0"]["A_RX2"]["data"]
+    dataset.resize(n_points, 1)
+    dataset[0, :] = S21
+    dataset.attrs.__setitem__("samples", n_points)
+
+    vna_grp = fv.create_group("VNA_0")
+    vna_grp.attrs.create("scan_lengths", [n_points])
+    vna_grp.attrs.create("calibration", [1.])
+    vna_grp.create_dataset("frequency", data=frequency, dtype=np.float64)
+    vna_grp.create_dataset("S21", data=S21, dtype=np.complex128)
+
+    reso_grp = fv.create_group("Resonators")
+    reso_grp.attrs.__setitem__("tones_init", f0s)
+    fv.close()
+    return filename
+
+
+def _decode_sync_headers(raw_headers):
+    '''
+    Decode headers stored back to back with np.frombuffer and header_type, the dtype with the layout of
+    sync_header_struct. Only used to compare the cost of the per packet Decode_Sync_Header() with a vectorized decode:
+    no receive path reads the headers in bulk.
+
+    :param raw_headers: string containing the headers back to back.
+
+    :return a structured array of header_type sharing the memory of raw_headers.
+    '''
+    return np.frombuffer(raw_headers, dtype=header_type)
+
+
+def bench_header_decode(n_packets=1000, packet_samples=100000, channels=10):
+    '''
+    Measure the decode throughput of the Sync_RX packet path on an in-memory packet: header decoding and payload
+    conversion to complex64. The header decoding alone is measured one header at the time and in batch.
+
+    :param n_packets: number of times the packet is decoded.
+    :param packet_samples: total number of samples in the packet (all channels).
+    :param channels: number of channels in the packet.
+
+    :return a list of benchmark result dictionaries.
+    '''
+    spc = max(packet_samples / channels, 1)
+    payload = synthesize_packet({'wave_type': ["DIRECT"], 'rate': 1e6, 'ampl': [1.]}, 0, spc, channels).tostring()
+    header = encode_sync_header(0, "A_RX2", 1, spc * channels, 0, channels)
+    packet = header + payload
+    header_size = len(header)
+
+    headers = header * n_packets
+
+    def decode():
+        for i in range(n_packets):
+            metadata = Decode_Sync_Header(packet[:header_size])
+            np.fromstring(packet[header_size:], dtype=data_type, count=metadata.length)
+
+    def decode_headers():
+        for i in range(n_packets):
+            Decode_Sync_Header(headers[i * header_size:(i + 1) * header_size])
+
+    def decode_headers_batch():
+        _decode_sync_headers(headers)
+
+    parameters = {'packets': n_packets, 'packet_samples': spc * channels, 'channels': channels}
+    runs = _time_call(decode)
+    results = [_result("sync_rx_decode", parameters, runs, amount=n_packets * len(packet) / 1e6, unit="MB/s")]
+    runs = _time_call(decode_headers)
+    results.append(_result("sync_header_decode", parameters, runs, amount=n_packets / 1e6, unit="Mheaders/s"))
+    runs = _time_call(decode_headers_batch)
+    results.append(_result("sync_header_decode_batch", parameters, runs, amount=n_packets / 1e6, unit="Mheaders/s"))
+    return results
+
+
+def bench_loopback_acquisition(n_chan=10, measure_t=1., rate=1e7, decimation=100, receiver="string", folder=".",
+                               link_profile=None):
+    '''
+    Measure the end to end acquisition throughput (Sync_RX process, data queue and Packets_to_file()) against the
+    loopback_server simulator.
+
+    :param receiver: Sync_RX receiver to use ("string" or "recv_into").
+    :param link_profile: link profile given to Connect() (see get_link_profile()).
+
+    :return a benchmark result dictionary.
+    '''
+    param = synthetic_parameters(n_chan, measure_t, rate, decimation)
+    filename = os.path.join(folder, "USRP_benchmark_loopback")
+    sim = loopback_server()
+    sim.start()
+    try:
+        if not Connect(receiver=receiver, link_profile=link_profile):
+            print_error("Cannot connect to the loopback server")
+            return None
+
+        def acquire():
+            Async_send(param.to_json())
+            Packets_to_file(parameters=param, timeout=None, filename=filename, meas_type="Noise")
+            os.remove(format_filename(filename))
+
+        runs = _time_call(acquire, repeat=1)
+        Disconnect()
+    finally:
+        sim.stop()
+    res = _result("loopback_acquisition", {'channels': n_chan, 'measure_t': measure_t, 'rate': rate,
+                                           'decimation': decimation, 'receiver': receiver,
+                                           'link_profile': str(link_profile)},
+                  runs, amount=sim.bytes_sent / 1e6, unit="MB/s")
+    res['eom_close_latency'] = CLIENT_STATUS["eom_close_latency"]
+    res['link_report'] = Get_link_report()
+    return res
+
+
+def bench_link_profiles(n_chan=10, measure_t=1., rate=1e7, decimation=100, folder=".", profiles=None):
+    '''
+    Measure the loopback acquisition throughput with each link profile and report the options clamped by the
+    operating system.
+
+    :param profiles: list of profile names. Default is all the profiles in LINK_PROFILES.
+
+    :return a list of benchmark result dictionaries.
+    '''
+    if profiles is None:
+        profiles = sorted(LINK_PROFILES.keys())
+    results = []
+    for profile in profiles:
+        res = bench_loopback_acquisition(n_chan, measure_t, rate, decimation, folder=folder, link_profile=profile)
+        if res is None:
+            continue
+        res['name'] = "link_profile"
+        res['clamped'] = [name for name in res['link_report'] if res['link_report'][name]['applied'] is None or
+                          res['link_report'][name]['applied'] < res['link_report'][name]['requested']]
+        results.append(res)
+    return results
+
+
+def bench_packets_to_file(n_chan=10, write_mb=100., packet_samples=100000, folder=".", layout=None,
+                          distinct_packets=1):
+    '''
+    Measure the write throughput of Packets_to_file() for a given number of channels. Synthetic packets are fed in
+    the USRP_data_queue by a separate thread, as the Sync_RX process would do.
+    The size of the file and the time needed to read the full timestream of a single channel are reported as well.
+
+    :param n_chan: number of channels.
+    :param write_mb: amount of data written in each run in MB.
+    :param packet_samples: total number of samples in each packet (all channels), as the server packets have a size
+        given by the buffer length independently from the number of channels.
+    :param folder: folder where the file is written.
+    :param layout: raw data layout policy (see raw_data_layout()).
+    :param distinct_packets: number of different packets synthesized and sent in turn. When measuring compression
+        use enough packets to make the repetition period longer than the compressor window.
+
+    :return a benchmark result dictionary.
+    '''
+    spc = max(packet_samples / n_chan, 1)
+    packet_bytes = spc * n_chan * np.dtype(data_type).itemsize
+    n_packets = max(int(write_mb * 1e6 / packet_bytes), 1)
+
+    # the file is preallocated exactly as it would be for a real acquisition
+    param = synthetic_parameters(n_chan, n_packets * spc / 1e6, 1e6, 1)
+    rx_name = param.get_active_rx_param()[0]
+    packets = [synthesize_packet(param.parameters[rx_name], i * spc, spc, n_chan) for i in range(distinct_packets)]
+    filename = os.path.join(folder, "USRP_benchmark_write")
+
+    def feeder():
+        for i in range(n_packets):
+            # do not let the queue grow unbounded
+            while USRP_connections.USRP_data_queue.qsize() > 64:
+                time.sleep(0.001)
+            metadata = packet_descriptor(0, rx_name, i + 1, spc * n_chan, 0, n_chan)
+            USRP_connections.USRP_data_queue.put((metadata, packets[i % distinct_packets]))
+        USRP_connections.USRP_data_queue.put((None, None))
+
+    def write():
+        th = Thread(target=feeder)
+        th.start()
+        Packets_to_file(parameters=param, timeout=None, filename=filename, layout=layout, meas_type="Noise")
+        th.join()
+
+    def cleanup():
+        try:
+            os.remove(format_filename(filename))
+        except OSError:
+            pass
+
+    def read_channel():
+        f = bound_open(filename)
+        f["raw_data0"][rx_name]["data"][0, :]
+        f.close()
+
+    runs = _time_call(write, setup=cleanup)
+    file_mb = os.path.getsize(format_filename(filename)) / 1e6
+    read_runs = _time_call(read_channel)
+    cleanup()
+    res = _result("packets_to_file", {'channels': n_chan, 'packets': n_packets, 'packet_samples': spc * n_chan,
+                                      'layout': layout}, runs, amount=n_packets * packet_bytes / 1e6, unit="MB/s")
+    res['file_mb'] = file_mb
+    res['compression_ratio'] = n_packets * packet_bytes / 1e6 / max(file_mb, 1e-9)
+    res['channel_read_seconds'] = min(read_runs)
+    return res
+
+
+def bench_raw_data_layout(n_chan=10, write_mb=100., packet_samples=100000, folder=".", distinct_packets=16):
+    '''
+    Compare the raw data layout policies in RAW_DATA_LAYOUT_POLICIES: write throughput of Packets_to_file(), file
+    size and single channel read time. A summary table is printed.
+
+    Note:
+        - The synthetic samples are tones plus gaussian noise: the compression ratio of real data may differ.
+
+    :return a list of benchmark result dictionaries.
+    '''
+    results = []
+    for policy in RAW_DATA_LAYOUT_POLICIES:
+        res = bench_packets_to_file(n_chan, write_mb, packet_samples, folder=folder, layout=policy,
+                                    distinct_packets=distinct_packets)
+        res['name'] = "raw_data_layout"
+        results.append(res)
+
+    print_debug("%-14s %12s %10s %8s %16s" % ("layout", "write MB/s", "file MB", "ratio", "channel read s"))
+    for res in results:
+        print_debug("%-14s %12.2f %10.2f %8.2f %16.3f" % (res['parameters']['layout'], res['throughput'],
+                                                        res['file_mb'], res['compression_ratio'],
+                                                        res['channel_read_seconds']))
+    return results
+
+
+def bench_openH5file(filename, window=int(1e5), n_windows=10):
+    '''
+    Measure the read throughput of openH5file() for a full read and for windowed reads of all the channels.
+
+    :return a list of two benchmark result dictionaries.
+    '''
+    f = bound_open(filename)
+    shape = f["raw_data0"]["A_RX2"]["data"].shape
+    f.close()
+    total_mb = shape[0] * shape[1] * np.dtype(data_type).itemsize / 1e6
+
+    runs = _time_call(lambda: openH5file(filename))
+    full = _result("openH5file_full", {'file': os.path.basename(filename), 'shape': list(shape)}, runs,
+                   amount=total_mb, unit="MB/s")
+
+    window = min(window, shape[1])
+    starts = np.linspace(0, shape[1] - window, n_windows).astype(int)
+
+    def windowed():
+        for s in starts:
+            openH5file(filename, start_sample=s, last_sample=s + window)
+
+    runs = _time_call(windowed)
+    win = _result("openH5file_windowed", {'file': os.path.basename(filename), 'window': window,
+                                          'n_windows': n_windows}, runs,
+                  amount=n_windows * shape[0] * window * np.dtype(data_type).itemsize / 1e6, unit="MB/s")
+    return [full, win]
+
+
+def bench_calculate_noise(filename, welch=None):
+    '''
+    Measure the time needed by calculate_noise() per channel.
+
+    :return a benchmark result dictionary.
+    '''
+    n_chan = len(get_rx_info(filename)['wave_type'])
+    runs = _time_call(lambda: calculate_noise(filename, welch=welch, clip=False))
+    return _result("calculate_noise", {'file': os.path.basename(filename), 'channels': n_chan, 'welch': welch},
+                   runs, amount=n_chan, unit="channels/s")
+
+
+def bench_vna_fit(filename):
+    '''
+    Measure the time needed by vna_fit() per resonator.
+
+    :return a benchmark result dictionary.
+    '''
+    n_reso = len(get_init_peaks(filename))
+    runs = _time_call(lambda: vna_fit(filename))
+    return _result("vna_fit", {'file': os.path.basename(filename), 'resonators': n_reso}, runs,
+                   amount=n_reso, unit="resonators/s")
+
+
+def bench_extimate_peak_number(filename):
+    '''
+    Measure the time needed by extimate_peak_number() on a VNA scan. The file is copied so that the initialization
+    of the original is not modified.
+
+    :return a benchmark result dictionary.
+    '''
+    copy_name = format_filename(filename)[:-3] + "_peaks.h5"
+    shutil.copyfile(format_filename(filename), copy_name)
+    f = bound_open(copy_name)
+    n_points = len(f["VNA_0"]["frequency"])
+    f.close()
+    runs = _time_call(lambda: extimate_peak_number(copy_name))
+    os.remove(copy_name)
+    return _result("extimate_peak_number", {'file': os.path.basename(filename), 'points': n_points}, runs,
+                   amount=n_points / 1e6, unit="Mpoints/s")
+
+
+def run_benchmarks(folder="benchmark", quick=False, selection=None, loopback=False):
+    '''
+    Run the benchmark suite on synthetic files.
+
+    :param folder: folder where the synthetic files are created.
+    :param quick: use the reduced sizes in BENCHMARK_SIZES.
+    :param selection: list of benchmark names to run. Default runs all of them.
+    :param loopback: if True also run the end to end acquisition against the loopback_server (needs the default
+        server ports to be free).
+
+    :return a dictionary containing machine information and the list of results.
+    '''
+    size = dict([(k, BENCHMARK_SIZES[k][1 if quick else 0]) for k in BENCHMARK_SIZES])
+
+    def selected(name):
+        return selection is None or name in selection
+
+    try:
+        os.mkdir(folder)
+    except OSError:
+        pass
+
+    results = []
+
+    if selected("sync_rx_decode"):
+        for n_chan in size['channels']:
+            results += bench_header_decode(size['packets'], size['packet_samples'], n_chan)
+
+    if loopback and selected("loopback_acquisition"):
+        for receiver in SYNC_RX_RECEIVERS:
+            res = bench_loopback_acquisition(size['noise_channels'], size['noise_time'], size['noise_rate'],
+                                             size['noise_decimation'], receiver=receiver, folder=folder)
+            if res is not None:
+                results.append(res)
+
+    if loopback and selected("link_profile"):
+        results += bench_link_profiles(size['noise_channels'], size['noise_time'], size['noise_rate'],
+                                       size['noise_decimation'], folder=folder)
+
+    if selected("packets_to_file"):
+        for n_chan in size['channels']:
+            results.append(bench_packets_to_file(n_chan, size['write_mb'], size['packet_samples'], folder=folder))
+
+    if selected("raw_data_layout"):
+        results += bench_raw_data_layout(size['noise_channels'], size['write_mb'], size['packet_samples'],
+                                         folder=folder)
+
+    if selected("openH5file") or selected("calculate_noise"):
+        noise_file = make_synthetic_noise_file(os.path.join(folder, "USRP_benchmark_noise"),
+                                               n_chan=size['noise_channels'], measure_t=size['noise_time'],
+                                               rate=size['noise_rate'], decimation=size['noise_decimation'])
+        if selected("openH5file"):
+            results += bench_openH5file(noise_file, window=size['window'])
+        if selected("calculate_noise"):
+            results.append(bench_calculate_noise(noise_file))
+
+    if selected("vna_fit") or selected("extimate_peak_number"):
+        vna_file = make_synthetic_VNA_file(os.path.join(folder, "USRP_benchmark_VNA"), n_points=size['vna_points'],
+                                           n_resonators=size['vna_resonators'])
+        if selected("extimate_peak_number"):
+            results.append(bench_extimate_peak_number(vna_file))
+        if selected("vna_fit"):
+            results.append(bench_vna_fit(vna_file))
+
+    return {
+        'timestamp': get_timestamp(),
+        'library_version': libUSRP_net_version,
+        'machine': {
+            'platform': platform.platform(),
+            'processor': platform.processor(),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'h5py': h5py.version.version,
+            'hdf5': h5py.version.hdf5_version,
+            'hdf5plugin': None if hdf5plugin is None else getattr(hdf5plugin, "version", "unknown"),
+            'network': check_host_network(),
+        },
+        'quick': quick,
+        'results': results
+    }
+
+
+def save_benchmark_results(results, filename=None):
+    '''
+    Write the results of run_benchmarks() in a JSON file.
+
+    :param results: dictionary returned by run_benchmarks().
+    :param filename: name of the file. Default is USRP_benchmark_<timestamp>.json.
+
+    :return the name of the file.
+    '''
+    if filename is None:
+        filename = "USRP_benchmark_" + get_timestamp() + ".json"
+    with open(filename, 'w') as output:
+        json.dump(results, output, indent=4, sort_keys=True)
+    return filename
@@ -0,0 +1,234 @@
+########################################################################################
+##                                                                                    ##
+##  THIS LIBRARY IS PART OF THE SOFTWARE DEVELOPED BY THE JET PROPULSION LABORATORY   ##
+##  IN THE CONTEXT OF THE GPU ACCELERATED FLEXIBLE RADIOFREQUENCY READOUT PROJECT     ##
+##                                                                                    ##
+########################################################################################
+
+import numpy as np
+import sys
+import multiprocessing
+import ctypes
+from Queue import Empty
+
+# import submodules
+from USRP_low_level import *
+
+# default number of slots in the shared memory ring buffer
+RING_DEFAULT_SLOTS = 32
+
+# time the receiver waits for a free slot before declaring an overrun (seconds)
+RING_PUT_TIMEOUT = 0.5
+
+# number of buffers preallocated by the recv_into receiver
+RECV_POOL_SIZE = 16
+
+
+class shared_ring_buffer(object):
+    '''
+    Single producer, single consumer ring buffer living in shared memory.
+    The Sync_RX process writes the RX_wrapper header and the complex64 payload of each packet directly
+    inside a slot and the Packets_to_file function reads numpy views of the same memory, so samples are
+    never pickled or piped between the two processes.
+
+    Each slot is made of a small header area containing the raw header as it comes from the GPU server
+    (see header_type) followed by the payload area. The payload area is sized to hold the largest packet
+    the server can send for a given configuration (see from_parameters()).
+
+    The object has to be created before the Sync_RX process is started and passed to it (see Connect()).
+
+    Example:
+    >>> ring = shared_ring_buffer.from_parameters(noise_command)
+    >>> Connect(ring_buffer = ring)
+
+    Note:
+        - When no slot is free for more than RING_PUT_TIMEOUT seconds the receiver drops the packet and
+          increments the overrun counter.
+    '''
+
+    def __init__(self, n_slots=RING_DEFAULT_SLOTS, slot_samples=int(1e6)):
+        if n_slots < 2:
+            err_msg = "The shared ring buffer needs at least 2 slots, %d requested" % n_slots
+            print_error(err_msg)
+            raise ValueError(err_msg)
+
+        self.n_slots = int(n_slots)
+        self.slot_samples = int(slot_samples)
+
+        # the payload is aligned to 8 bytes so that it can be viewed as complex64
+        self.header_bytes = header_type.itemsize
+        self.payload_offset = int(8 * np.ceil(self.header_bytes / 8.))
+        self.slot_bytes = self.payload_offset + self.slot_samples * np.dtype(data_type).itemsize
+
+        self._shared = multiprocessing.RawArray(ctypes.c_byte, self.n_slots * self.slot_bytes)
+
+        # counters are monotonic: the slot in use is counter % n_slots
+        self._write_count = multiprocessing.RawValue(ctypes.c_longlong, 0)
+        self._read_count = multiprocessing.RawValue(ctypes.c_longlong, 0)
+        self._overruns = multiprocessing.RawValue(ctypes.c_longlong, 0)
+        self._max_fill = multiprocessing.RawValue(ctypes.c_longlong, 0)
+
+        self._filled = multiprocessing.Semaphore(0)
+        self._free = multiprocessing.Semaphore(self.n_slots)
+
+        self._memory = None
+        self._attach()
+
+    @classmethod
+    def from_parameters(cls, parameters, n_slots=RING_DEFAULT_SLOTS):
+        '''
+        Create a ring buffer whose slots can hold the largest packet described by a global_parameter object.
+
+        :param parameters: global_parameter object containing the informations used to drive the GPU server.
+        :param n_slots: number of slots in the ring.
+
+        :return a shared_ring_buffer object.
+        '''
+        slot_samples = 0
+        for ant in parameters.get_active_rx_param():
+            slot_samples = max(
+                slot_samples,
+                int(parameters.parameters[ant]['buffer_len']) * max(int(parameters.parameters[ant]['data_mem_mult']), 1)
+            )
+        if slot_samples == 0:
+            err_msg = "Cannot size the shared ring buffer: no active RX frontend with buffer_len > 0"
+            print_error(err_msg)
+            raise ValueError(err_msg)
+
+        return cls(n_slots=n_slots, slot_samples=slot_samples)
+
+    def _attach(self):
+        '''
+        Build the numpy view of the shared memory in the current process.
+        '''
+        self._memory = np.frombuffer(self._shared, dtype=np.uint8)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_memory'] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._attach()
+
+    def _slot(self, counter):
+        start = (counter % self.n_slots) * self.slot_bytes
+        return self._memory[start:start + self.slot_bytes]
+
+    def reserve(self, timeout=RING_PUT_TIMEOUT):
+        '''
+        Reserve the next free slot for writing. Producer side.
+
+        :param timeout: time in seconds to wait for a free slot.
+
+        :return (header, payload) uint8 views of the slot or None in case of overrun.
+        '''
+        if not self._free.acquire(True, timeout):
+            self._overruns.value += 1
+            return None
+        slot = self._slot(self._write_count.value)
+        return slot[:self.header_bytes], slot[self.payload_offset:]
+
+    def commit(self):
+        '''
+        Make the slot obtained with reserve() available to the consumer. Producer side.
+        '''
+        self._write_count.value += 1
+        self._max_fill.value = max(self._max_fill.value, self._write_count.value - self._read_count.value)
+        self._filled.release()
+
+    def get(self, timeout=None):
+        '''
+        Get the oldest committed slot. Consumer side. The slot remains valid until release() is called.
+
+        :param timeout: time in seconds to wait for a packet. Default blocks forever.
+
+        :return (raw_header, payload) where raw_header is a string containing the header as sent by the server and payload is a complex64 view of the whole payload area.
+
+        :raise Empty: in case no packet is available within timeout (same behaviour of Queue.get()).
+        '''
+        if not self._filled.acquire(True, timeout):
+            raise Empty
+        slot = self._slot(self._read_count.value)
+        return slot[:self.header_bytes].tostring(), slot[self.payload_offset:].view(data_type)
+
+    def release(self):
+        '''
+        Give the slot obtained with get() back to the producer. Consumer side.
+        '''
+        self._read_count.value += 1
+        self._free.release()
+
+    def fill_level(self):
+        '''
+        :return the fraction of slots currently waiting to be consumed.
+        '''
+        return (self._write_count.value - self._read_count.value) / float(self.n_slots)
+
+    def max_fill_level(self):
+        '''
+        :return the highest fraction of occupied slots since creation.
+        '''
+        return self._max_fill.value / float(self.n_slots)
+
+    def overruns(self):
+        '''
+        :return the number of packets dropped because the ring was full.
+        '''
+        return self._overruns.value
+
+    def packets(self):
+        '''
+        :return the number of packets written in the ring since creation.
+        '''
+        return self._write_count.value
+
+    def clean(self):
+        '''
+        Drop all the slots waiting to be consumed. Consumer side.
+
+        :return the number of slots dropped.
+        '''
+        dropped = 0
+        while self._filled.acquire(False):
+            self.release()
+            dropped += 1
+        return dropped
+
+
+class recv_buffer_pool(object):
+    '''
+    Pool of reusable complex64 buffers used by the recv_into receiver of Sync_RX().
+    Buffers are handed out round robin as views of the requested length; a buffer is reused only when no view of it
+    is still referenced elsewhere (i.e. by the feeder thread of a multiprocessing.Queue that has not pickled it yet),
+    otherwise a new buffer is allocated and the miss counter incremented.
+
+    :param n_buffers: number of buffers in the pool.
+    :param buffer_samples: initial size of each buffer in samples. Buffers grow when a larger packet arrives.
+    '''
+
+    def __init__(self, n_buffers=RECV_POOL_SIZE, buffer_samples=0):
+        self._buffers = [np.empty(int(buffer_samples), dtype=data_type) for i in range(int(n_buffers))]
+        self._next = 0
+        self.misses = 0
+
+    def acquire(self, n_samples):
+        '''
+        Get a writable view of n_samples complex64 elements.
+
+        :param n_samples: the number of samples needed.
+
+        :return a numpy array view.
+        '''
+        n_samples = int(n_samples)
+        for i in range(len(self._buffers)):
+            self._next = (self._next + 1) % len(self._buffers)
+            # references held: the list and the getrefcount() argument
+            if sys.getrefcount(self._buffers[self._next]) <= 2:
+                if len(self._buffers[self._next]) < n_samples:
+                    self._buffers[self._next] = np.empty(n_samples, dtype=data_type)
+                return self._buffers[self._next][:n_samples]
+
+        self.misses += 1
+        return np.empty(n_samples, dtype=data_type)
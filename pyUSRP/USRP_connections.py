@@ -21,6 +21,7 @@ import multiprocessing
 from joblib import Parallel, delayed
 from subprocess import call
 import time
+import copy
 import gc
 import datetime
 
@@ -44,6 +45,22 @@ import progressbar
 # import submodules
 from USRP_low_level import *
 from USRP_files import *
+from USRP_buffers import *
+from USRP_writer import *
+from USRP_link import *
+from USRP_telemetry import *
+
+# shared memory ring buffer used in place of USRP_data_queue when given to Connect()
+USRP_ring_buffer = None
+
+# socket reading strategies implemented in Sync_RX() and the default one
+SYNC_RX_RECEIVERS = ["string", "recv_into"]
+SYNC_RX_RECEIVER = "string"
+
+# link profile applied to the sockets and to the Sync_RX process (see USRP_link). None uses LINK_PROFILE
+USRP_link_profile = None
+# options applied by the last connection, see Get_link_report()
+USRP_link_report = {}
 
 
 def reinit_data_socket():
@@ -54,6 +71,7 @@ def reinit_data_socket():
     global USRP_data_socket
     USRP_data_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
     USRP_data_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    USRP_link_report.update(apply_data_socket_profile(USRP_data_socket, USRP_link_profile))
 
 
 def reinit_async_socket():
@@ -65,6 +83,16 @@ def reinit_async_socket():
     USRP_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
     USRP_socket.settimeout(1)
     USRP_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    USRP_link_report.update(apply_command_socket_profile(USRP_socket, USRP_link_profile))
+
+
+def Get_link_report():
+    '''
+    Get the options of the link profile applied by the last Connect() and the values granted by the operating system.
+
+    :return a report dictionary {option: {'requested': value, 'applied': value}} (see apply_data_socket_profile()).
+    '''
+    return dict(USRP_link_report)
 
 
 def clean_data_queue(USRP_data_queue=USRP_data_queue):
@@ -76,6 +104,8 @@ def clean_data_queue(USRP_data_queue=USRP_data_queue):
     '''
     print_debug("Cleaning data queue... ")
     residual_packets = 0
+    if USRP_ring_buffer is not None:
+        residual_packets += USRP_ring_buffer.clean()
     while (True):
         try:
             meta_data, data = USRP_data_queue.get(timeout=0.1)
@@ -86,7 +116,57 @@ def clean_data_queue(USRP_data_queue=USRP_data_queue):
     return residual_packets
 
 
-def Packets_to_file(parameters, timeout=None, filename=None, dpc_expected=None, push_queue = None, trigger = None, **kwargs):
+def Get_packet(timeout=None):
+    '''
+    Get the next packet received by the Sync_RX process from the shared ring buffer if one has been given to
+    Connect(), from the USRP_data_queue otherwise.
+
+    :param timeout: time in seconds to wait for a packet.
+
+    :return (metadata, data) tuple. When the data come from the ring buffer they are a view of the shared memory and
+        are valid until Release_packet() is called.
+
+    :raise Empty: in case no packet is available within timeout.
+    '''
+    global USRP_data_queue, USRP_ring_buffer
+    if USRP_ring_buffer is None:
+        return USRP_data_queue.get(timeout=timeout)
+
+    raw_header, payload = USRP_ring_buffer.get(timeout=timeout)
+    metadata = Decode_Sync_Header(raw_header)
+    if metadata is None:
+        USRP_ring_buffer.release()
+        raise Empty
+    return metadata, payload[:metadata.length]
+
+
+def Data_queue_depth():
+    '''
+    :return the number of packets received by the Sync_RX process and not yet consumed, None if it cannot be
+        determined (multiprocessing.Queue.qsize() is not implemented on some platforms).
+    '''
+    if USRP_ring_buffer is not None:
+        return int(round(USRP_ring_buffer.fill_level() * USRP_ring_buffer.n_slots))
+    try:
+        return USRP_data_queue.qsize()
+    except NotImplementedError:
+        return None
+
+
+def Release_packet():
+    '''
+    Release the ring buffer slot of the last packet obtained with Get_packet(). Does nothing when using the queue.
+    '''
+    if USRP_ring_buffer is not None:
+        USRP_ring_buffer.release()
+
+
+def Packets_to_file(parameters, timeout=None, filename=None, dpc_expected=None, push_queue = None, trigger = None,
+                    write_behind = True, flush_bytes = WRITE_BEHIND_BYTES, flush_seconds = WRITE_BEHIND_SECONDS,
+                    pipeline = None, layout = None, swmr = False, swmr_flush = SWMR_FLUSH_SECONDS,
+                    rollover_samples = None, rollover_bytes = None, spool = False, spool_convert = True,
+                    zero_fill = False, source = None, device = None, telemetry = None, push_policy = None,
+                    status = None, **kwargs):
     '''
     Consume the USRP_data_queue and writes an H5 file on disk.
 
@@ -94,19 +174,59 @@ def Packets_to_file(parameters, timeout=None, filename=None, dpc_expected=None,
     :param timeout: time after which the function stops and tries to stop the server.
     :param filename: eventual filename. Default is datetime.
     :param dpc_expected: number of sample per channel expected. if given display a percentage progressbar.
-    :param push_queue: external queue where to push data and metadata
+    :param push_queue: external queue where to push data and metadata. Can be a push_subscriber or a list of queues
+        and push_subscriber objects to feed several consumers.
     :param trigger: trigger class (see section on trigger function for deteails)
+    :param write_behind: if True accumulate the packets in chunk aligned blocks before writing them (see write_behind_buffer).
+    :param flush_bytes: size in bytes of the write behind blocks.
+    :param flush_seconds: maximum time in seconds a sample waits in the write behind buffer.
+    :param pipeline: if True the trigger, the file writing and the push to the external queue run in separate threads
+        connected by bounded queues (see pipeline_stage) so that the network queue is drained while the disk catches up.
+        Default is True, False when the packets come from the shared ring buffer: they are then written directly from
+        the ring memory while the pipeline needs a copy of each packet (see shared_ring_buffer).
+    :param layout: chunking and compression policy of the raw data (see raw_data_layout()).
+    :param swmr: open the file in single writer multiple reader mode so that it can be read while it is written
+        (see tail_H5file()). Not available with triggers.
+    :param swmr_flush: in swmr mode, seconds between two flushes of the file.
+    :param rollover_samples: start a new file every rollover_samples samples per channel.
+    :param rollover_bytes: start a new file every rollover_bytes bytes of raw data per frontend.
+    :param spool: write the packets to flat binary files (see spool_writer) instead of the H5 file. Not available with
+        triggers; write behind, swmr and rollover options are ignored.
+    :param spool_convert: in spool mode, convert the spool to the H5 file in a background process at the end.
+    :param zero_fill: replace lost packets with zeros so that sample indices stay aligned with time. Not available with
+        triggers.
+    :param source: object providing the packets instead of the Sync_RX receiver (see measure_source in USRP_transport).
+        Its get(timeout) method returns (metadata, data) or raises Empty; its end_of_measure() method and its
+        eom_packets and eom_time attributes replace the global end of measurement variables.
+    :param device: number of the raw data group written, in place of parameters.parameters['device'] and of the usrp
+        number in the packets. Used by multi_acquisition to give each server its own group.
+    :param telemetry: acquisition_telemetry object, i.e. to serve the samples on a UNIX socket or to log them.
+        Default only updates status[\"telemetry\"].
+    :param push_policy: policy applied to the queues in push_queue given without a push_subscriber (see
+        PUSH_POLICIES). Default is PUSH_POLICY.
+    :param status: dictionary where the state of the acquisition is written (measure_running_now, sequence counters,
+        telemetry, eom_close_latency). Default is CLIENT_STATUS; multi_acquisition gives each device its own.
 
     :return filename or empty string if something went wrong
 
     Note:
-        - if the \"End of measurement\" async signal is received from the GPU server the timeout mode becomes active.
+        - when the \"End of measurement\" async message reports the number of packets sent (see Decode_EOM_packets()),
+          the file is closed as soon as the last packet of each frontend has been received. Otherwise, or if packets are
+          missing, the timeout mode becomes active.
+        - the time between the end of measurement message and the file closed is stored in
+          status[\"eom_close_latency\"].
+        - with write_behind the \"samples\" attribute of the datasets is updated only when a block is flushed.
+        - the packet numbers of each stream are checked (see sequence_tracker): gaps and duplicates are recorded in
+          the \"sequence\" dataset next to \"errors\", duplicates are dropped and the counters are exposed in
+          status.
+        - rolled over files are named <filename>_part<N>.h5 and contain the same metadata of the first one. openH5file()
+          on the first file reads the set as a single timestream. With a trigger the rollover happens between packets.
     '''
 
     global dynamic_alloc_warning
-    push_queue_warning = False
+    subscribers = push_subscribers(push_queue, push_policy)
 
-    def write_ext_H5_packet(metadata, data, h5fp, index, trigger = None):
+    def write_ext_H5_packet(metadata, data, h5fp, index, trigger = None, buffers = None):
         '''
         Write a single packet inside an already opened and formatted H5 file as an ordered dataset.
 
@@ -116,51 +236,55 @@ def Packets_to_file(parameters, timeout=None, filename=None, dpc_expected=None,
             - dataset: file pointer to the h5 file. extensible dataset has to be already created.
             - index: dictionary containg the accumulated length of the dataset.
             - trigger: trigger class. (see trigger section for more info)
+            - buffers: dictionary of write_behind_buffer objects per dataset. if None write the packet directly.
 
         Notes:
             - The way this function write the packets inside the h5 file is strictly related to the metadata type in decribed in USRP_server_setting.hpp as RX_wrapper struct.
         '''
 
         global dynamic_alloc_warning
-        dev_name = "raw_data" + str(int(metadata['usrp_number']))
-        group_name = metadata['front_end_code']
-        samples_per_channel = metadata['length'] / metadata['channels']
+        dev_name = "raw_data" + str(int(metadata.usrp_number))
+        group_name = metadata.front_end_code
+        samples_per_channel = metadata.length / metadata.channels
         dataset = h5fp[dev_name][group_name]["data"]
         errors = h5fp[dev_name][group_name]["errors"]
         data_shape = np.shape(dataset)
         data_start = index
         data_end = data_start + samples_per_channel
-        if ((trigger is not None) and (metadata['length']>0)):
+        if ((trigger is not None) and (metadata.length>0)):
             if trigger.trigger_control == "AUTO":
-                trigger_dataset = h5fp[dev_name][group_name]["trigger"]
-                current_len_trigger = len(trigger_dataset)
-                trigger_dataset.resize(current_len_trigger+1,0)
-                trigger_dataset[current_len_trigger] = index
-
-                trigger_name = str(trigger.__class__.__name__)
-                if trigger_name == "amplitude_trigger":
-                    trigger_dataset.attrs["bounds"] = trigger.bounds
-                    trigger_dataset.attrs["nglitch"] = trigger.nglitch
-                    trigger_dataset.attrs["glitch_indices"] = trigger.glitch_indices
-                    trigger_dataset.attrs["samples_per_packet"] = trigger.samples_per_packet
+                key = (dev_name, group_name)
+                if key not in output['triggers']:
+                    output['triggers'][key] = trigger_writer(h5fp[dev_name][group_name], trigger,
+                                                             written=output['trigger_written'].setdefault(key, {}))
+                output['triggers'][key].packet(index)
         try:
-            if data_shape[0] < metadata['channels']:
-                print_warning("Main dataset in H5 file not initialized.")
-                dataset.resize(metadata['channels'], 0)
-
-            if data_end > data_shape[1]:
-                if dynamic_alloc_warning:
-                    print_warning("Main dataset in H5 file not correctly sized. Dynamically extending dataset...")
-                    # print_debug("File writing thread is dynamically extending datasets.")
-                    dynamic_alloc_warning = False
-                dataset.resize(data_end, 1)
-            packet = np.reshape(data, (samples_per_channel,metadata['channels'])).T
-            dataset[:, data_start:data_end] = packet
-            dataset.attrs.__setitem__("samples", data_end)
-            if data_start == 0:
-                dataset.attrs.__setitem__("start_epoch", time.time())
-
-            if metadata['errors'] != 0:
+            packet = np.reshape(data, (samples_per_channel,metadata.channels)).T
+            if buffers is not None:
+                key = (dev_name, group_name)
+                if key not in buffers:
+                    buffers[key] = write_behind_buffer(
+                        dataset, metadata.channels, flush_bytes = flush_bytes, flush_seconds = flush_seconds)
+                buffers[key].append(packet, data_start)
+            else:
+                if data_shape[0] < metadata.channels:
+                    print_warning("Main dataset in H5 file not initialized.")
+                    dataset.resize(metadata.channels, 0)
+
+                if data_end > data_shape[1]:
+                    # datasets of triggered measures start empty and are expected to grow
+                    if dynamic_alloc_warning and data_shape[1] > 0:
+                        print_warning("Main dataset in H5 file not correctly sized. Dynamically extending dataset...")
+                        # print_debug("File writing thread is dynamically extending datasets.")
+                        dynamic_alloc_warning = False
+                    dataset = raw_data_grow(dataset, data_end)
+                    output['grown'].add((dev_name, group_name))
+                dataset[:, data_start:data_end] = packet
+                dataset.attrs.modify("samples", data_end)
+                if data_start == 0:
+                    dataset.attrs.modify("start_epoch", time.time())
+
+            if metadata.errors != 0:
                 print_warning("The server encounterd an error")
                 err_shape = np.shape(errors)
                 err_len = err_shape[1]
@@ -187,27 +311,28 @@ def Packets_to_file(parameters, timeout=None, filename=None, dpc_expected=None,
             - The way this function write the packets inside the h5 file is strictly related to the metadata type in decribed in USRP_server_setting.hpp as RX_wrapper struct.
         '''
 
-        dev_name = "raw_data" + str(int(metadata['usrp_number']))
-        group_name = metadata['front_end_code']
-        dataset_name = "dataset_" + str(int(metadata['packet_number']))
+        dev_name = "raw_data" + str(int(metadata.usrp_number))
+        group_name = metadata.front_end_code
+        dataset_name = "dataset_" + str(int(metadata.packet_number))
         try:
             ds = h5fp[dev_name][group_name].create_dataset(
                 dataset_name,
-                data=np.reshape(data, (metadata['channels'], metadata['length'] / metadata['channels']))
+                data=np.reshape(data, (metadata.channels, metadata.length / metadata.channels))
                 # compression = H5PY_compression
             )
-            ds.attrs.create(name="errors", data=metadata['errors'])
-            if metadata['errors'] != 0:
-                print_warning("The server encounterd a transmission error: " + str(metadata['errors']))
+            ds.attrs.create(name="errors", data=metadata.errors)
+            if metadata.errors != 0:
+                print_warning("The server encounterd a transmission error: " + str(metadata.errors))
         except RuntimeError as err:
             print_error("A packet has not been written because of a problem: " + str(err))
 
-    def create_h5_file(filename):
+    def create_h5_file(filename, libver = None):
         '''
         Tries to open a h5 file without overwriting files with the same name. If the file already exists rename it and then create the file.
 
         Arguments:
             - String containing the name of the file.
+            - libver argument of h5py.File ('latest' is needed for single writer multiple reader mode).
 
         Returns:
             - Pointer to rhe opened file in write mode.
@@ -219,7 +344,7 @@ def Packets_to_file(parameters, timeout=None, filename=None, dpc_expected=None,
             h5file.close()
         except IOError:
             try:
-                h5file = h5py.File(filename + ".h5", 'w')
+                h5file = h5py.File(filename + ".h5", 'w', libver = libver)
                 return h5file
             except IOError as msg:
                 print_error("Cannot create the file " + filename + ".h5:")
@@ -236,14 +361,172 @@ def Packets_to_file(parameters, timeout=None, filename=None, dpc_expected=None,
                     tets.close()
                 except IOError:
                     os.rename(filename + ".h5", new_filename)
-                    return open_h5_file(filename)
+                    return create_h5_file(filename, libver)
                 else:
                     count += 1
 
-    global USRP_data_queue, END_OF_MEASURE, EOM_cond, CLIENT_STATUS
+    def trigger_packet(element):
+        '''
+        Apply the trigger to a (metadata, data) element.
+        '''
+        meta_data, data = element
+        data, meta_data = trigger.trigger(data, meta_data)
+        if not isinstance(meta_data, packet_descriptor):
+            meta_data = packet_descriptor.from_dict(meta_data)
+        return meta_data, data
+
+    def open_output():
+        '''
+        Create and format the current file of the acquisition.
+        '''
+        if spool:
+            output['file'] = spool_writer(filename, parameters, **kwargs)
+            return
+        filename_part = rollover_filename(filename, output['part'])
+        output['file'] = create_h5_file(filename_part, libver = 'latest' if swmr else None)
+        Param_to_H5(output['file'], parameters, trigger, layout = layout, **kwargs)
+        if len(output['limit']) > 0:
+            H5_sequence_init(output['file'], output['part'], output['offset'], output['limit'])
+        if swmr:
+            H5_swmr_start(output['file'])
+        output['last_flush'] = time.time()
+
+    def close_output():
+        '''
+        Flush the write behind buffers and close the current file of the acquisition.
+        '''
+        if spool:
+            output['file'].close()
+            return
+        if write_buffers is not None:
+            for key in write_buffers:
+                try:
+                    write_buffers[key].close()
+                except RuntimeError as err:
+                    print_error("Cannot flush the write behind buffer of %s/%s: %s" % (key[0], key[1], str(err)))
+                print_debug("%s/%s: %d blocks written in %.2f seconds" % (
+                    key[0], key[1], write_buffers[key].flush_count, write_buffers[key].flush_time))
+                output['flush_time'] += write_buffers[key].flush_time
+            write_buffers.clear()
+        for key in output['triggers']:
+            try:
+                output['triggers'][key].close()
+            except RuntimeError as err:
+                print_error("Cannot write the trigger information of %s/%s: %s" % (key[0], key[1], str(err)))
+        output['triggers'].clear()
+        for dev_name, group_name in output['grown']:
+            raw_data_trim(output['file'][dev_name][group_name]["data"])
+        output['grown'].clear()
+        if swmr:
+            H5_swmr_stop(output['file'])
+        output['file'].close()
+
+    def write_packet(element):
+        '''
+        Write a (metadata, data) element in the file and advance the sample counter of its frontend.
+        Packets crossing a rollover boundary are split between the two files.
+        '''
+        meta_data, data = element
+        front_end = meta_data.front_end_code
+        if spool:
+            output['file'].write(meta_data, data)
+            spc_acc[front_end] += meta_data.length / meta_data.channels
+            return element
+        if front_end in output['limit']:
+            samples_per_channel = meta_data.length / meta_data.channels
+            room = output['offset'][front_end] + output['limit'][front_end] - spc_acc[front_end]
+            if trigger is None and 0 < room < samples_per_channel:
+                head = meta_data.copy()
+                head.length = room * meta_data.channels
+                tail = meta_data.copy()
+                tail.length = meta_data.length - head.length
+                write_packet((head, data[:head.length]))
+                write_packet((tail, data[head.length:meta_data.length]))
+                return element
+            if room <= 0:
+                close_output()
+                output['part'] += 1
+                for fr in spc_acc:
+                    output['offset'][fr] = spc_acc[fr]
+                print_debug("Rolling over to file %s" % rollover_filename(filename, output['part']))
+                open_output()
+
+        write_ext_H5_packet(meta_data, data, output['file'], spc_acc[front_end] - output['offset'].get(front_end, 0),
+                            trigger = trigger, buffers = write_buffers)
+        spc_acc[front_end] += meta_data.length / meta_data.channels
+        if swmr and (time.time() - output['last_flush']) > swmr_flush:
+            if write_buffers is not None:
+                for key in write_buffers:
+                    write_buffers[key].flush()
+            output['file'].flush()
+            output['last_flush'] = time.time()
+        return element
+
+    def write_sequence_event(meta_data, expected):
+        '''
+        Record a gap or a duplicate in the sequence dataset of the current file. With zero_fill the samples per
+        channel of the lost packets are stored in the "packet_samples" attribute of the dataset.
+        '''
+        front_end = meta_data.front_end_code
+        if spool:
+            # the spool index contains all the packet numbers (see spool_sequence()): duplicates are recorded as
+            # packets without samples
+            if meta_data.packet_number < expected:
+                marker = meta_data.copy()
+                marker.length = 0
+                marker.errors = 0
+                output['file'].write(marker, np.zeros(0, dtype=np.complex64))
+            return
+        try:
+            sequence = output['file']["raw_data" + str(int(meta_data.usrp_number))][front_end]["sequence"]
+            n_events = sequence.shape[1]
+            sequence.resize(n_events + 1, 1)
+            sequence[:, n_events] = [spc_acc[front_end] - output['offset'].get(front_end, 0), expected,
+                                     meta_data.packet_number]
+            if zero_fill and meta_data.packet_number > expected:
+                sequence.attrs.modify("packet_samples", packet_samples[(meta_data.usrp_number, front_end)])
+        except (KeyError, RuntimeError) as err:
+            print_error("Cannot record a packet sequence event: " + str(err))
+
+    def store_packet(element):
+        '''
+        Check the packet number of a (metadata, data) element, record gaps and duplicates, then write it.
+        Duplicates are dropped.
+        '''
+        meta_data, data = element
+        # the server sends packets of constant length: the first one of each stream gives the nominal length
+        stream = (meta_data.usrp_number, meta_data.front_end_code)
+        packet_samples.setdefault(stream, meta_data.length / meta_data.channels)
+        missing, expected = tracker.check(meta_data)
+        if missing == 0:
+            return write_packet(element)
+        write_sequence_event(meta_data, expected)
+        if missing < 0:
+            return None
+        if zero_fill:
+            # a single block replaces the lost packets; its packet number marks it as not coming from the server
+            fill_meta = meta_data.copy()
+            fill_meta.errors = 0
+            fill_meta.packet_number = -1
+            fill_meta.length = missing * packet_samples[stream] * meta_data.channels
+            write_packet((fill_meta, np.zeros(fill_meta.length, dtype=np.complex64)))
+        return write_packet(element)
+
+    def push_packet(element):
+        '''
+        Push a (metadata, data) element in the external queues.
+        '''
+        for subscriber in subscribers:
+            subscriber.push(element)
+
+    global USRP_data_queue, END_OF_MEASURE, EOM_cond, EOM_PACKETS, EOM_TIME, CLIENT_STATUS
     more_sample_than_expected_WARNING = True
     accumulated_timeout = 0
-    sleep_time = 0.1
+    sleep_time = EOM_POLL_SECONDS
+
+    # highest packet number received per frontend, compared with the count of the end of measurement message
+    last_packet = {}
+    eom_time = None
 
     acquisition_end_flag = False
 
@@ -255,15 +538,104 @@ def Packets_to_file(parameters, timeout=None, filename=None, dpc_expected=None,
         filename = "USRP_DATA_" + get_timestamp()
         print "Writing data on disk with filename: \"" + filename + ".h5\""
 
-    H5_file_pointer = create_h5_file(str(filename))
-    Param_to_H5(H5_file_pointer, parameters, trigger, **kwargs)
+    if device is not None:
+        # the command has already been sent: only the file description changes
+        parameters = copy.deepcopy(parameters)
+        parameters.parameters['device'] = int(device)
+
+    if swmr and trigger is not None:
+        print_warning("Single writer multiple reader mode is not compatible with triggers: the file will be readable only at the end")
+        swmr = False
+
+    if spool and trigger is not None:
+        print_warning("Spool mode is not compatible with triggers: writing the H5 file")
+        spool = False
+
+    if layout == "contiguous" and (rollover_samples is not None or rollover_bytes is not None or swmr):
+        # the datasets are resized by the rollover and cannot be replaced in swmr mode (see raw_data_rechunk())
+        print_warning("The contiguous raw data layout is not compatible with rollover and swmr: using the \'channel\' layout")
+        layout = "channel"
+
+    if zero_fill and trigger is not None:
+        print_warning("Zero fill is not compatible with triggers: lost packets will only be recorded")
+        zero_fill = False
+
+    # packets from the shared ring buffer are views of a slot that is recycled once released
+    from_ring = source is None and USRP_ring_buffer is not None
+    if pipeline is None:
+        pipeline = not from_ring
+
+    tracker = sequence_tracker()
+    if status is None:
+        status = CLIENT_STATUS
+    tracker.update_status(status, force = True)
+    # nominal samples per channel of the packets of each (usrp_number, front_end_code) stream, used to zero fill
+    packet_samples = {}
+
+    if write_behind:
+        write_buffers = {}
+    else:
+        write_buffers = None
 
     allowed_counters = ['A_RX2','B_RX2']
     spc_acc = {}
     for fr_counter in allowed_counters:
         if parameters.parameters[fr_counter] != 'OFF': spc_acc[fr_counter] = 0
 
-    CLIENT_STATUS["measure_running_now"] = True
+    # state of the file currently written: the rollover replaces it from the writing thread
+    output = {'file': None, 'part': 0, 'offset': {}, 'limit': {}, 'last_flush': time.time(), 'flush_time': 0.,
+              'grown': set(), 'triggers': {},
+              # trigger list elements already written, kept across the files: each part gets only the new ones
+              'trigger_written': {}}
+    if rollover_samples is not None or rollover_bytes is not None:
+        for fr_counter in spc_acc:
+            output['offset'][fr_counter] = 0
+            limit = sys.maxint
+            if rollover_samples is not None:
+                limit = min(limit, int(rollover_samples))
+            if rollover_bytes is not None:
+                n_chan = max(len(parameters.parameters[fr_counter]['wave_type']), 1)
+                limit = min(limit, int(rollover_bytes) / (n_chan * np.dtype(np.complex64).itemsize))
+            output['limit'][fr_counter] = max(limit, 1)
+
+    open_output()
+
+    # stages are built from the last one so that each one knows where to send its output
+    if telemetry is None:
+        telemetry = acquisition_telemetry()
+    telemetry.start(status)
+
+    def update_telemetry(stop = False):
+        '''
+        Sample the telemetry counters, or take the last sample and close the telemetry if stop is True.
+        '''
+        if not stop and not telemetry.due():
+            return None
+        if source is not None:
+            queue_depth = source.queue.qsize()
+        else:
+            queue_depth = Data_queue_depth()
+        flush_time = None
+        if write_buffers is not None:
+            flush_time = output['flush_time'] + sum([buf.flush_time for buf in list(write_buffers.values())])
+        counters = {'queue_depth': queue_depth, 'pipeline_depth': sum([stage.queue.qsize() for stage in stages]),
+                    'flush_time': flush_time, 'lost_packets': tracker.lost_packets}
+        if stop:
+            return telemetry.stop(status, **counters)
+        return telemetry.update(status, **counters)
+
+    stages = []
+    if pipeline:
+        if len(subscribers) > 0:
+            stages.insert(0, pipeline_stage("push", push_packet))
+        stages.insert(0, pipeline_stage("write", store_packet, output = stages[0] if len(stages) > 0 else None,
+                                        latency_callback = telemetry.record_latency))
+        if trigger is not None:
+            stages.insert(0, pipeline_stage("trigger", trigger_packet, output = stages[0]))
+        for stage in stages:
+            stage.start()
+
+    status["measure_running_now"] = True
     if dpc_expected is not None:
         widgets = [progressbar.Percentage(), progressbar.Bar()]
         bar = progressbar.ProgressBar(widgets=widgets, max_value=dpc_expected)
@@ -275,28 +647,47 @@ def Packets_to_file(parameters, timeout=None, filename=None, dpc_expected=None,
     bar.start()
     while (not acquisition_end_flag):
         try:
-            meta_data, data = USRP_data_queue.get(timeout=0.1)
+            if source is not None:
+                meta_data, data = source.get(timeout=sleep_time)
+            else:
+                meta_data, data = Get_packet(timeout=sleep_time)
             # USRP_data_queue.task_done()
             accumulated_timeout = 0
             if meta_data == None:
                 acquisition_end_flag = True
             else:
+                if not isinstance(meta_data, packet_descriptor):
+                    meta_data = packet_descriptor.from_dict(meta_data)
+                if device is not None:
+                    meta_data.usrp_number = device
+                if meta_data.packet_number > last_packet.get(meta_data.front_end_code, 0):
+                    last_packet[meta_data.front_end_code] = meta_data.packet_number
+                telemetry.packet(meta_data)
                 # write_single_H5_packet(meta_data, data, H5_file_pointer)
-                if trigger is not None:
-                    data, meta_data = trigger.trigger(data, meta_data)
-                write_ext_H5_packet(meta_data, data, H5_file_pointer, spc_acc[meta_data['front_end_code']], trigger = trigger)
-                if push_queue is not None:
-                    if not push_queue_warning:
-                        try:
-                            push_queue.put((meta_data, data))
-                        except:
-                            print_warning("Cannot push packets into external queue: %s"%str(sys.exc_info()[0]))
-                            push_queue_warning = True
-
-                spc_acc[meta_data['front_end_code']] += meta_data['length'] / meta_data['channels']
+                try:
+                    if pipeline:
+                        # the stages outlive the ring buffer slot: they need their own copy
+                        if from_ring:
+                            data = np.array(data)
+                        stages[0].put((meta_data, data))
+                    else:
+                        t_in = time.time()
+                        element = (meta_data, data)
+                        if trigger is not None:
+                            element = trigger_packet(element)
+                        element = store_packet(element)
+                        telemetry.record_latency(time.time() - t_in)
+                        if len(subscribers) > 0 and element is not None:
+                            # the external queues outlive the ring buffer slot
+                            if from_ring:
+                                element = (element[0], np.array(element[1]))
+                            push_packet(element)
+                finally:
+                    if source is None:
+                        Release_packet()
                 try:
                     #print "max expected: %d total received %d"%(dpc_expected, spc_acc)
-                    bar.update(spc_acc[meta_data['front_end_code']])
+                    bar.update(spc_acc[meta_data.front_end_code])
                 except:
                     if data_warning:
                         if dpc_expected is not None:
@@ -307,43 +698,90 @@ def Packets_to_file(parameters, timeout=None, filename=None, dpc_expected=None,
                         data_warning = False
 
         except Empty:
-            time.sleep(sleep_time)
+            # the get has already waited sleep_time
             if timeout:
                 accumulated_timeout += sleep_time
                 if accumulated_timeout > timeout:
                     if not legit_off: print_warning("Sync data receiver timeout condition reached. Closing file...")
                     acquisition_end_flag = True
                     break
-        if CLIENT_STATUS["keyboard_disconnect"] == True:
+        tracker.update_status(status)
+        update_telemetry()
+
+        # the keyboard interrupt stops the measure of the module level connection only
+        if source is None and CLIENT_STATUS["keyboard_disconnect"] == True:
             Disconnect()
             acquisition_end_flag = True
             CLIENT_STATUS["keyboard_disconnect"] = False
 
         try:
-            bar.update(spc_acc[meta_data['front_end_code']])
+            bar.update(spc_acc[meta_data.front_end_code])
         except NameError:
             pass
         except:
             if (more_sample_than_expected_WARNING): print_debug("Sync RX received more data than expected.")
 
-        EOM_cond.acquire()
-        if END_OF_MEASURE:
-            timeout = .5
+        if source is not None:
+            eom, eom_packets, eom_time = source.end_of_measure(), source.eom_packets, source.eom_time
+        else:
+            EOM_cond.acquire()
+            eom, eom_packets, eom_time = END_OF_MEASURE, EOM_PACKETS, EOM_TIME
+            EOM_cond.release()
+        if eom:
             legit_off = True
-        EOM_cond.release()
+            if eom_packets is not None and EOM_complete(eom_packets, last_packet):
+                acquisition_end_flag = True
+            else:
+                # safety net for lost packets or servers not reporting the count
+                timeout = .5
 
-    bar.finish()
+    if pipeline:
+        stages[0].stop()
+        for stage in stages:
+            stage.report()
 
-    EOM_cond.acquire()
-    END_OF_MEASURE = False
-    EOM_cond.release()
+    bar.finish()
 
-    if clean_data_queue() != 0:
-        print_warning("Residual elements in the libUSRP data queue are being lost!")
+    if source is None:
+        EOM_cond.acquire()
+        END_OF_MEASURE = False
+        EOM_PACKETS = None
+        EOM_TIME = None
+        EOM_cond.release()
 
-    H5_file_pointer.close()
+        if clean_data_queue() != 0:
+            print_warning("Residual elements in the libUSRP data queue are being lost!")
+
+    if source is None and USRP_ring_buffer is not None:
+        if USRP_ring_buffer.overruns() > 0:
+            print_warning("Shared ring buffer overrun: %d packets have been dropped by the receiver" % USRP_ring_buffer.overruns())
+        print_debug("Shared ring buffer maximum fill level: %.1f%%" % (100 * USRP_ring_buffer.max_fill_level()))
+
+    tracker.update_status(status, force = True)
+    if tracker.lost_packets > 0 or tracker.duplicate_packets > 0:
+        print_warning("%d packets lost in %d gaps, %d duplicate packets dropped%s" % (
+            tracker.lost_packets, tracker.sequence_gaps, tracker.duplicate_packets,
+            ": lost samples replaced with zeros" if zero_fill and tracker.lost_packets > 0 else ""))
+
+    close_output()
+    update_telemetry(stop = True)
+    for subscriber in subscribers:
+        s = subscriber.stats()
+        print_debug("Push queue (%s): %d packets pushed, %d dropped, %d decimated, %d errors" % (
+            s['policy'], s['pushed'], s['dropped'], s['decimated'], s['errors']))
+    if output['part'] > 0:
+        print_debug("Acquisition written in %d files" % (output['part'] + 1))
+    if spool:
+        print_debug("%.1f MB written in spool %s" % (output['file'].bytes_written / 1e6, spool_folder(filename)))
+        if spool_convert:
+            start_spool_conversion(filename, layout = layout)
     print "\033[7;1;32mH5 file closed succesfully.\033[0m"
-    CLIENT_STATUS["measure_running_now"] = False
+    if eom_time is not None:
+        status["eom_close_latency"] = time.time() - eom_time
+        print_debug("End of measurement to file closed: %.3f s" % status["eom_close_latency"])
+    else:
+        status["eom_close_latency"] = None
+    status["measure_running_now"] = False
     return filename
 
 def USRP_socket_bind(USRP_socket, server_address, timeout):
@@ -395,31 +833,15 @@ def Decode_Sync_Header(raw_header, CLIENT_STATUS=CLIENT_STATUS):
     Decode an async header containing the metadata of the packet.
 
     Return:
-        - The metadata in dictionary form.
+        - The metadata as a packet_descriptor (can be accessed as a dictionary).
 
     Arguments:
-        - The raww header as a string (as returned by the recv() method of socket).
+        - The raww header as a string (as returned by the recv() method of socket) or a buffer of header_type.itemsize bytes.
     '''
-
-    def decode_frontend(code):
-        return {
-            'A': "A_TXRX",
-            'B': "A_RX2",
-            'C': "B_TXRX",
-            'D': "B_RX2"
-        }[code]
-
     try:
-        header = np.fromstring(raw_header, dtype=header_type, count=1)
-        metadata = {}
-        metadata['usrp_number'] = header[0]['usrp_number']
-        metadata['front_end_code'] = decode_frontend(header[0]['front_end_code'])
-        metadata['packet_number'] = header[0]['packet_number']
-        metadata['length'] = header[0]['length']
-        metadata['errors'] = header[0]['errors']
-        metadata['channels'] = header[0]['channels']
-        return metadata
-    except ValueError:
+        usrp_number, code, packet_number, length, errors, channels = sync_header_struct.unpack_from(raw_header)
+        return packet_descriptor(usrp_number, SYNC_FRONTEND_NAMES[code], packet_number, length, errors, channels)
+    except (struct.error, KeyError):
         if CLIENT_STATUS["keyboard_disconnect"] == False:
             print_error("Received corrupted header. No recover method has been implemented.")
         return None
@@ -443,11 +865,46 @@ def Decode_Async_header(header):
         return 0
 
 
+def Decode_EOM_packets(payload):
+    '''
+    Extract the number of packets sent per frontend from the payload of an end of measurement message. The server
+    reports it as a JSON object following the text: EOM: end of measurement {"packets": {"A_RX2": 120}}
+
+    :param payload: payload string of the ack message.
+
+    :return dictionary {frontend name: packets} or None if the count is not reported.
+    '''
+    start = payload.find("{")
+    if start == -1:
+        return None
+    try:
+        packets = json.loads(payload[start:])['packets']
+        return dict([(str(fe), int(n)) for fe, n in packets.items()])
+    except (ValueError, KeyError, TypeError, AttributeError):
+        print_warning("Cannot decode the packet count of the end of measurement message")
+        return None
+
+
+def EOM_complete(eom_packets, last_packet):
+    '''
+    Check if all the packets reported by the end of measurement message have been received.
+
+    :param eom_packets: dictionary {frontend name: packets} returned by Decode_EOM_packets().
+    :param last_packet: dictionary {frontend name: highest packet number received}. Packet numbers start from 1.
+
+    :return boolean.
+    '''
+    for front_end, n in eom_packets.items():
+        if last_packet.get(front_end, 0) < n:
+            return False
+    return True
+
+
 def Decode_Async_payload(message):
     '''
     Decode asynchronous payloads coming from the GPU server
     '''
-    global ERROR_STATUS, END_OF_MEASURE, REMOTE_FILENAME, EOM_cond
+    global ERROR_STATUS, END_OF_MEASURE, EOM_PACKETS, EOM_TIME, REMOTE_FILENAME, EOM_cond
 
     try:
         res = json.loads(message)
@@ -466,6 +923,8 @@ def Decode_Async_payload(message):
         if res['payload'].find("EOM") != -1:
             print_debug("Async message from server: Measure finished")
             EOM_cond.acquire()
+            EOM_PACKETS = Decode_EOM_packets(res['payload'])
+            EOM_TIME = time.time()
             END_OF_MEASURE = True
             EOM_cond.release()
         elif res['payload'].find("filename") != -1:
@@ -477,6 +936,7 @@ def Decode_Async_payload(message):
         print_warning("Server detected an error.")
         ERROR_STATUS = True
         EOM_cond.acquire()
+        EOM_TIME = time.time()
         END_OF_MEASURE = True
         EOM_cond.release()
 
@@ -768,7 +1228,7 @@ def Stop_Async_RX():
     print_line("Async RX stopped")
 
 
-def Connect(timeout=None):
+def Connect(timeout=None, ring_buffer=None, receiver=None, link_profile=None):
     '''
     Connect both, the Syncronous and Asynchronous communication service.
 
@@ -777,10 +1237,19 @@ def Connect(timeout=None):
 
     Arguments:
         - the timeout in seconds. Default is retry forever.
+        - ring_buffer: optional shared_ring_buffer object. If given, packets are transferred from the Sync_RX process
+          to Packets_to_file() through shared memory instead of the USRP_data_queue.
+        - receiver: socket reading strategy of the Sync_RX process ("string" or "recv_into"). Default is SYNC_RX_RECEIVER.
+        - link_profile: name of a profile in LINK_PROFILES or dictionary of socket and process options. Default is
+          LINK_PROFILE. See Get_link_report() for the values applied.
     '''
+    global USRP_link_profile
+    get_link_profile(link_profile)
+    USRP_link_profile = link_profile
+    USRP_link_report.clear()
     ret = True
     try:
-        Start_Sync_RX()
+        Start_Sync_RX(ring_buffer=ring_buffer, receiver=receiver)
         # ret &= Wait_for_sync_connection(timeout = 10)
 
         Start_Async_RX()
@@ -811,10 +1280,52 @@ def force_ternimate():
     Sync_RX_loop.terminate()
 
 
-def Sync_RX(CLIENT_STATUS, Sync_RX_condition, USRP_data_queue):
+def recv_into_buffer(data_socket, buffer, nbytes, CLIENT_STATUS=CLIENT_STATUS, timeout_limit=5):
+    '''
+    Fill a writable buffer with exactly nbytes bytes from a socket using recv_into(), without intermediate strings.
+
+    :param data_socket: connected socket object.
+    :param buffer: writable object supporting the buffer interface (i.e. a contiguous numpy array of any dtype).
+    :param nbytes: number of bytes to receive.
+    :param CLIENT_STATUS: shared status dictionary; the reception is interrupted when Sync_RX_status becomes False.
+    :param timeout_limit: number of consecutive empty reads after which the reception is declared failed.
+
+    :return the number of bytes received: a value different from nbytes represents a failure.
+    '''
+    if isinstance(buffer, np.ndarray):
+        # py2 memoryview has no cast(): slicing a complex64 view would count 8 bytes items, a uint8 view counts bytes
+        view = memoryview(buffer.reshape(-1).view(np.uint8))
+    elif hasattr(memoryview, 'cast'):
+        view = memoryview(buffer).cast('B')
+    else:
+        view = memoryview(buffer)
+    received = 0
+    empty_reads = 0
+    while received < nbytes:
+        n = data_socket.recv_into(view[received:nbytes], nbytes - received)
+        if n == 0:
+            empty_reads += 1
+            if empty_reads > timeout_limit:
+                break
+            if CLIENT_STATUS['Sync_RX_status'] == False:
+                break
+            time.sleep(0.001)
+        else:
+            empty_reads = 0
+        received += n
+    return received
+
+
+def Sync_RX(CLIENT_STATUS, Sync_RX_condition, USRP_data_queue, ring_buffer=None, receiver="string"):
     '''
     Thread that recive data from the TCP data streamer of the GPU server and loads each packet in the data queue USRP_data_queue. The format of the data is specified in a subfunction fill_queue() and consist in a tuple containing (metadata,data).
 
+    In case a shared_ring_buffer object is given, the payload of each packet is received directly inside a slot of the ring and the USRP_data_queue is not used.
+
+    The receiver argument selects how the socket is read:
+        - "string": the original loop accumulating strings returned by recv().
+        - "recv_into": header and payload are received with recv_into() inside preallocated buffers (see recv_buffer_pool).
+
     Note:
         This funtion is ment to be a standalone thread handled via the functions Start_Sync_RX() and Stop_Sync_RX().
     '''
@@ -830,6 +1341,15 @@ def Sync_RX(CLIENT_STATUS, Sync_RX_condition, USRP_data_queue):
     acc_recv_time = []
     cycle_time = []
 
+    if receiver not in SYNC_RX_RECEIVERS:
+        print_error("Sync RX receiver \'%s\' not recognized, accepted values are %s. Using \'string\'" % (
+            str(receiver), str(SYNC_RX_RECEIVERS)))
+        receiver = "string"
+
+    # preallocated buffers used by the recv_into receiver
+    header_buffer = np.empty(header_size, dtype=np.uint8)
+    buffer_pool = recv_buffer_pool()
+
     # use to pass stuff in the queue without reference
     def fill_queue(meta_data, dat, USRP_data_queue=USRP_data_queue):
         meta_data_tmp = meta_data
@@ -863,11 +1383,20 @@ def Sync_RX(CLIENT_STATUS, Sync_RX_condition, USRP_data_queue):
     # Sync_RX_condition.release()
     # acquisition loop
     start_total = time.time()
+    received_bytes = 0
+    received_packets = 0
+    last_telemetry = start_total
 
     while (internal_status):
 
         start_cycle = time.time()
 
+        # counters read by acquisition_telemetry: the status dictionary is shared between processes
+        if start_cycle - last_telemetry > TELEMETRY_SECONDS:
+            CLIENT_STATUS['rx_bytes'] = received_bytes
+            CLIENT_STATUS['rx_packets'] = received_packets
+            last_telemetry = start_cycle
+
         # counter used to prevent the API to get stuck on sevrer shutdown
         data_timeout_counter = 0
         data_timeout_limit = 5  # (seconds)
@@ -882,7 +1411,19 @@ def Sync_RX(CLIENT_STATUS, Sync_RX_condition, USRP_data_queue):
             CLIENT_STATUS['Sync_RX_status'] = False
         # print internal_status
         # Sync_RX_condition.release()
-        if (internal_status):
+        if (internal_status and receiver == "recv_into"):
+            try:
+                received = recv_into_buffer(USRP_data_socket, header_buffer, header_size, CLIENT_STATUS)
+            except socket.error as msg:
+                if msg.errno != 4:
+                    print_error("Sync thread: " + str(msg) + " error number is " + str(msg.errno))
+                received = 0
+            if received == header_size:
+                header_data = header_buffer.tostring()
+            else:
+                internal_status = False
+
+        elif (internal_status):
             header_data = ""
             try:
                 old_header_len = 0
@@ -921,13 +1462,62 @@ def Sync_RX(CLIENT_STATUS, Sync_RX_condition, USRP_data_queue):
                 # Sync_RX_condition.release()
             # Print_Sync_Header(metadata)
 
+        if (internal_status and ring_buffer is not None):
+            payload_bytes = 8 * metadata.length
+            try:
+                if metadata.length > ring_buffer.slot_samples:
+                    print_error("Packet number %d has %d samples but the shared ring buffer slots hold %d samples" % (
+                        metadata.packet_number, metadata.length, ring_buffer.slot_samples))
+                    internal_status = False
+                else:
+                    slot = ring_buffer.reserve()
+                    if slot is None:
+                        # the ring is full: the packet has to be consumed from the socket anyway
+                        slot_header, slot_payload = None, np.empty(payload_bytes, dtype=np.uint8)
+                    else:
+                        slot_header, slot_payload = slot
+                    received = recv_into_buffer(USRP_data_socket, slot_payload, payload_bytes, CLIENT_STATUS)
+                    if received != payload_bytes:
+                        print_error("Tiemout condition reached for buffer acquisition")
+                        internal_status = False
+                    elif slot_header is not None:
+                        slot_header[:] = np.frombuffer(header_data, dtype=np.uint8)
+                        ring_buffer.commit()
+                        received_bytes += header_size + payload_bytes
+                        received_packets += 1
+            except socket.error as msg:
+                print_error(msg)
+                internal_status = False
+            # the packet has already been handed over
+            continue
+
+        if (internal_status and receiver == "recv_into"):
+            payload_bytes = 8 * metadata.length
+            formatted_data = buffer_pool.acquire(metadata.length)
+            try:
+                received = recv_into_buffer(USRP_data_socket, formatted_data, payload_bytes, CLIENT_STATUS)
+            except socket.error as msg:
+                print_error(msg)
+                received = -1
+            if received != payload_bytes:
+                if received >= 0:
+                    print_error("Tiemout condition reached for buffer acquisition")
+                internal_status = False
+            else:
+                fill_queue(metadata, formatted_data)
+                received_bytes += header_size + payload_bytes
+                received_packets += 1
+            # do not keep a reference to the pool buffer
+            del formatted_data
+            continue
+
         if (internal_status):
             data = ""
             try:
                 old_len = 0
 
-                while ((old_len < 8 * metadata['length']) and internal_status):
-                    data += USRP_data_socket.recv(min(8 * metadata['length'], 8 * metadata['length'] - old_len))
+                while ((old_len < 8 * metadata.length) and internal_status):
+                    data += USRP_data_socket.recv(min(8 * metadata.length, 8 * metadata.length - old_len))
 
                     if (len(data) == old_len):
                         data_timeout_counter += 1
@@ -944,21 +1534,32 @@ def Sync_RX(CLIENT_STATUS, Sync_RX_condition, USRP_data_queue):
                 internal_status = False
         if (internal_status):
             try:
-                formatted_data = np.fromstring(data[:], dtype=data_type, count=metadata['length'])
+                formatted_data = np.fromstring(data[:], dtype=data_type, count=metadata.length)
 
             except ValueError:
-                print_error("Packet number " + str(metadata['packet_number']) + " has a length of " + str(
-                    len(data) / float(8)) + "/" + str(metadata['length']))
+                print_error("Packet number " + str(metadata.packet_number) + " has a length of " + str(
+                    len(data) / float(8)) + "/" + str(metadata.length))
                 internal_status = False
             else:
                 # USRP_data_queue.put((metadata,formatted_data))
                 fill_queue(metadata, formatted_data)
+                received_bytes += header_size + len(data)
+                received_packets += 1
     '''
     except KeyboardInterrupt:
             print_warning("Keyboard interrupt aborting connection...")
             internal_status = False
             CLIENT_STATUS['Sync_RX_status'] = False
     '''
+    CLIENT_STATUS['rx_bytes'] = received_bytes
+    CLIENT_STATUS['rx_packets'] = received_packets
+    elapsed_total = time.time() - start_total
+    if received_bytes > 0 and elapsed_total > 0:
+        print_debug("Sync RX (%s receiver) received %.1f MB in %.1f s: %.2f MB/s" % (
+            receiver, received_bytes / 1e6, elapsed_total, received_bytes / 1e6 / elapsed_total))
+    if receiver == "recv_into" and buffer_pool.misses > 0:
+        print_debug("Sync RX buffer pool allocated %d additional buffers" % buffer_pool.misses)
+
     try:
         USRP_data_socket.shutdown(1)
         USRP_data_socket.close()
@@ -992,8 +1593,14 @@ def signal_handler(sig, frame):
 
 Signal.signal(Signal.SIGINT, signal_handler)
 
-def Start_Sync_RX():
-    global Sync_RX_loop, USRP_data_socket, USRP_data_queue
+def Start_Sync_RX(ring_buffer=None, receiver=None):
+    '''
+    Start the Sync_RX process.
+
+    :param ring_buffer: optional shared_ring_buffer object used in place of the USRP_data_queue to transfer packets.
+    :param receiver: socket reading strategy, see Sync_RX(). Default is SYNC_RX_RECEIVER.
+    '''
+    global Sync_RX_loop, USRP_data_socket, USRP_data_queue, USRP_ring_buffer
     try:
         try:
             del USRP_data_socket
@@ -1002,10 +1609,14 @@ def Start_Sync_RX():
         except socket.error as msg:
             print msg
             pass
+        USRP_ring_buffer = ring_buffer
         Sync_RX_loop = multiprocessing.Process(target=Sync_RX, name="Sync_RX",
-                                               args=(CLIENT_STATUS, Sync_RX_condition, USRP_data_queue), kwargs={})
+                                               args=(CLIENT_STATUS, Sync_RX_condition, USRP_data_queue),
+                                               kwargs={'ring_buffer': ring_buffer,
+                                                       'receiver': receiver if receiver is not None else SYNC_RX_RECEIVER})
         Sync_RX_loop.daemon = True
         Sync_RX_loop.start()
+        USRP_link_report.update(apply_process_profile(Sync_RX_loop.pid, USRP_link_profile))
     except RuntimeError:
         print_warning("Falling back to threading interface for Sync RX thread. Network could be slow")
         Sync_RX_loop = Thread(target=Sync_RX, name="Sync_RX", args=(), kwargs={})
@@ -16,7 +16,8 @@ import os
 import socket
 import Queue
 from Queue import Empty
-from threading import Thread, Condition
+from threading import Thread, Condition, Event, Lock
+from collections import OrderedDict
 import multiprocessing
 from joblib import Parallel, delayed
 from subprocess import call
@@ -41,19 +42,30 @@ import matplotlib.patches as mpatches
 # needed to print the data acquisition process
 import progressbar
 
+# optional fast compression filters for the raw data
+try:
+    import hdf5plugin
+except ImportError:
+    hdf5plugin = None
+
 # import submodules
 from USRP_low_level import *
 
 def format_filename(filename):
     return os.path.splitext(filename)[0]+".h5"
 
-def bound_open(filename):
+def bound_open(filename, swmr = False):
     '''
     Return pointer to file. It's user responsability to call the close() method.
+
+    :param swmr: open the file as a reader in single writer multiple reader mode (file being written).
     '''
     try:
         filename = format_filename(filename)
-        f = h5py.File(filename,'r')
+        if swmr:
+            f = h5py.File(filename, 'r', libver='latest', swmr=True)
+        else:
+            f = h5py.File(filename,'r')
     except IOError as msg:
         print_error("Cannot open the specified file: "+str(msg))
         f = None
@@ -114,7 +126,7 @@ def get_tx_info(filename, ant=None):
 
 
 def openH5file(filename, ch_list=None, start_sample=None, last_sample=None, usrp_number=None, front_end=None,
-               verbose=False, error_coord=False, big_file = False):
+               verbose=False, error_coord=False, big_file = False, swmr = False):
     '''
     Retrive Raw data from an hdf5 file generated with pyUSRP.
 
@@ -126,7 +138,11 @@ def openH5file(filename, ch_list=None, start_sample=None, last_sample=None, usrp
     :param front_end: select the front end for data sourcing. Default is automatically detected or A.
     :param verbose: print more information about the opening process.
     :param error_coord: If True returns (samples, err_coord) where err_coord is a list of tuples containing start and end sample of each faulty packet.
-    :param big_file: default is False. if True last_sample and start_sample are ignored and the hdf5 object containing the raw data is returned. This is usefull when dealing with very large files. IMPORTANT: is user responsability to close the file if big_file is True, see return sepcs.
+    :param big_file: default is False. if True last_sample and start_sample are ignored and the hdf5 object containing the raw data is returned. This is usefull when dealing with very large files. IMPORTANT: is user responsability to close the file if big_file is True, see return sepcs. See measurement_view for a lazy alternative.
+    :param swmr: open a file that is still being written by Packets_to_file(swmr = True). The samples returned are limited to the ones already written. To follow the acquisition use tail_H5file().
+
+    Note:
+        - raw data written with the \'contiguous\' layout is memory mapped (see H5_memmap()): the array returned is a read only view of the file.
 
     :return: array-like object containing the data in the form data[channel][samples].
     :return: In case big_file is True returns the file object (so the user is able to close it) and the raw dataset. (file_pointer, dataset)
@@ -142,7 +158,18 @@ def openH5file(filename, ch_list=None, start_sample=None, last_sample=None, usrp
     if (verbose):
         print_debug("Opening file \"" + filename + ".h5\"... ")
 
-    f = bound_open(filename)
+    if not os.path.exists(filename) and os.path.isdir(spool_folder(filename)):
+        return openSpool(filename, ch_list=ch_list, start_sample=start_sample, last_sample=last_sample,
+                         usrp_number=usrp_number, front_end=front_end, verbose=verbose, error_coord=error_coord,
+                         big_file=big_file)
+
+    rollover_files = get_rollover_files(filename)
+    if len(rollover_files) > 1:
+        return openH5set(rollover_files, ch_list=ch_list, start_sample=start_sample, last_sample=last_sample,
+                         usrp_number=usrp_number, front_end=front_end, verbose=verbose, error_coord=error_coord,
+                         big_file=big_file)
+
+    f = bound_open(filename, swmr = swmr)
     if not f:
         return np.asarray([])
 
@@ -153,13 +180,13 @@ def openH5file(filename, ch_list=None, start_sample=None, last_sample=None, usrp
         print_error("No USRP data found in the hdf5 file")
         return np.asarray([])
 
-    if (not usrp_number) and chk_multi_usrp(f) != 1:
+    if (usrp_number is None) and chk_multi_usrp(f) != 1:
         this_warning = "Multiple usrp found in the file but no preference given to open file function. Assuming usrp " + str(
-            (f.keys()[0]).split("ata")[1])
+            (f.keys()[0]).split("ata")[1]) + ". See openH5devices() to open all of them."
         print_warning(this_warning)
         group_name = "raw_data" + str((f.keys()[0]).split("ata")[1])
 
-    if (not usrp_number) and chk_multi_usrp(f) == 1:
+    if (usrp_number is None) and chk_multi_usrp(f) == 1:
         group_name = "raw_data0"  # f.keys()[0]
 
     if (usrp_number != None):
@@ -249,56 +276,36 @@ def openH5file(filename, ch_list=None, start_sample=None, last_sample=None, usrp
         old_mode = False
 
     if old_mode:
-        skip_warning = True
         print_debug("Using old dataset mode to open file \'%s\'" % filename)
-        # data are contained in multiple dataset
-
-        if verbose:
-            widgets = [progressbar.Percentage(), progressbar.Bar()]
-            bar = progressbar.ProgressBar(widgets=widgets, max_value=len(sub_group.keys())).start()
-            read = 0
-
-        current_len = np.shape(sub_group["dataset_1"])[1]
-        N_dataset = len(sub_group.keys())
-
+        # data are contained in multiple dataset: only the ones overlapping the selection are read
         print_warning(
-            "Raw amples inside " + filename + " have not been rearranged: the read from file can be slow for big files due to dataset reading overhead")
-
-        for i in range(N_dataset):
-            try:
-                dataset_name = "dataset_" + str(int(1 + i))
-
-                sample_index += current_len
+            "Raw amples inside " + filename + " have not been rearranged: the read from file can be slow for big files due to dataset reading overhead. See repack_legacy_H5()")
 
-                truncate_final = min(last_sample, last_sample - sample_index)
-                if (last_sample >= sample_index):
-                    truncate_final = current_len
-                elif (last_sample < sample_index):
-                    truncate_final = current_len - (sample_index - last_sample)
-
-                if (sample_index > start_sample) and (truncate_final > 0):
-                    present_error = sub_group[dataset_name].attrs.get('errors')
-                    errors += int(present_error)
-                    if present_error != 0:
-                        err_index.append((sample_index - current_len, sample_index + current_len))
-                    truncate_initial = max(0, current_len - (sample_index - start_sample))
-
-                    z.append(sub_group[dataset_name][ch_list, truncate_initial:truncate_final])
-            except KeyError:
-                if skip_warning:
-                    print_warning("Cannot find one or more dataset(s) in the h5 file")
-                    skip_warning = False
+        offsets, dataset_errors = legacy_index(sub_group)
+        last_sample = min(last_sample, offsets[-1])
+        first_k = max(np.searchsorted(offsets, start_sample, side='right') - 1, 0)
+        last_k = np.searchsorted(offsets, last_sample, side='left')
 
+        if verbose:
+            widgets = [progressbar.Percentage(), progressbar.Bar()]
+            bar = progressbar.ProgressBar(widgets=widgets, max_value=max(last_k - first_k, 1)).start()
+
+        for k in range(first_k, last_k):
+            if offsets[k + 1] == offsets[k]:
+                continue
+            if dataset_errors[k] != 0:
+                errors += int(dataset_errors[k])
+                err_index.append((offsets[k], offsets[k + 1]))
+            z.append(sub_group["dataset_" + str(int(1 + k))][ch_list, max(start_sample - offsets[k], 0):
+                                                              min(last_sample, offsets[k + 1]) - offsets[k]])
             if verbose:
-                try:
-                    bar.update(read)
-                except:
-                    print_debug("decrease samples in progeressbar")
-                read += 1
+                bar.update(k - first_k)
         if errors > 0: print_warning("The measure opened contains %d erorrs!" % errors)
         if (verbose): print "Done!"
         f.close()
 
+        if len(z) == 0:
+            z.append(np.zeros((len(ch_list), 0), dtype=np.complex64))
         if error_coord:
             return np.concatenate(tuple(z), 1), err_index
         return np.concatenate(tuple(z), 1)
@@ -313,18 +320,27 @@ def openH5file(filename, ch_list=None, start_sample=None, last_sample=None, usrp
         if samples is None:
             print_warning("Non samples attrinut found: data extracted from file could include zero padding")
             samples = last_sample
+        # the preallocated part of the dataset (swmr or contiguous layout) has not been written
+        last_sample = min(last_sample, samples)
         if len(sub_group["errors"]) > 0:
             print_warning("The measure opened contains %d erorrs!" % len(sub_group["errors"]))
 
         if not big_file:
-            if error_coord:
+            mapped = None if swmr else H5_memmap(sub_group["data"])
+            if mapped is not None:
+                # contiguous selections of channels are views of the file
+                if list(ch_list) == range(ch_list[0], ch_list[-1] + 1):
+                    data = mapped[ch_list[0]:ch_list[-1] + 1, start_sample:last_sample]
+                else:
+                    data = mapped[ch_list, start_sample:last_sample]
+            else:
                 data = sub_group["data"][ch_list, start_sample:last_sample]
+            if error_coord:
                 errors = sub_group["errors"][:]
                 if errors is None:
                     errors = []
                 f.close()
                 return data, errors
-            data = sub_group["data"][ch_list, start_sample:last_sample]
             print_debug(
                 "Shape returned from openH5file(%s) call: %s is (channels,samples)" % (filename, str(np.shape(data))))
             f.close()
@@ -337,6 +353,1144 @@ def openH5file(filename, ch_list=None, start_sample=None, last_sample=None, usrp
 
 
 
+# index of the legacy raw data groups already scanned, by (filename, group name, modification time)
+_legacy_index_cache = {}
+
+
+def legacy_index(sub_group):
+    '''
+    Index of a raw data group written by the old server, where the packets are stored in the datasets
+    dataset_1..dataset_N. The index is read from the "legacy_index" dataset written by index_legacy_H5() if present,
+    otherwise it is built from the dataset shapes and kept in memory for the next calls.
+
+    :param sub_group: h5py group of the front end.
+
+    :return a tuple (offsets, errors): the dataset_k holds the samples offsets[k-1]:offsets[k] of the measure (N+1
+        elements) and errors contains the error count of each dataset (N elements). Missing datasets have no samples.
+    '''
+    if "legacy_index" in sub_group:
+        lengths, errors = sub_group["legacy_index"][:]
+    else:
+        filename = sub_group.file.filename
+        key = (filename, sub_group.name, os.path.getmtime(filename))
+        if key not in _legacy_index_cache:
+            n_datasets = len([name for name in sub_group.keys() if name.startswith("dataset_")])
+            lengths = np.zeros(n_datasets, dtype=np.int64)
+            errors = np.zeros(n_datasets, dtype=np.int64)
+            for k in range(n_datasets):
+                try:
+                    dataset = sub_group["dataset_" + str(int(1 + k))]
+                except KeyError:
+                    continue
+                lengths[k] = dataset.shape[1]
+                errors[k] = int(dataset.attrs.get('errors', 0))
+            _legacy_index_cache[key] = (lengths, errors)
+        lengths, errors = _legacy_index_cache[key]
+    offsets = np.concatenate(([0], np.cumsum(lengths))).astype(np.int64)
+    return offsets, np.asarray(errors, dtype=np.int64)
+
+
+def _legacy_groups(h5file):
+    '''
+    Front end groups of a file written by the old server.
+    '''
+    groups = []
+    for dev_name in h5file.keys():
+        if not dev_name.startswith("raw_data"):
+            continue
+        for group_name in h5file[dev_name].keys():
+            group = h5file[dev_name][group_name]
+            if isinstance(group, h5py.Group) and "dataset_1" in group:
+                groups.append(group)
+    return groups
+
+
+def index_legacy_H5(filename):
+    '''
+    Write the index of the raw data groups of a file written by the old server in the "legacy_index" datasets, so that
+    openH5file() reads only the datasets overlapping a selection without scanning the file. See repack_legacy_H5() to
+    convert the file instead.
+
+    :param filename: name of the file.
+
+    :return the number of groups indexed.
+    '''
+    f = h5py.File(format_filename(filename), 'r+')
+    groups = _legacy_groups(f)
+    for group in groups:
+        if "legacy_index" in group:
+            del group["legacy_index"]
+        offsets, errors = legacy_index(group)
+        group.create_dataset("legacy_index", data=np.asarray([np.diff(offsets), errors], dtype=np.int64))
+    f.close()
+    return len(groups)
+
+
+def repack_legacy_H5(filename, output=None, layout=None, replace=False):
+    '''
+    Convert a file written by the old server (packets in the datasets dataset_1..dataset_N) to the layout written by
+    Packets_to_file(): a single "data" dataset with the "errors" and "sequence" datasets next to it. The
+    datasets are copied one at the time so the memory used is bounded by the largest packet. The other groups and the
+    attributes are copied as they are.
+
+    :param filename: name of the file.
+    :param output: name of the repacked file. Default is <filename>_repacked.h5.
+    :param layout: raw data layout policy (see raw_data_layout()).
+    :param replace: replace the original file with the repacked one.
+
+    :return the name of the repacked file, filename if the file is not in the old format or None if the conversion
+        failed.
+    '''
+    filename = format_filename(filename)
+    if output is None:
+        output = os.path.splitext(filename)[0] + "_repacked.h5"
+    output = format_filename(output)
+    fin = bound_open(filename)
+    if not fin:
+        return None
+    legacy = [group.name for group in _legacy_groups(fin)]
+    if len(legacy) == 0:
+        fin.close()
+        print_debug("File %s is not in the old server format, nothing to repack" % filename)
+        return filename
+    try:
+        fout = h5py.File(output, 'w')
+    except IOError as msg:
+        fin.close()
+        print_error("Cannot create the repacked file: " + str(msg))
+        return None
+
+    try:
+        for name in fin.attrs:
+            fout.attrs[name] = fin.attrs[name]
+        legacy_devices = set([name.split("/")[1] for name in legacy])
+        for dev_name in fin.keys():
+            if dev_name not in legacy_devices:
+                fin.copy(dev_name, fout)
+                continue
+            dev_group = fout.create_group(dev_name)
+            for name in fin[dev_name].attrs:
+                dev_group.attrs[name] = fin[dev_name].attrs[name]
+            for group_name in fin[dev_name].keys():
+                source = fin[dev_name][group_name]
+                if source.name not in legacy:
+                    fin.copy(source, dev_group)
+                    continue
+                group = dev_group.create_group(group_name)
+                for name in source.attrs:
+                    group.attrs[name] = source.attrs[name]
+
+                offsets, errors = legacy_index(source)
+                n_chan = source["dataset_1"].shape[0]
+                try:
+                    data_layout = raw_data_layout(dict(source.attrs), n_chan, int(offsets[-1]), layout)
+                except (KeyError, IndexError, TypeError):
+                    # old files may miss the DSP description
+                    data_layout = {'chunks': True}
+                data_layout.setdefault('maxshape', (None, None))
+                data = group.create_dataset("data", (n_chan, int(offsets[-1])), dtype=source["dataset_1"].dtype,
+                                            **data_layout)
+                for k in range(len(errors)):
+                    if offsets[k + 1] > offsets[k]:
+                        data[:, offsets[k]:offsets[k + 1]] = source["dataset_" + str(int(1 + k))][...]
+                data.attrs.create("samples", int(offsets[-1]))
+
+                # rows: first and last sample of each faulty packet
+                faulty = np.nonzero(errors)[0]
+                if len(faulty) > 0:
+                    err_coord = np.asarray([offsets[faulty], offsets[faulty + 1]], dtype=np.int64)
+                else:
+                    err_coord = np.zeros((0, 0), dtype=np.int64)
+                group.create_dataset("errors", data=err_coord, maxshape=(None, None))
+                group.create_dataset("sequence", (3, 0), dtype=np.dtype(np.int64), maxshape=(3, None), chunks=True)
+    except (RuntimeError, IOError, KeyError) as err:
+        fin.close()
+        fout.close()
+        os.remove(output)
+        print_error("Cannot repack file %s: %s" % (filename, str(err)))
+        return None
+    fin.close()
+    fout.close()
+
+    if replace:
+        os.rename(output, filename)
+        invalidate_metadata_cache(filename)
+        return filename
+    invalidate_metadata_cache(output)
+    return output
+
+
+def repack_legacy_files(filenames, layout=None, replace=False, n_jobs=N_CORES):
+    '''
+    Repack a list of files written by the old server in parallel (see repack_legacy_H5()).
+
+    :param filenames: list of file names.
+    :param layout: raw data layout policy (see raw_data_layout()).
+    :param replace: replace the original files with the repacked ones.
+    :param n_jobs: number of files converted at the same time.
+
+    :return the list of repacked file names (None for the files that could not be converted).
+    '''
+    return Parallel(n_jobs=max(min(n_jobs, len(filenames)), 1), verbose=1, backend=parallel_backend)(
+        delayed(repack_legacy_H5)(filename, layout=layout, replace=replace) for filename in filenames)
+
+
+def rollover_filename(filename, index):
+    '''
+    Name of a file in a rolled over acquisition (see Packets_to_file()).
+
+    :param filename: name of the first file of the set.
+    :param index: sequence index of the file.
+
+    :return the filename.
+    '''
+    if index == 0:
+        return format_filename(filename)
+    return os.path.splitext(filename)[0] + "_part%d.h5" % int(index)
+
+
+def get_rollover_files(filename):
+    '''
+    Get the list of files of a rolled over acquisition.
+
+    :param filename: name of the first file of the set.
+
+    :return the list of filenames in sequence order. A file that is not part of a set returns a list of one element.
+    '''
+    files = [format_filename(filename)]
+    if not os.path.exists(rollover_filename(filename, 1)):
+        return files
+    # a file replaced by create_h5_file() may leave the parts of an old set behind
+    f = bound_open(filename)
+    if not f:
+        return files
+    is_set = f.attrs.get("sequence_index") is not None
+    f.close()
+    if not is_set:
+        return files
+    while os.path.exists(rollover_filename(filename, len(files))):
+        files.append(rollover_filename(filename, len(files)))
+    return files
+
+
+def H5_sequence_init(H5fp, index, offsets, part_samples):
+    '''
+    Mark a file formatted by Param_to_H5() as part of a rolled over acquisition and size its raw data datasets for
+    the part.
+
+    :param H5fp: H5 file opened in write mode.
+    :param index: sequence index of the file.
+    :param offsets: dictionary containing, per frontend, the index of the first sample of the file in the acquisition.
+    :param part_samples: dictionary containing, per frontend, the maximum number of samples per channel in the file.
+    '''
+    H5fp.attrs.create("sequence_index", int(index))
+    for dev_name in H5fp.keys():
+        if dev_name.startswith("raw_data"):
+            for group_name in H5fp[dev_name].keys():
+                try:
+                    dataset = H5fp[dev_name][group_name]["data"]
+                except KeyError:
+                    continue
+                offset = offsets.get(group_name, 0)
+                dataset.attrs.create("sequence_start", int(offset))
+                if group_name in part_samples:
+                    expected = max(dataset.shape[1] - offset, 0)
+                    dataset.resize(min(expected, part_samples[group_name]), 1)
+
+
+class rollover_dataset(object):
+    '''
+    Read only view of the raw data of a rolled over acquisition as a single (channels, samples) dataset.
+    Supports indexing as data[channels, first:last], iteration over channels, shape and len.
+
+    :param filenames: list of files of the set (see get_rollover_files()).
+    :param usrp_number: the server number of the usrp device.
+    :param front_end: name of the front end. Default is the first receiver found.
+
+    Note:
+        - It's user responsability to call the close() method.
+    '''
+
+    def __init__(self, filenames, usrp_number=None, front_end=None):
+        if usrp_number is None:
+            usrp_number = 0
+        self.files = [bound_open(fn) for fn in filenames]
+        group_name = "raw_data" + str(int(usrp_number))
+        if front_end is None:
+            front_end = get_receivers(self.files[0][group_name])[0]
+        self.datasets = [f[group_name][str(front_end)]["data"] for f in self.files]
+        self.error_datasets = [f[group_name][str(front_end)]["errors"] for f in self.files]
+        lengths = []
+        for ds in self.datasets:
+            samples = ds.attrs.get("samples")
+            lengths.append(ds.shape[1] if samples is None else min(int(samples), ds.shape[1]))
+        self.offsets = np.concatenate(([0], np.cumsum(lengths))).astype(np.int64)
+        self.shape = (self.datasets[0].shape[0], int(self.offsets[-1]))
+        self.dtype = self.datasets[0].dtype
+        self.attrs = self.datasets[0].attrs
+
+    def __len__(self):
+        return self.shape[0]
+
+    def __iter__(self):
+        for i in range(self.shape[0]):
+            yield self[i]
+
+    def __getitem__(self, key):
+        if not isinstance(key, tuple):
+            key = (key, slice(None))
+        channels, samples = key
+        single_sample = not isinstance(samples, slice)
+        if single_sample:
+            samples = slice(int(samples), int(samples) + 1)
+        start, stop, step = samples.indices(self.shape[1])
+        blocks = []
+        for i in range(len(self.datasets)):
+            first = max(start, self.offsets[i])
+            last = min(stop, self.offsets[i + 1])
+            if last > first:
+                blocks.append(self.datasets[i][channels, first - self.offsets[i]:last - self.offsets[i]])
+        if len(blocks) == 0:
+            return self.datasets[0][channels, 0:0]
+        data = np.concatenate(blocks, axis=-1)[..., ::step]
+        if single_sample:
+            return data[..., 0]
+        return data
+
+    def errors(self):
+        '''
+        :return the coordinates of the faulty packets in the acquisition as a (2, N) array.
+        '''
+        errors = []
+        for i in range(len(self.error_datasets)):
+            e = self.error_datasets[i][:]
+            if np.shape(e)[0] == 2 and np.shape(e)[1] > 0:
+                errors.append(e + self.offsets[i])
+        if len(errors) == 0:
+            return np.zeros((0, 0), dtype=np.int64)
+        return np.concatenate(errors, axis=1)
+
+    def gaps(self):
+        '''
+        :return the samples affected by packet sequence gaps in the acquisition as a (2, N) array of [first, last)
+            ranges (see _sequence_gaps()). A zero filled range can continue in the next file.
+        '''
+        gaps = []
+        for i in range(len(self.files)):
+            gaps.append(_sequence_gaps(self.datasets[i].parent) + self.offsets[i])
+        return np.concatenate(gaps, axis=1).astype(np.int64)
+
+    def close(self):
+        for f in self.files:
+            f.close()
+
+
+def _sequence_gaps(group):
+    '''
+    Samples affected by the sequence gaps recorded in the "sequence" dataset of a raw data group, as a (2, N) array of
+    [first, last) dataset indices. When the lost packets were zero filled the range covers the zeros (lost packets
+    times the "packet_samples" attribute), otherwise only the first sample after the gap.
+    '''
+    try:
+        sequence = group["sequence"]
+        events = sequence[:]
+    except KeyError:
+        return np.zeros((2, 0), dtype=np.int64)
+    return _gap_ranges(events, sequence.attrs.get("packet_samples"))
+
+
+def _gap_ranges(events, packet_samples):
+    '''
+    Convert sequence events (rows: dataset index, expected packet number, received packet number) to [first, last)
+    ranges. Duplicates are not gaps.
+    '''
+    if np.shape(events)[1] == 0:
+        return np.zeros((2, 0), dtype=np.int64)
+    events = np.asarray(events, dtype=np.int64)
+    events = events[:, events[2] > events[1]]
+    if packet_samples is None:
+        length = np.ones(np.shape(events)[1], dtype=np.int64)
+    else:
+        length = (events[2] - events[1]) * int(packet_samples)
+    return np.asarray([events[0], events[0] + length], dtype=np.int64)
+
+
+def openH5set(filenames, ch_list=None, start_sample=None, last_sample=None, usrp_number=None, front_end=None,
+              verbose=False, error_coord=False, big_file=False):
+    '''
+    Retrive raw data from the files of a rolled over acquisition as a single timestream. Called by openH5file() when
+    a set is detected, arguments and returns are the same.
+
+    :param filenames: list of files of the set (see get_rollover_files()).
+
+    Note:
+        - when big_file is True a rollover_dataset is returned in place of both the file and the dataset.
+    '''
+    if verbose:
+        print_debug("Opening a rolled over acquisition of %d files" % len(filenames))
+    data_set = rollover_dataset(filenames, usrp_number=usrp_number, front_end=front_end)
+    errors = data_set.errors()
+    if np.shape(errors)[0] > 0:
+        print_warning("The measure opened contains %d erorrs!" % np.shape(errors)[1])
+
+    if big_file:
+        if error_coord:
+            return data_set, data_set, errors
+        return data_set, data_set
+
+    if ch_list is None:
+        ch_list = range(data_set.shape[0])
+    if start_sample is None:
+        start_sample = 0
+    if last_sample is None:
+        last_sample = data_set.shape[1]
+    data = data_set[ch_list, int(start_sample):int(last_sample)]
+    data_set.close()
+    print_debug("Shape returned from openH5set() call: %s is (channels,samples)" % str(np.shape(data)))
+    if error_coord:
+        return data, errors
+    return data
+
+
+def get_sample_rate(rx_param):
+    '''
+    Samples per second per channel of the raw data of a RX frontend.
+
+    :param rx_param: the parameter dictionary of a RX frontend or the attributes of its group in a H5 file.
+
+    :return the rate in Hz.
+    '''
+    rate = float(rx_param['rate'])
+    decim = max(int(rx_param['decim']), 1)
+    if rx_param['wave_type'][0] == "TONES":
+        return rate / (max(int(rx_param['fft_tones']), 1) * decim)
+    return rate / decim
+
+
+def get_devices(filename):
+    '''
+    Get the usrp server numbers of the raw data groups in a file.
+
+    :param filename: name of the file.
+
+    :return sorted list of integers.
+    '''
+    f = bound_open(filename)
+    if not f:
+        return []
+    devices = sorted([int(name[len("raw_data"):]) for name in f.keys() if name.startswith("raw_data")])
+    f.close()
+    return devices
+
+
+def H5_align_devices(filenames):
+    '''
+    Align the raw data of several USRP servers acquired in parallel (see multi_acquisition) by start epoch.
+    The latest start_epoch among all the frontends becomes the common start and each data dataset gets the
+    attributes \"align_epoch\" (the common start) and \"align_samples\" (the index of the first sample at the common
+    start, rounded to the closest sample).
+
+    :param filenames: list of files containing the raw data groups.
+
+    :return dictionary {(usrp number, frontend): align_samples}.
+    '''
+    datasets = []
+    for filename in filenames:
+        f = bound_open(filename)
+        if not f:
+            continue
+        for dev_name in f.keys():
+            if not dev_name.startswith("raw_data"):
+                continue
+            for front_end in get_receivers(f[dev_name]):
+                try:
+                    dataset = f[dev_name][front_end]["data"]
+                except KeyError:
+                    continue
+                epoch = dataset.attrs.get("start_epoch")
+                if epoch is None or epoch == 0:
+                    print_warning("%s/%s in %s has no start epoch and cannot be aligned" % (dev_name, front_end, filename))
+                    continue
+                datasets.append((filename, dev_name, front_end, float(epoch)))
+        f.close()
+
+    alignment = {}
+    if len(datasets) == 0:
+        return alignment
+    align_epoch = max([d[3] for d in datasets])
+    for filename in filenames:
+        f = h5py.File(format_filename(filename), 'r+')
+        for source, dev_name, front_end, epoch in datasets:
+            if source != filename:
+                continue
+            rx_group = f[dev_name][front_end]
+            samples = int(round((align_epoch - epoch) * get_sample_rate(rx_group.attrs)))
+            rx_group["data"].attrs.create("align_epoch", align_epoch, dtype=np.float64)
+            rx_group["data"].attrs.create("align_samples", samples)
+            alignment[(int(dev_name[len("raw_data"):]), front_end)] = samples
+        f.close()
+    return alignment
+
+
+def H5_link_devices(filename, device_files):
+    '''
+    Create a file exposing the raw data groups of several files, i.e. the files written per USRP server by
+    multi_acquisition, as its own groups. The groups are external links: no data is copied and the device files
+    have to stay in the same folder of the file.
+
+    :param filename: name of the file to create.
+    :param device_files: list of the files to link.
+
+    :return the filename.
+    '''
+    filename = format_filename(filename)
+    f = h5py.File(filename, 'w')
+    for device_file in device_files:
+        device_file = format_filename(device_file)
+        src = bound_open(device_file)
+        if not src:
+            continue
+        names = [name for name in src.keys() if name.startswith("raw_data")]
+        src.close()
+        for name in names:
+            if name in f:
+                print_warning("Group %s of %s is already linked from another file" % (name, device_file))
+                continue
+            f[name] = h5py.ExternalLink(os.path.basename(device_file), "/" + name)
+    f.attrs.create("device_files", [os.path.basename(format_filename(d)) for d in device_files])
+    f.close()
+    invalidate_metadata_cache(filename)
+    return filename
+
+
+def openH5devices(filename, ch_list=None, start_sample=None, last_sample=None, front_end=None, align=True,
+                  verbose=False):
+    '''
+    Retrive the raw data of all the USRP servers in a file (see multi_acquisition).
+
+    :param filename: name of the file.
+    :param ch_list: a list containing the channel numbers to open.
+    :param start_sample: first sample returned, counted from the common start when align is True.
+    :param last_sample: last sample returned, counted from the common start when align is True.
+    :param front_end: select the front end for data sourcing. Default is automatically detected.
+    :param align: offset each device by the \"align_samples\" attribute written by H5_align_devices().
+    :param verbose: print more information about the opening process.
+
+    :return dictionary {usrp number: data[channel][samples]}.
+    '''
+    if start_sample is None:
+        start_sample = 0
+    result = {}
+    for device in get_devices(filename):
+        offset = 0
+        if align:
+            try:
+                with measurement_view(filename, usrp_number=device, front_end=front_end) as view:
+                    offset = view.attrs.get("align_samples", 0)
+            except ValueError:
+                pass
+        result[device] = openH5file(filename, ch_list=ch_list, start_sample=start_sample + offset,
+                                    last_sample=None if last_sample is None else last_sample + offset,
+                                    usrp_number=device, front_end=front_end, verbose=verbose)
+    return result
+
+
+class measurement_view(object):
+    '''
+    Lazy, read only view of the raw data of a frontend in a measure. The file is opened at the first access and the
+    usrp number, the front end and the sample rate are resolved once. Indexing reads only the requested hyperslab:
+
+        - view[channels, samples] with samples in samples per channel.
+        - view.time[channels, seconds] with seconds converted to samples using the rate and decimation of the measure.
+
+    channels can be an integer, a slice or a list in any order; samples and seconds can be a number or a slice with a
+    positive step. Single files, rolled over sets and spools are supported; files of the old server format have to be
+    opened with openH5file().
+
+    :param filename: name of the file.
+    :param usrp_number: the server number of the usrp device. Default is 0.
+    :param front_end: name of the front end. Default is the first receiver found.
+    :param swmr: open a file that is still being written by Packets_to_file(swmr = True). See refresh().
+
+    Example:
+    >>> with measurement_view("USRP_Noise_20190315_105315") as data:
+    >>>     print data.shape, data.rate
+    >>>     block = data[[3, 0], 1000:2000]
+    >>>     first_second = data.time[:, 0:1.]
+    '''
+
+    def __init__(self, filename, usrp_number=None, front_end=None, swmr=False):
+        self.filename = format_filename(filename)
+        self.usrp_number = 0 if usrp_number is None else int(usrp_number)
+        self.front_end = None if front_end is None else str(front_end)
+        self.swmr = swmr
+        self.time = _time_indexer(self)
+        self._file = None
+        self._data = None
+        self._errors = None
+        self._map = None
+        self.rx_param = None
+        self.rate = None
+        self.attrs = None
+        self._samples = 0
+
+    def _open(self):
+        if self._data is not None:
+            return
+        dev_name = "raw_data" + str(self.usrp_number)
+
+        if not os.path.exists(self.filename) and os.path.isdir(spool_folder(self.filename)):
+            info = get_spool_info(self.filename)
+            if self.front_end is None:
+                self.front_end = sorted(info['streams'][dev_name].keys())[0]
+            self._data = spool_dataset(self.filename, usrp_number=self.usrp_number, front_end=self.front_end)
+            self.rx_param = info['parameters'][self.front_end]
+            self._samples = self._data.shape[1]
+
+        else:
+            f = bound_open(self.filename, swmr=self.swmr)
+            if not f:
+                err_msg = "Cannot open measure '%s'" % self.filename
+                print_error(err_msg)
+                raise ValueError(err_msg)
+            try:
+                group = f[dev_name]
+                if self.front_end is None:
+                    self.front_end = get_receivers(group)[0]
+                sub_group = group[self.front_end]
+            except (KeyError, IndexError):
+                f.close()
+                err_msg = "Cannot find the raw data of usrp %d front end %s in '%s'" % (
+                    self.usrp_number, str(self.front_end), self.filename)
+                print_error(err_msg)
+                raise ValueError(err_msg)
+            if "data" not in sub_group:
+                f.close()
+                err_msg = "Measure \'%s\' is in the old server format: use openH5file() or repack_legacy_H5()" % (
+                    self.filename)
+                print_error(err_msg)
+                raise ValueError(err_msg)
+            self.rx_param = dict(sub_group.attrs)
+
+            rollover_files = get_rollover_files(self.filename)
+            if len(rollover_files) > 1:
+                f.close()
+                self._data = rollover_dataset(rollover_files, usrp_number=self.usrp_number,
+                                              front_end=self.front_end)
+                self._samples = self._data.shape[1]
+            else:
+                self._file = f
+                self._data = sub_group["data"]
+                self._errors = sub_group["errors"]
+                self._samples = self._h5_samples()
+                if not self.swmr:
+                    self._map = H5_memmap(self._data)
+
+        self.rate = get_sample_rate(self.rx_param)
+        self.attrs = self._data.attrs
+
+    def _h5_samples(self):
+        samples = self._data.attrs.get("samples")
+        if samples is None:
+            return self._data.shape[1]
+        return min(int(samples), self._data.shape[1])
+
+    def refresh(self):
+        '''
+        Update the number of samples of a file opened in single writer multiple reader mode.
+
+        :return the number of samples per channel.
+        '''
+        self._open()
+        if self.swmr and self._file is not None:
+            self._data.refresh()
+            self._samples = self._h5_samples()
+        return self._samples
+
+    @property
+    def shape(self):
+        self._open()
+        return (self._data.shape[0], self._samples)
+
+    @property
+    def dtype(self):
+        self._open()
+        return self._data.dtype
+
+    def __len__(self):
+        return self.shape[0]
+
+    def __getitem__(self, key):
+        if not isinstance(key, tuple):
+            key = (key, slice(None))
+        channels, samples = key
+        n_chan, n_samples = self.shape
+
+        single_channel = isinstance(channels, (int, long, np.integer))
+        if single_channel:
+            channels = [int(channels)]
+        elif isinstance(channels, slice):
+            channels = range(*channels.indices(n_chan))
+        else:
+            channels = [int(c) for c in channels]
+        for c in channels:
+            if c < 0 or c >= n_chan:
+                err_msg = "Channel %d exceeds the %d channels of the measure" % (c, n_chan)
+                print_error(err_msg)
+                raise IndexError(err_msg)
+
+        single_sample = not isinstance(samples, slice)
+        if single_sample:
+            samples = slice(int(samples), int(samples) + 1)
+        start, stop, step = samples.indices(n_samples)
+        if step < 1:
+            err_msg = "Only positive steps are supported in measure slicing"
+            print_error(err_msg)
+            raise ValueError(err_msg)
+        stop = max(start, stop)
+
+        # h5py selections have to be sorted and unique
+        read = sorted(set(channels))
+        if len(read) == 0:
+            data = np.zeros((0, len(range(start, stop, step))), dtype=self.dtype)
+        elif self._map is not None:
+            data = self._map[read, start:stop:step]
+        else:
+            data = self._data[read, start:stop:step]
+        if read != channels:
+            data = data[[read.index(c) for c in channels]]
+        if single_channel:
+            data = data[0]
+        if single_sample:
+            data = data[..., 0]
+        return data
+
+    def sample_index(self, seconds):
+        '''
+        :return the index of the sample acquired seconds after the start of the measure.
+        '''
+        self._open()
+        return int(round(seconds * self.rate))
+
+    def errors(self):
+        '''
+        :return the coordinates of the faulty packets in the measure as a (2, N) array.
+        '''
+        self._open()
+        if self._errors is None:
+            return self._data.errors()
+        errors = self._errors[:]
+        if np.shape(errors)[0] != 2 or np.shape(errors)[1] == 0:
+            return np.zeros((0, 0), dtype=np.int64)
+        return errors
+
+    def gaps(self):
+        '''
+        :return the samples affected by packet sequence gaps (see sequence_tracker) as a (2, N) array of [first, last)
+            ranges. With Packets_to_file(zero_fill = True) the ranges cover the zeros written in place of the lost
+            packets, otherwise only the first sample after each gap.
+        '''
+        self._open()
+        if self._file is None:
+            return self._data.gaps()
+        return _sequence_gaps(self._data.parent)
+
+    @property
+    def chunk_len(self):
+        '''
+        Samples per channel in a chunk of the raw data dataset (1 if the dataset is not chunked).
+        '''
+        self._open()
+        if isinstance(self._data, rollover_dataset):
+            chunks = self._data.datasets[0].chunks
+        else:
+            chunks = getattr(self._data, "chunks", None)
+        if chunks is None:
+            return 1
+        return int(chunks[1])
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+        elif self._data is not None:
+            self._data.close()
+        self._file = None
+        self._data = None
+        self._errors = None
+        self._map = None
+
+    def __enter__(self):
+        self._open()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class _time_indexer(object):
+    '''
+    Index a measurement_view in seconds.
+    '''
+
+    def __init__(self, view):
+        self.view = view
+
+    def __getitem__(self, key):
+        if not isinstance(key, tuple):
+            key = (slice(None), key)
+        channels, seconds = key
+        if isinstance(seconds, slice):
+            samples = slice(None if seconds.start is None else self.view.sample_index(seconds.start),
+                            None if seconds.stop is None else self.view.sample_index(seconds.stop),
+                            None if seconds.step is None else max(self.view.sample_index(seconds.step), 1))
+        else:
+            samples = self.view.sample_index(seconds)
+        return self.view[channels, samples]
+
+
+def iterate_H5file(filename, ch_list=None, block_samples=None, overlap=0, start_sample=None, last_sample=None,
+                   usrp_number=None, front_end=None, read_ahead=READ_AHEAD_BLOCKS):
+    '''
+    Iterate over the raw data of a measure in blocks of samples, for processing files that do not fit in memory.
+    Block boundaries are aligned to the chunks of the dataset so that each chunk is read once, and the next blocks are
+    read by a background thread while the current one is processed.
+
+    :param filename: name of the file (single file, rolled over set or spool, see measurement_view).
+    :param ch_list: list of channels to read. Default is all.
+    :param block_samples: samples per channel in each block, rounded up to a multiple of the chunk length. Default
+        gives blocks of about READ_BLOCK_BYTES.
+    :param overlap: samples of the previous block repeated at the beginning of each block (i.e. for filters).
+    :param start_sample: first sample returned.
+    :param last_sample: last sample returned.
+    :param usrp_number: the server number of the usrp device.
+    :param front_end: name of the front end. Default is the first receiver found.
+    :param read_ahead: number of blocks read in advance.
+
+    :return a generator of (first_sample, data, mask) tuples where data is shaped as (channels, samples) and mask is a
+        boolean array, True for the samples of faulty packets and for the gap ranges of measurement_view.gaps() (the
+        zeros written with Packets_to_file(zero_fill = True), also when they span several blocks).
+
+    Example:
+    >>> for first, data, mask in iterate_H5file("USRP_Noise_20190315_105315", ch_list = [0, 1], overlap = 1024):
+    >>>     spectra.append(process(data[:, ~mask]))
+    '''
+    view = measurement_view(filename, usrp_number=usrp_number, front_end=front_end)
+    view._open()
+    n_chan, n_samples = view.shape
+    if ch_list is None:
+        ch_list = range(n_chan)
+    start_sample = 0 if start_sample is None else max(int(start_sample), 0)
+    last_sample = n_samples if last_sample is None else min(int(last_sample), n_samples)
+    overlap = max(int(overlap), 0)
+
+    chunk_len = view.chunk_len
+    if block_samples is None:
+        block_samples = READ_BLOCK_BYTES / (len(ch_list) * np.dtype(np.complex64).itemsize)
+    block_samples = max(int(np.ceil(block_samples / float(chunk_len))), 1) * chunk_len
+
+    errors = view.errors()
+    gaps = view.gaps()
+
+    def block_mask(first, last):
+        mask = np.zeros(last - first, dtype=bool)
+        # the ranges overlapping the block, including the ones started in a previous block
+        for ranges in (errors, gaps):
+            if np.shape(ranges)[0] != 2:
+                continue
+            for r_start, r_end in ranges.T:
+                if r_end > first and r_start < last:
+                    mask[max(r_start - first, 0):min(r_end - first, last - first)] = True
+        return mask
+
+    blocks = Queue.Queue(maxsize=max(int(read_ahead), 1))
+    stop = Event()
+
+    def reader():
+        first = start_sample
+        try:
+            while first < last_sample and not stop.is_set():
+                # the first block ends on a block boundary
+                last = min((first // block_samples + 1) * block_samples, last_sample)
+                data = view[ch_list, first:last]
+                element = (first, data, block_mask(first, last))
+                while not stop.is_set():
+                    try:
+                        blocks.put(element, timeout=0.1)
+                        break
+                    except Queue.Full:
+                        pass
+                first = last
+            element = None
+        except Exception as err:
+            element = err
+        while not stop.is_set():
+            try:
+                blocks.put(element, timeout=0.1)
+                break
+            except Queue.Full:
+                pass
+
+    thread = Thread(target=reader, name="H5_read_ahead")
+    thread.daemon = True
+    thread.start()
+
+    previous = None
+    try:
+        while True:
+            element = blocks.get()
+            if element is None:
+                break
+            if isinstance(element, Exception):
+                print_error("Cannot read the raw data of '%s': %s" % (view.filename, str(element)))
+                raise element
+            first, data, mask = element
+            if overlap > 0 and previous is not None:
+                head = min(overlap, np.shape(previous[1])[1])
+                first -= head
+                data = np.concatenate((previous[1][:, -head:], data), axis=1)
+                mask = np.concatenate((previous[2][-head:], mask))
+            previous = element
+            yield first, data, mask
+    finally:
+        stop.set()
+        thread.join()
+        view.close()
+
+
+def spool_folder(filename):
+    '''
+    Name of the folder containing an acquisition written in spool mode (see Packets_to_file()).
+    '''
+    return os.path.splitext(filename)[0] + ".spool"
+
+
+def str_from_json(obj):
+    '''
+    Convert the unicode strings returned by json.load() to str, recursively.
+    '''
+    if isinstance(obj, dict):
+        return dict([(str(k), str_from_json(obj[k])) for k in obj])
+    elif isinstance(obj, list):
+        return [str_from_json(x) for x in obj]
+    elif isinstance(obj, unicode):
+        return str(obj)
+    return obj
+
+
+def get_spool_info(filename):
+    '''
+    Read the description of an acquisition written in spool mode.
+
+    :param filename: name of the acquisition (with or without the .spool extension).
+
+    :return a dictionary containing the keys "parameters" (the global_parameter dictionary), "tags" (the tags given
+        to Packets_to_file()), "streams" (dictionary of the files written per raw data group and frontend).
+    '''
+    with open(os.path.join(spool_folder(filename), "spool.json"), 'r') as info_file:
+        return str_from_json(json.load(info_file))
+
+
+class spool_dataset(object):
+    '''
+    Memory mapped view of the raw data of a frontend in a spool as a (channels, samples) dataset.
+    The payloads are stored as received, with channels interleaved, so reading a channel is a strided access.
+
+    :param filename: name of the acquisition.
+    :param usrp_number: the server number of the usrp device.
+    :param front_end: name of the front end. Default is the first found.
+
+    Note:
+        - It's user responsability to call the close() method.
+    '''
+
+    def __init__(self, filename, usrp_number=None, front_end=None):
+        if usrp_number is None:
+            usrp_number = 0
+        info = get_spool_info(filename)
+        dev_name = "raw_data" + str(int(usrp_number))
+        if front_end is None:
+            front_end = sorted(info['streams'][dev_name].keys())[0]
+        stream = info['streams'][dev_name][str(front_end)]
+        folder = spool_folder(filename)
+
+        self.index = np.fromfile(os.path.join(folder, stream['index']), dtype=spool_index_type)
+        channels = int(stream['channels'])
+        data_file = os.path.join(folder, stream['data'])
+        samples = os.path.getsize(data_file) / (channels * np.dtype(np.complex64).itemsize)
+        if samples > 0:
+            self._map = np.memmap(data_file, dtype=np.complex64, mode='r', shape=(samples, channels))
+        else:
+            self._map = np.zeros((0, channels), dtype=np.complex64)
+        self._view = self._map.T
+        self.shape = self._view.shape
+        self.dtype = self._view.dtype
+        self.attrs = {'samples': samples, 'start_epoch': stream.get('start_epoch')}
+
+    def __len__(self):
+        return self.shape[0]
+
+    def __iter__(self):
+        for i in range(self.shape[0]):
+            yield self[i]
+
+    def __getitem__(self, key):
+        return self._view[key]
+
+    def errors(self):
+        '''
+        :return the coordinates of the faulty packets in the acquisition as a (2, N) array.
+        '''
+        faulty = self.index[self.index['errors'] != 0]
+        if len(faulty) == 0:
+            return np.zeros((0, 0), dtype=np.int64)
+        start = faulty['offset'] / (faulty['channels'] * np.dtype(np.complex64).itemsize)
+        return np.asarray([start, start + faulty['length'] / faulty['channels']], dtype=np.int64)
+
+    def gaps(self):
+        '''
+        :return the samples affected by packet sequence gaps in the acquisition as a (2, N) array of [first, last)
+            ranges, the same as measurement_view.gaps() after spool_to_H5().
+        '''
+        from USRP_writer import spool_sequence
+        events, packet_samples = spool_sequence(self.index)
+        return _gap_ranges(events, packet_samples)
+
+    def close(self):
+        self._view = None
+        self._map = None
+
+
+def openSpool(filename, ch_list=None, start_sample=None, last_sample=None, usrp_number=None, front_end=None,
+              verbose=False, error_coord=False, big_file=False):
+    '''
+    Retrive raw data from an acquisition written in spool mode by memory mapping the payload file. Called by
+    openH5file() when the H5 file is not present but the spool is, arguments and returns are the same.
+
+    Note:
+        - when big_file is True a spool_dataset is returned in place of both the file and the dataset.
+    '''
+    if verbose:
+        print_debug("Opening spool \"%s\"" % spool_folder(filename))
+    data_set = spool_dataset(filename, usrp_number=usrp_number, front_end=front_end)
+    errors = data_set.errors()
+    if np.shape(errors)[0] > 0:
+        print_warning("The measure opened contains %d erorrs!" % np.shape(errors)[1])
+
+    if big_file:
+        if error_coord:
+            return data_set, data_set, errors
+        return data_set, data_set
+
+    if ch_list is None:
+        ch_list = range(data_set.shape[0])
+    if start_sample is None:
+        start_sample = 0
+    if last_sample is None:
+        last_sample = data_set.shape[1]
+    data = np.array(data_set[ch_list, int(start_sample):int(last_sample)])
+    data_set.close()
+    print_debug("Shape returned from openSpool() call: %s is (channels,samples)" % str(np.shape(data)))
+    if error_coord:
+        return data, errors
+    return data
+
+
+def tail_H5file(filename, ch_list=None, usrp_number=0, front_end=None, start_sample=0, block_samples=None,
+                poll=SWMR_POLL_SECONDS, timeout=None):
+    '''
+    Follow the raw data of a file being written by Packets_to_file(swmr = True) from another process.
+    New samples are detected by following the samples attribute of the data dataset.
+
+    :param filename: name of the file.
+    :param ch_list: list of channels to read. Default is all.
+    :param usrp_number: the server number of the usrp device.
+    :param front_end: name of the front end. Default is the first receiver found.
+    :param start_sample: first sample returned.
+    :param block_samples: maximum number of samples per channel in each block. Default returns all the new samples.
+    :param poll: seconds between two checks of the file.
+    :param timeout: stop when no new sample is written for timeout seconds. Default waits the end of the acquisition.
+
+    :return a generator of (first_sample, data) tuples where data is shaped as (channels, samples).
+
+    Example:
+    >>> for first_sample, data in tail_H5file("USRP_Noise_20190101_000000"):
+    >>>     print "%d samples received" % (first_sample + data.shape[1])
+
+    Note:
+        - The acquisition is considered over when the \"writing\" attribute of the dataset is cleared.
+    '''
+    f = bound_open(filename, swmr = True)
+    if not f:
+        return
+    try:
+        group = f["raw_data" + str(int(usrp_number))]
+        if front_end is None:
+            front_end = get_receivers(group)[0]
+        dataset = group[str(front_end)]["data"]
+        position = int(start_sample)
+        last_growth = time.time()
+        while True:
+            dataset.refresh()
+            samples = dataset.attrs.get("samples")
+            if samples is None:
+                samples = 0
+            if samples > position:
+                end = samples if block_samples is None else min(samples, position + int(block_samples))
+                if ch_list is None:
+                    data = dataset[:, position:end]
+                else:
+                    data = dataset[ch_list, position:end]
+                yield position, data
+                position = end
+                last_growth = time.time()
+                continue
+            if not dataset.attrs.get("writing"):
+                break
+            if timeout is not None and (time.time() - last_growth) > timeout:
+                print_warning("No new samples in %s for %.1f seconds" % (filename, timeout))
+                break
+            time.sleep(poll)
+    finally:
+        f.close()
+
+
+def H5_swmr_start(H5fp):
+    '''
+    Switch a file created with libver = 'latest' and already formatted by Param_to_H5() in single writer multiple
+    reader mode. The attributes updated during the acquisition are created in advance as no new attribute can be
+    created afterwards.
+
+    :param H5fp: H5 file opened in write mode.
+    '''
+    for dev_name in H5fp.keys():
+        if dev_name.startswith("raw_data"):
+            for group_name in H5fp[dev_name].keys():
+                try:
+                    dataset = H5fp[dev_name][group_name]["data"]
+                except KeyError:
+                    continue
+                dataset.attrs.create("samples", 0, dtype=np.int64)
+                dataset.attrs.create("start_epoch", 0., dtype=np.float64)
+                dataset.attrs.create("writing", 1, dtype=np.int8)
+    H5fp.swmr_mode = True
+
+
+def H5_swmr_stop(H5fp):
+    '''
+    Signal to the readers of a file in single writer multiple reader mode that the acquisition is over.
+
+    :param H5fp: H5 file opened in write mode with H5_swmr_start().
+    '''
+    for dev_name in H5fp.keys():
+        if dev_name.startswith("raw_data"):
+            for group_name in H5fp[dev_name].keys():
+                try:
+                    H5fp[dev_name][group_name]["data"].attrs.modify("writing", 0)
+                except KeyError:
+                    continue
+    H5fp.flush()
+
+
 def get_noise(filename, usrp_number=0, front_end=None, channel_list=None):
     '''
     Get the noise spectra from a a pre-analyzed H5 file.
@@ -431,6 +1585,151 @@ def get_readout_power(filename, channel, front_end=None, usrp_number=0):
 
     return gain + USRP_power + 20 * np.log10(ampl)
 
+# properties of the front ends read from the measure files, by (path, usrp number, modification time, size), least
+# recently used first (see get_metadata())
+_metadata_cache = OrderedDict()
+_metadata_lock = Lock()
+
+# attributes of a front end group read as lists
+_METADATA_LISTS = ['freq', 'wave_type', 'ampl', 'chirp_f', 'chirp_t', 'swipe_s']
+
+# attributes of a front end group in the order they are reported when missing
+_METADATA_ATTRS = ['mode', 'rate', 'rf', 'gain', 'bw', 'samples', 'delay', 'burst_on', 'burst_off', 'buffer_len',
+                   'freq', 'wave_type', 'ampl', 'decim', 'chirp_f', 'chirp_t', 'swipe_s', 'fft_tones', 'pf_average',
+                   'tuning_mode']
+
+
+class parameter_snapshot(dict):
+    '''
+    Read only dictionary returned by get_metadata(). Nested dictionaries are snapshots too and lists are tuples.
+    '''
+
+    def _read_only(self, *args, **kwargs):
+        err_msg = "Measure metadata snapshots are read only: use global_parameter().retrive_prop_from_file() to get a " \
+                  "modifiable copy"
+        print_error(err_msg)
+        raise TypeError(err_msg)
+
+    __setitem__ = __delitem__ = update = pop = popitem = clear = setdefault = _read_only
+
+    def __reduce__(self):
+        # pickling a dict subclass sets the items one by one
+        return (parameter_snapshot, (dict(self),))
+
+
+def _freeze_metadata(obj):
+    if isinstance(obj, dict):
+        return parameter_snapshot([(k, _freeze_metadata(obj[k])) for k in obj])
+    elif isinstance(obj, list):
+        return tuple([_freeze_metadata(x) for x in obj])
+    return obj
+
+
+def _thaw_metadata(obj):
+    if isinstance(obj, dict):
+        return dict([(k, _thaw_metadata(obj[k])) for k in obj])
+    elif isinstance(obj, tuple):
+        return [_thaw_metadata(x) for x in obj]
+    return obj
+
+
+def _load_metadata(filename, usrp_number):
+    '''
+    Read the properties of the four front ends of a measure file, reading the attributes of each group at once.
+    '''
+    f = bound_open(filename)
+    if f is None:
+        return None
+
+    if (not usrp_number) and chk_multi_usrp(f) != 1:
+        this_warning = "Multiple usrp found in the file but no preference given to get prop function. Assuming usrp " + str(
+            (f.keys()[0]).split("ata")[1])
+        print_warning(this_warning)
+
+    if not usrp_number:
+        group_name = "raw_data0"
+    else:
+        group_name = "raw_data" + str(int(usrp_number))
+
+    try:
+        group = f[group_name]
+    except KeyError:
+        print_error("Cannot recognize group format")
+        f.close()
+        return None
+
+    prop = {}
+    for sub_group_name in ['A_TXRX', 'B_TXRX', 'A_RX2', 'B_RX2']:
+        try:
+            attrs = dict(group[sub_group_name].attrs)
+        except KeyError:
+            prop[sub_group_name] = {'mode': "OFF"}
+            continue
+        sub_prop = {}
+        for att_name in _METADATA_ATTRS:
+            att = attrs.get(att_name)
+            if att is None:
+                print_warning("Parameter \"" + str(att_name) + "\" is not defined")
+            elif att_name in _METADATA_LISTS:
+                att = att.tolist()
+            sub_prop[att_name] = att
+        prop[sub_group_name] = sub_prop
+    f.close()
+    return prop
+
+
+def get_metadata(filename, usrp_number=None):
+    '''
+    Get the properties of the front ends of a measure file, as loaded by global_parameter().retrive_prop_from_file().
+    The properties are cached: the file is read again only if its modification time or its size changed, and the
+    least recently used measures are evicted beyond METADATA_CACHE_SIZE.
+
+    :param filename: name of the file.
+    :param usrp_number: the server number of the usrp device. Default is 0.
+
+    :return a read only parameter_snapshot {front end: {property: value}} or None if the file cannot be read.
+    '''
+    filename = format_filename(filename)
+    try:
+        stat = os.stat(filename)
+    except OSError as msg:
+        print_error("Cannot open the specified file: " + str(msg))
+        return None
+    key = (os.path.abspath(filename), int(usrp_number) if usrp_number else 0, stat.st_mtime, stat.st_size)
+
+    with _metadata_lock:
+        if key in _metadata_cache:
+            snapshot = _metadata_cache.pop(key)
+            _metadata_cache[key] = snapshot
+            return snapshot
+
+    prop = _load_metadata(filename, usrp_number)
+    if prop is None:
+        return None
+    snapshot = _freeze_metadata(prop)
+    with _metadata_lock:
+        _metadata_cache[key] = snapshot
+        while len(_metadata_cache) > METADATA_CACHE_SIZE:
+            _metadata_cache.popitem(last=False)
+    return snapshot
+
+
+def invalidate_metadata_cache(filename=None):
+    '''
+    Remove a measure from the metadata cache (see get_metadata()). Has to be called by the functions that modify the
+    properties of the front ends in a file.
+
+    :param filename: name of the file. Default empties the cache.
+    '''
+    with _metadata_lock:
+        if filename is None:
+            _metadata_cache.clear()
+            return
+        path = os.path.abspath(format_filename(filename))
+        for key in [k for k in _metadata_cache if k[0] == path]:
+            del _metadata_cache[key]
+
+
 class global_parameter(object):
     '''
     Global paramenter object representing a measure.
@@ -804,148 +2103,219 @@ class global_parameter(object):
         return active_tx
 
     def retrive_prop_from_file(self, filename, usrp_number=None):
-        def read_prop(group, sub_group_name):
-            def missing_attr_warning(att_name, att):
-                if att == None:
-                    print_warning("Parameter \"" + str(att_name) + "\" is not defined")
-
-            sub_prop = {}
-            try:
-                sub_group = group[sub_group_name]
-            except KeyError:
-                sub_prop['mode'] = "OFF"
-                return sub_prop
+        '''
+        Load the parameters of a measure file. The properties are read through the metadata cache (see
+        get_metadata()): the object receives its own modifiable copy.
 
-            sub_prop['mode'] = sub_group.attrs.get('mode')
-            missing_attr_warning('mode', sub_prop['mode'])
+        :param filename: name of the file.
+        :param usrp_number: the server number of the usrp device. Default is 0.
+        '''
+        prop = get_metadata(filename, usrp_number)
+        if prop is None:
+            return None
+        self.initialized = True
+        self.parameters = _thaw_metadata(prop)
 
-            sub_prop['rate'] = sub_group.attrs.get('rate')
-            missing_attr_warning('rate', sub_prop['rate'])
 
-            sub_prop['rf'] = sub_group.attrs.get('rf')
-            missing_attr_warning('rf', sub_prop['rf'])
+def Device_chk(device):
+    '''
+    Check if the device is recognised by the server or assign to 0 by default.
 
-            sub_prop['gain'] = sub_group.attrs.get('gain')
-            missing_attr_warning('gain', sub_prop['gain'])
+    Arguments:
+        - device number or None.
 
-            sub_prop['bw'] = sub_group.attrs.get('bw')
-            missing_attr_warning('bw', sub_prop['bw'])
+    Returns:
+        - boolean representing the result of the check or true is assigned by default.
+    '''
+    if device == None:
+        device = 0
+        return True
 
-            sub_prop['samples'] = sub_group.attrs.get('samples')
-            missing_attr_warning('samples', sub_prop['samples'])
+    print_warning("Async HW information has not been implemented yet")
+    return True
 
-            sub_prop['delay'] = sub_group.attrs.get('delay')
-            missing_attr_warning('delay', sub_prop['delay'])
 
-            sub_prop['burst_on'] = sub_group.attrs.get('burst_on')
-            missing_attr_warning('burst_on', sub_prop['burst_on'])
+def Front_end_chk(Front_end):
+    '''
+    Check if the front end code is recognised by the server or assign to A by default.
 
-            sub_prop['burst_off'] = sub_group.attrs.get('burst_off')
-            missing_attr_warning('burst_off', sub_prop['burst_off'])
+    Arguments:
+        - front end code (A or B).
 
-            sub_prop['buffer_len'] = sub_group.attrs.get('buffer_len')
-            missing_attr_warning('buffer_len', sub_prop['buffer_len'])
+    Returns:
+        - boolean representing the result of the check or true is assigned by default.
+    '''
 
-            sub_prop['freq'] = sub_group.attrs.get('freq').tolist()
-            missing_attr_warning('freq', sub_prop['freq'])
+    if (Front_end != "A") and (Front_end != "B"):
+        print_error("Front end \"" + str(Front_end) + "\" not recognised.")
+        return False
 
-            sub_prop['wave_type'] = sub_group.attrs.get('wave_type').tolist()
-            missing_attr_warning('wave_type', sub_prop['wave_type'])
+    return True
 
-            sub_prop['ampl'] = sub_group.attrs.get('ampl').tolist()
-            missing_attr_warning('ampl', sub_prop['ampl'])
 
-            sub_prop['decim'] = sub_group.attrs.get('decim')
-            missing_attr_warning('decim', sub_prop['decim'])
+def raw_data_filters(policy):
+    '''
+    Get the filter arguments of h5py create_dataset() corresponding to a raw data layout policy.
 
-            sub_prop['chirp_f'] = sub_group.attrs.get('chirp_f').tolist()
-            missing_attr_warning('chirp_f', sub_prop['chirp_f'])
+    :param policy: one of RAW_DATA_LAYOUT_POLICIES.
 
-            sub_prop['chirp_t'] = sub_group.attrs.get('chirp_t').tolist()
-            missing_attr_warning('chirp_t', sub_prop['chirp_t'])
+    :return a dictionary of keyword arguments.
 
-            sub_prop['swipe_s'] = sub_group.attrs.get('swipe_s').tolist()
-            missing_attr_warning('swipe_s', sub_prop['swipe_s'])
+    Note:
+        - blosc/lz4 needs the hdf5plugin package to write and read the file. When not available gzip is used.
+    '''
+    if policy == "channel_fast":
+        if hdf5plugin is not None:
+            if hasattr(hdf5plugin, "Blosc"):
+                return dict(hdf5plugin.Blosc(cname='lz4', clevel=5, shuffle=hdf5plugin.Blosc.SHUFFLE))
+            else:
+                # old hdf5plugin: blosc options are (reserved x4, level, shuffle, compressor) with lz4 = 1
+                return {'compression': hdf5plugin.BLOSC, 'compression_opts': (0, 0, 0, 0, 5, 1, 1)}
+        return {'compression': "gzip", 'compression_opts': 1, 'shuffle': True}
+    elif policy == "channel_gzip":
+        return {'compression': "gzip", 'compression_opts': 4, 'shuffle': True}
+    return {}
 
-            sub_prop['fft_tones'] = sub_group.attrs.get('fft_tones')
-            missing_attr_warning('fft_tones', sub_prop['fft_tones'])
 
-            sub_prop['pf_average'] = sub_group.attrs.get('pf_average')
-            missing_attr_warning('pf_average', sub_prop['pf_average'])
+def raw_data_layout(rx_param, n_chan, data_len, policy = None):
+    '''
+    Determine the chunk shape and the filters of a raw data dataset.
+    Analysis reads one channel timestream at the time so chunks contain a single channel and RAW_DATA_CHUNK_SECONDS of
+    data, limited by RAW_DATA_CHUNK_BYTES and RAW_DATA_CHUNK_ROW_BYTES.
 
-            sub_prop['tuning_mode'] = sub_group.attrs.get('tuning_mode')
-            missing_attr_warning('tuning_mode', sub_prop['tuning_mode'])
+    :param rx_param: the parameter dictionary of the RX frontend.
+    :param n_chan: number of channels.
+    :param data_len: expected number of samples per channel (0 if unknown).
+    :param policy: one of RAW_DATA_LAYOUT_POLICIES. Default is taken from RAW_DATA_LAYOUT for the measurement type.
 
-            return sub_prop
+    :return a dictionary of keyword arguments for h5py create_dataset(). The maxshape key is present only for layouts
+        that cannot be resized.
+    '''
+    if policy is None:
+        try:
+            policy = RAW_DATA_LAYOUT[rx_param['wave_type'][0]]
+        except KeyError:
+            policy = "auto"
 
-        f = bound_open(filename)
-        if f is None:
-            return None
+    if policy not in RAW_DATA_LAYOUT_POLICIES:
+        err_msg = "Raw data layout policy \'%s\' not recognised" % str(policy)
+        print_error(err_msg)
+        raise ValueError(err_msg)
 
-        if (not usrp_number) and chk_multi_usrp(f) != 1:
-            this_warning = "Multiple usrp found in the file but no preference given to get prop function. Assuming usrp " + str(
-                (f.keys()[0]).split("ata")[1])
-            print_warning(this_warning)
-            group_name = "raw_data0"  # +str((f.keys()[0]).split("ata")[1])
+    if policy == "contiguous":
+        if data_len > 0 and n_chan > 0:
+            return {'maxshape': None}
+        print_warning("The size of the measure is not known in advance: using the \'channel\' raw data layout")
+        policy = "channel"
 
-        if (not usrp_number) and chk_multi_usrp(f) == 1:
-            group_name = "raw_data0"  # f.keys()[0]
+    if policy == "auto" or n_chan < 1:
+        return {'chunks': True}
 
-        if (usrp_number != None):
-            group_name = "raw_data" + str(int(usrp_number))
+    itemsize = np.dtype(np.complex64).itemsize
+    rate = float(rx_param['rate']) / max(rx_param['decim'], 1)
+    if rx_param['wave_type'][0] == "TONES":
+        rate /= max(rx_param['fft_tones'], 1)
 
-        try:
-            group = f[group_name]
-        except KeyError:
-            print_error("Cannot recognize group format")
-            return None
+    chunk_len = int(rate * RAW_DATA_CHUNK_SECONDS)
+    chunk_len = min(chunk_len, RAW_DATA_CHUNK_ROW_BYTES / (n_chan * itemsize))
+    chunk_len = max(chunk_len, RAW_DATA_CHUNK_BYTES[0] / itemsize)
+    chunk_len = min(chunk_len, RAW_DATA_CHUNK_BYTES[1] / itemsize)
+    if data_len > 0:
+        chunk_len = min(chunk_len, data_len)
 
-        prop = {}
-        prop['A_TXRX'] = read_prop(group, 'A_TXRX')
-        prop['B_TXRX'] = read_prop(group, 'B_TXRX')
-        prop['A_RX2'] = read_prop(group, 'A_RX2')
-        prop['B_RX2'] = read_prop(group, 'B_RX2')
-        self.initialized = True
-        self.parameters = prop
+    layout = {'chunks': (1, max(int(chunk_len), 1))}
+    layout.update(raw_data_filters(policy))
+    return layout
 
 
-def Device_chk(device):
+def raw_data_rechunk(dataset):
     '''
-    Check if the device is recognised by the server or assign to 0 by default.
+    Replace a contiguous raw data dataset (see raw_data_layout()) with a chunked and resizable copy, when more samples
+    than the whole packets allocated arrive. This is a last resort: the copy happens in the writer and the old
+    allocation is left unused in the file. The samples are copied one chunk row at the time.
 
-    Arguments:
-        - device number or None.
+    :param dataset: h5py raw data dataset of shape (channels, samples).
 
-    Returns:
-        - boolean representing the result of the check or true is assigned by default.
+    :return the new dataset.
     '''
-    if device == None:
-        device = 0
-        return True
+    print_warning("More samples than expected in the contiguous raw data dataset %s: converting it to a chunked one" %
+                  dataset.name)
+    group = dataset.parent
+    n_chan, samples = dataset.shape
+    try:
+        data_layout = raw_data_layout(dict(group.attrs), n_chan, samples, "channel")
+    except (KeyError, IndexError, TypeError):
+        data_layout = {'chunks': True}
+    chunked = group.create_dataset("data_chunked", (n_chan, samples), dtype=dataset.dtype, maxshape=(None, None),
+                                   **data_layout)
+    block = chunked.chunks[1]
+    for first in range(0, samples, block):
+        chunked[:, first:first + block] = dataset[:, first:first + block]
+    for name in dataset.attrs:
+        chunked.attrs[name] = dataset.attrs[name]
+    del group["data"]
+    group.move("data_chunked", "data")
+    return group["data"]
+
+
+def raw_data_grow(dataset, data_end):
+    '''
+    Extend a raw data dataset along the time axis so that it contains at least data_end samples per channel.
+    The length grows by RAW_DATA_GROWTH_FACTOR (and at least by a chunk) so that a measure of N samples is written
+    with O(log N) resize calls. The extra samples are removed by raw_data_trim() when the file is closed.
+    A contiguous dataset, allocated for the whole measure, is converted to a chunked one first as a last resort (see
+    raw_data_rechunk()).
 
-    print_warning("Async HW information has not been implemented yet")
-    return True
+    :param dataset: h5py raw data dataset of shape (channels, samples).
+    :param data_end: number of samples per channel the dataset has to contain.
 
+    :return the dataset, replaced if it was contiguous.
+    '''
+    current = dataset.shape[1]
+    if data_end <= current:
+        return dataset
+    if dataset.chunks is None:
+        dataset = raw_data_rechunk(dataset)
+    chunk_len = dataset.chunks[1]
+    dataset.resize(max(data_end, int(current * RAW_DATA_GROWTH_FACTOR), current + chunk_len), 1)
+    return dataset
 
-def Front_end_chk(Front_end):
+
+def H5_memmap(dataset):
     '''
-    Check if the front end code is recognised by the server or assign to A by default.
+    Memory map a raw data dataset written with the \'contiguous\' layout (see raw_data_layout()), so that reads do
+    not go through the HDF5 library. Slicing the map by channel and by samples gives strided views of the file.
 
-    Arguments:
-        - front end code (A or B).
+    :param dataset: h5py dataset.
 
-    Returns:
-        - boolean representing the result of the check or true is assigned by default.
+    :return a read only numpy.memmap of the dataset shape or None if the dataset is chunked, filtered or not allocated.
     '''
+    if dataset.chunks is not None or dataset.compression is not None or len(dataset.shape) != 2:
+        return None
+    if dataset.dtype.byteorder not in ['=', '|'] or dataset.shape[0] * dataset.shape[1] == 0:
+        return None
+    offset = dataset.id.get_offset()
+    if offset is None:
+        return None
+    return np.memmap(dataset.file.filename, dtype=dataset.dtype, mode='r', offset=offset, shape=dataset.shape)
 
-    if (Front_end != "A") and (Front_end != "B"):
-        print_error("Front end \"" + str(Front_end) + "\" not recognised.")
-        return False
 
-    return True
+def raw_data_trim(dataset):
+    '''
+    Trim a raw data dataset extended by raw_data_grow() to the samples written, according to the "samples"
+    attribute. Datasets cannot shrink in single writer multiple reader mode: in that case the attribute is the only
+    reference.
+
+    :param dataset: h5py raw data dataset of shape (channels, samples).
+    '''
+    samples = dataset.attrs.get("samples")
+    if samples is None or dataset.file.swmr_mode:
+        return
+    if dataset.shape[1] > samples:
+        dataset.resize(int(samples), 1)
 
 
-def Param_to_H5(H5fp, parameters_class, trigger = None, **kwargs):
+def Param_to_H5(H5fp, parameters_class, trigger = None, layout = None, **kwargs):
     '''
     Generate the internal structure of a H5 file correstonding to the parameters given.
 
@@ -953,6 +2323,7 @@ def Param_to_H5(H5fp, parameters_class, trigger = None, **kwargs):
     :param parameters_class: an initialized global_parameter object containing the informations used to drive the GPU server.
     :param kwargs: each additional parameter will be interpreted as a tag to add in the raw data group of the file.
     :param trigger: trigger class (see section on trigger function for deteails)
+    :param layout: raw data layout policy (see raw_data_layout()). Default depends on the measurement type.
 
     Returns:
         - A list of names of H5 groups where to write incoming data.
@@ -961,6 +2332,7 @@ def Param_to_H5(H5fp, parameters_class, trigger = None, **kwargs):
         This function is ment to be used inside the Packets_to_file() function for data collection.
     '''
     if parameters_class.self_check():
+        invalidate_metadata_cache(H5fp.filename)
         rx_names = parameters_class.get_active_rx_param()
         tx_names = parameters_class.get_active_tx_param()
         usrp_group = H5fp.create_group("raw_data" + str(int(parameters_class.parameters['device'])))
@@ -982,45 +2354,40 @@ def Param_to_H5(H5fp, parameters_class, trigger = None, **kwargs):
                 print_warning("Cannot extract number of channel from signal processing descriptor")
                 n_chan = 0
             if trigger is not None:
+                # the triggered samples are not known in advance: the dataset grows geometrically (see raw_data_grow())
                 data_len = 0
             else:
-                if parameters_class.parameters[ant_name]['wave_type'][0] == "TONES":
-                    data_len = int(np.ceil(parameters_class.parameters[ant_name]['samples'] / (
-                                parameters_class.parameters[ant_name]['fft_tones'] * max(
-                            parameters_class.parameters[ant_name]['decim'], 1))))
-                elif parameters_class.parameters[ant_name]['wave_type'][0] == "CHIRP":
-                    if parameters_class.parameters[ant_name]['decim'] == 0:
-                        data_len = parameters_class.parameters[ant_name]['samples']
-                    else:
-                        data_len = parameters_class.parameters[ant_name]['swipe_s'][0]/parameters_class.parameters[ant_name]['decim']
-
-                elif parameters_class.parameters[ant_name]['wave_type'][0] == "NOISE":
-                    data_len = int(np.ceil(parameters_class.parameters[ant_name]['samples'] / max(
-                        parameters_class.parameters[ant_name]['decim'], 1)))
-
-                elif parameters_class.parameters[ant_name]['wave_type'][0] == "DIRECT":
-                    data_len = parameters_class.parameters[ant_name]['samples']/max(parameters_class.parameters[ant_name]['decim'],1)
-                else:
+                data_len = raw_data_len(parameters_class.parameters[ant_name])
+                if data_len is None:
                     print_warning("No file size could be determined from DSP descriptor: \'%s\'" % str(
                         parameters_class.parameters[ant_name]['wave_type'][0]))
                     data_len = 0
 
             data_shape_max = (n_chan, data_len)
-            rx_group.create_dataset("data", data_shape_max, dtype=np.complex64, maxshape=(None, None),
-                                    chunks=True)  # , compression = H5PY_compression
+            data_layout = raw_data_layout(parameters_class.parameters[ant_name], n_chan, data_len, layout)
+            contiguous = 'maxshape' in data_layout
+            if contiguous:
+                # the dataset cannot grow: allocate the whole packets the server sends
+                alloc_len = raw_data_alloc_len(parameters_class.parameters[ant_name])
+                if alloc_len is not None:
+                    data_shape_max = (n_chan, max(alloc_len, data_len))
+            data_layout.setdefault('maxshape', (None, None))
+            data_ds = rx_group.create_dataset("data", data_shape_max, dtype=np.complex64, **data_layout)
+            if contiguous:
+                # the samples written, updated by the writer: the readers ignore the rest of the allocation
+                data_ds.attrs.create("samples", 0, dtype=np.int64)
             rx_group.create_dataset("errors", (0, 0), dtype=np.dtype(np.int64),
                                     maxshape=(None, None))  # , compression = H5PY_compression
+            # rows: dataset index, expected packet number, received packet number (see sequence_tracker)
+            rx_group.create_dataset("sequence", (3, 0), dtype=np.dtype(np.int64), maxshape=(3, None), chunks=True)
 
             if trigger is not None:
                 trigger_ds = rx_group.create_dataset("trigger", shape = (0,), dtype=np.dtype(np.int64), maxshape=(None,),chunks=True)
                 trigger_name = str(trigger.__class__.__name__)
                 trigger_ds.attrs.create("trigger_fcn", data = trigger_name)
 
+                # the trigger lists are written in the trigger_<name> datasets (see trigger_writer)
                 if trigger_name == "amplitude_trigger":
-                    trigger_ds.attrs.create("bounds", data = trigger.bounds)
-                    trigger_ds.attrs.create("nglitch", data = trigger.nglitch)
-                    trigger_ds.attrs.create("glitch_indices", data = trigger.glitch_indices)
-                    trigger_ds.attrs.create("samples_per_packet", data = trigger.samples_per_packet)
                     trigger_ds.attrs.create("triggering_chs", data=trigger.channels)
 
                 trigger.dataset_init(rx_group)
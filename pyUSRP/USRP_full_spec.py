@@ -66,6 +66,7 @@ def get_NODSP_tones(tones, measure_t, rate, amplitudes = None, RF = None, tx_gai
         - kwargs:
             * verbose: additional prints. Default is False.
             * push_queue: queue for post writing samples.
+            * push_policy: what happens when the push_queue consumer is slow, see push_subscriber. Default is PUSH_POLICY.
 
     Returns:
         - filename of the measure file.
@@ -79,7 +80,7 @@ def get_NODSP_tones(tones, measure_t, rate, amplitudes = None, RF = None, tx_gai
         verbose = False
 
     try:
-        push_queue = kwargs['push_queue']
+        push_queue = kwargs.pop('push_queue')
     except KeyError:
         push_queue = None
 
@@ -0,0 +1,265 @@
+########################################################################################
+##                                                                                    ##
+##  THIS LIBRARY IS PART OF THE SOFTWARE DEVELOPED BY THE JET PROPULSION LABORATORY   ##
+##  IN THE CONTEXT OF THE GPU ACCELERATED FLEXIBLE RADIOFREQUENCY READOUT PROJECT     ##
+##                                                                                    ##
+########################################################################################
+
+import socket
+import subprocess
+import sys
+import os
+
+# optional, used to set the CPU affinity of the Sync_RX process
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+# import submodules
+from USRP_low_level import *
+
+# missing from the socket module of python 2 (value from linux/asm-generic/socket.h)
+SO_BUSY_POLL = getattr(socket, 'SO_BUSY_POLL', 46)
+
+# host settings applied by tools/ubuntu_lan_config.py
+HOST_NET_RECOMMENDED = {
+    'rmem_max': 1621498630,
+    'wmem_max': 1621498630,
+    'mtu': 9000,
+}
+
+# options accepted in a link profile:
+#   data_rcvbuf: receive buffer of the data socket in bytes (SO_RCVBUF).
+#   command_nodelay: disable the Nagle algorithm on the command socket (TCP_NODELAY).
+#   busy_poll: microseconds the data socket busy polls the NIC before sleeping (SO_BUSY_POLL, linux only).
+#   sync_rx_cpus: list of CPUs the Sync_RX process is pinned to.
+LINK_PROFILE_OPTIONS = ['data_rcvbuf', 'command_nodelay', 'busy_poll', 'sync_rx_cpus']
+
+LINK_PROFILES = {
+    # operating system defaults
+    'default': {},
+    # sustained streaming at high rate: a receive buffer covering hundreds of milliseconds at 10 Gb/s
+    'throughput': {'data_rcvbuf': 2 ** 28, 'command_nodelay': True},
+    # short measures and sweeps: prompt command round trips and busy polling of the data socket
+    'low_latency': {'data_rcvbuf': 2 ** 24, 'command_nodelay': True, 'busy_poll': 50},
+}
+
+# profile used by Connect() when none is given
+LINK_PROFILE = 'default'
+
+
+def get_link_profile(profile=None):
+    '''
+    Get the options of a link profile.
+
+    :param profile: name of a profile in LINK_PROFILES or dictionary of options. Default is LINK_PROFILE.
+
+    :return a dictionary of options.
+    '''
+    if profile is None:
+        profile = LINK_PROFILE
+    if isinstance(profile, dict):
+        options = dict(profile)
+    else:
+        try:
+            options = dict(LINK_PROFILES[profile])
+        except KeyError:
+            err_msg = "Link profile \'%s\' not recognized, accepted values are %s" % (
+                str(profile), str(LINK_PROFILES.keys()))
+            print_error(err_msg)
+            raise ValueError(err_msg)
+    for option in options:
+        if option not in LINK_PROFILE_OPTIONS:
+            err_msg = "Link profile option \'%s\' not recognized, accepted values are %s" % (
+                str(option), str(LINK_PROFILE_OPTIONS))
+            print_error(err_msg)
+            raise ValueError(err_msg)
+    return options
+
+
+def _report_option(report, name, requested, applied, verbose):
+    report[name] = {'requested': requested, 'applied': applied}
+    if not verbose:
+        return
+    if applied is None:
+        print_warning("Link option %s could not be applied" % name)
+    elif applied < requested:
+        print_warning("Link option %s clamped by the operating system: %d requested, %d applied" % (
+            name, requested, applied))
+
+
+def apply_data_socket_profile(data_socket, profile=None, verbose=True):
+    '''
+    Apply the data socket options of a link profile and read them back. Has to be called before connecting the socket
+    so that the TCP window scaling accounts for the receive buffer.
+
+    :param data_socket: socket object.
+    :param profile: see get_link_profile().
+    :param verbose: print a warning for each option clamped by the operating system.
+
+    :return a report dictionary {option: {'requested': value, 'applied': value}}. The applied value is None if the
+        option is not available.
+    '''
+    options = get_link_profile(profile)
+    report = {}
+    if options.get('data_rcvbuf') is not None:
+        requested = int(options['data_rcvbuf'])
+        try:
+            data_socket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, requested)
+            applied = data_socket.getsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF)
+            # linux doubles the value to account for the bookkeeping overhead
+            if sys.platform.startswith('linux'):
+                applied /= 2
+        except socket.error:
+            applied = None
+        _report_option(report, 'data_rcvbuf', requested, applied, verbose)
+        if verbose and applied is not None and applied < requested:
+            print_warning("Raise the limit with: sysctl -w net.core.rmem_max=%d" % requested)
+
+    if options.get('busy_poll') is not None:
+        requested = int(options['busy_poll'])
+        try:
+            data_socket.setsockopt(socket.SOL_SOCKET, SO_BUSY_POLL, requested)
+            applied = data_socket.getsockopt(socket.SOL_SOCKET, SO_BUSY_POLL)
+        except socket.error:
+            # not supported or CAP_NET_ADMIN needed
+            applied = None
+        _report_option(report, 'busy_poll', requested, applied, verbose)
+
+    return report
+
+
+def apply_command_socket_profile(command_socket, profile=None, verbose=True):
+    '''
+    Apply the command socket options of a link profile and read them back.
+
+    :param command_socket: socket object.
+    :param profile: see get_link_profile().
+    :param verbose: print a warning for each option not applied.
+
+    :return a report dictionary (see apply_data_socket_profile()).
+    '''
+    options = get_link_profile(profile)
+    report = {}
+    if options.get('command_nodelay'):
+        try:
+            command_socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            applied = command_socket.getsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY)
+        except socket.error:
+            applied = None
+        _report_option(report, 'command_nodelay', 1, None if applied is None else int(applied != 0), verbose)
+    return report
+
+
+def set_process_affinity(pid, cpus):
+    '''
+    Pin a process to a list of CPUs. Uses psutil if installed, os.sched_setaffinity() or the taskset command otherwise.
+
+    :param pid: process id.
+    :param cpus: list of CPU numbers.
+
+    :return the list of CPUs the process is pinned to or None if the affinity could not be set.
+    '''
+    cpus = [int(c) for c in cpus]
+    try:
+        if psutil is not None:
+            process = psutil.Process(pid)
+            process.cpu_affinity(cpus)
+            return process.cpu_affinity()
+        if hasattr(os, 'sched_setaffinity'):
+            os.sched_setaffinity(pid, cpus)
+            return sorted(os.sched_getaffinity(pid))
+        subprocess.check_output(["taskset", "-pc", ",".join([str(c) for c in cpus]), str(pid)],
+                                stderr=subprocess.STDOUT)
+        return cpus
+    except Exception as err:
+        print_warning("Cannot set the CPU affinity of process %d: %s" % (pid, str(err)))
+        return None
+
+
+def apply_process_profile(pid, profile=None):
+    '''
+    Apply the process options of a link profile to the Sync_RX process.
+
+    :param pid: process id.
+    :param profile: see get_link_profile().
+
+    :return a report dictionary (see apply_data_socket_profile()).
+    '''
+    options = get_link_profile(profile)
+    report = {}
+    if options.get('sync_rx_cpus') is not None:
+        requested = sorted([int(c) for c in options['sync_rx_cpus']])
+        applied = set_process_affinity(pid, requested)
+        report['sync_rx_cpus'] = {'requested': requested, 'applied': applied}
+        if applied is not None and sorted(applied) != requested:
+            print_warning("Sync_RX CPU affinity differs from the requested one: %s instead of %s" % (
+                str(applied), str(requested)))
+    return report
+
+
+def _read_sys_value(path):
+    try:
+        with open(path) as f:
+            return int(f.read().split()[0])
+    except (IOError, OSError, ValueError, IndexError):
+        return None
+
+
+def check_host_network(interface=None):
+    '''
+    Read the host network settings configured by tools/ubuntu_lan_config.py and compare them with
+    HOST_NET_RECOMMENDED. Linux only.
+
+    :param interface: name of the network adapter connected to the USRP. The MTU is checked only if given.
+
+    :return a report dictionary {setting: {'value': value, 'recommended': value}}. The value is None if the setting
+        cannot be read.
+    '''
+    report = {}
+    for setting in ['rmem_max', 'wmem_max']:
+        report[setting] = {'value': _read_sys_value("/proc/sys/net/core/" + setting),
+                           'recommended': HOST_NET_RECOMMENDED[setting]}
+    report['busy_read'] = {'value': _read_sys_value("/proc/sys/net/core/busy_read"), 'recommended': None}
+    if interface is not None:
+        report['mtu'] = {'value': _read_sys_value("/sys/class/net/%s/mtu" % interface),
+                         'recommended': HOST_NET_RECOMMENDED['mtu']}
+    for setting in report:
+        value = report[setting]['value']
+        recommended = report[setting]['recommended']
+        if value is not None and recommended is not None and value < recommended:
+            print_warning("Host network setting %s is %d, %d recommended (see tools/ubuntu_lan_config.py)" % (
+                setting, value, recommended))
+    return report
+
+
+def verify_link_profile(profile=None, interface=None):
+    '''
+    Apply a link profile to unconnected sockets and report what the operating system grants, without connecting to
+    the server.
+
+    :param profile: see get_link_profile().
+    :param interface: name of the network adapter connected to the USRP (see check_host_network()).
+
+    :return a dictionary with the profile options, the socket reports and the host report. The 'clamped' list
+        contains the options not applied as requested.
+    '''
+    options = get_link_profile(profile)
+    data_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    command_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    try:
+        report = apply_data_socket_profile(data_socket, options)
+        report.update(apply_command_socket_profile(command_socket, options))
+    finally:
+        data_socket.close()
+        command_socket.close()
+    clamped = [name for name in report if report[name]['applied'] is None or
+               report[name]['applied'] < report[name]['requested']]
+    return {
+        'profile': profile if profile is not None else LINK_PROFILE,
+        'options': options,
+        'sockets': report,
+        'host': check_host_network(interface),
+        'clamped': clamped,
+    }
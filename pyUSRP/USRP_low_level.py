@@ -7,6 +7,7 @@
 
 import numpy as np
 import datetime
+import struct
 import signal as Signal
 import sys
 import socket
@@ -40,6 +41,64 @@ USRP_data_queue = multiprocessing.Queue()
 H5PY_compression = "gzip"
 HDF5_compatible_compression = 'gzip'
 
+# layout of the raw data datasets: chunking and filters (see raw_data_layout()).
+# "auto": chunk shape guessed by h5py, no filters.
+# "channel": each chunk contains RAW_DATA_CHUNK_SECONDS of a single channel, no filters.
+# "channel_fast": as "channel" with blosc/lz4 compression when hdf5plugin is available, gzip otherwise.
+# "channel_gzip": as "channel" with shuffle and gzip compression.
+# "contiguous": not chunked nor compressed, read by memory mapping (see H5_memmap()). The size of the measure has to be
+#   known in advance: triggered, rolled over and swmr acquisitions use "channel". The dataset is allocated for whole
+#   server packets (see raw_data_alloc_len()) and its "samples" attribute gives the length of the measure. As a last
+#   resort a dataset receiving more samples is converted to "channel" (see raw_data_rechunk()).
+RAW_DATA_LAYOUT_POLICIES = ["auto", "channel", "channel_fast", "channel_gzip", "contiguous"]
+
+# layout policy used for each measurement type (first element of wave_type)
+RAW_DATA_LAYOUT = {
+    "TONES": "channel",
+    "DIRECT": "channel",
+    "NOISE": "channel",
+    "CHIRP": "channel",
+    "NODSP": "channel"
+}
+
+# seconds of data per channel contained in a chunk of the raw data datasets
+RAW_DATA_CHUNK_SECONDS = 1.
+
+# minimum and maximum size of a raw data chunk in bytes. The maximum fits the default HDF5 chunk cache
+RAW_DATA_CHUNK_BYTES = (2 ** 14, 2 ** 20)
+
+# maximum size in bytes of a row of chunks covering all the channels (the write behind block cannot be smaller)
+RAW_DATA_CHUNK_ROW_BYTES = 2 ** 26
+
+# factor a raw data dataset grows by when a packet does not fit in it (triggered measures cannot be preallocated)
+RAW_DATA_GROWTH_FACTOR = 2
+
+# approximate size in bytes of the blocks yielded by iterate_H5file() and number of blocks read ahead
+READ_BLOCK_BYTES = 2 ** 26
+READ_AHEAD_BLOCKS = 2
+
+# number of measures whose front end properties are kept in memory (see get_metadata())
+METADATA_CACHE_SIZE = 32
+
+# in single writer multiple reader mode: seconds between two flushes of the file being written
+SWMR_FLUSH_SECONDS = 1.
+
+# in single writer multiple reader mode: seconds between two checks of the file being read (see tail_H5file())
+SWMR_POLL_SECONDS = 0.5
+
+# buffer size of the files written in spool mode (see spool_writer)
+SPOOL_BUFFER_BYTES = 2 ** 26
+
+# index record of each packet written in spool mode. offset is the position of the payload in the data file (bytes)
+spool_index_type = np.dtype([
+    ('packet_number', np.int64),
+    ('front_end_code', 'S6'),
+    ('length', np.int64),
+    ('errors', np.int32),
+    ('channels', np.int32),
+    ('offset', np.int64)
+])
+
 # Cores to use in analysis
 N_CORES = 10
 parallel_backend = 'multiprocessing'
@@ -69,6 +128,79 @@ header_type = np.dtype([
     ('channels', np.int32)
 ])
 
+# precompiled decoder of the RX_wrapper header (native byte order, no padding, same layout of header_type)
+sync_header_struct = struct.Struct('=iciiii')
+
+# front end names corresponding to the front_end_code field of the RX_wrapper header
+SYNC_FRONTEND_NAMES = {
+    'A': "A_TXRX",
+    'B': "A_RX2",
+    'C': "B_TXRX",
+    'D': "B_RX2"
+}
+
+
+class packet_descriptor(object):
+    '''
+    Metadata of a packet coming from the GPU server (see Decode_Sync_Header()).
+    Fields are accessible as attributes (fast) or, for compatibility with the dictionary used previously, as items:
+    metadata.length and metadata['length'] are equivalent.
+    '''
+    __slots__ = ('usrp_number', 'front_end_code', 'packet_number', 'length', 'errors', 'channels')
+
+    def __init__(self, usrp_number=0, front_end_code=None, packet_number=0, length=0, errors=0, channels=1):
+        self.usrp_number = usrp_number
+        self.front_end_code = front_end_code
+        self.packet_number = packet_number
+        self.length = length
+        self.errors = errors
+        self.channels = channels
+
+    @classmethod
+    def from_dict(cls, metadata):
+        '''
+        Build a descriptor from a metadata dictionary.
+        '''
+        return cls(metadata['usrp_number'], metadata['front_end_code'], metadata['packet_number'], metadata['length'],
+                   metadata['errors'], metadata['channels'])
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __contains__(self, key):
+        return key in self.__slots__
+
+    def __iter__(self):
+        return iter(self.__slots__)
+
+    def keys(self):
+        return list(self.__slots__)
+
+    def get(self, key, default=None):
+        return getattr(self, key, default)
+
+    def copy(self):
+        return packet_descriptor(self.usrp_number, self.front_end_code, self.packet_number, self.length, self.errors,
+                                 self.channels)
+
+    def __getstate__(self):
+        return (self.usrp_number, self.front_end_code, self.packet_number, self.length, self.errors, self.channels)
+
+    def __setstate__(self, state):
+        (self.usrp_number, self.front_end_code, self.packet_number, self.length, self.errors, self.channels) = state
+
+    def __repr__(self):
+        return "packet_descriptor(%s)" % ", ".join(["%s=%s" % (k, repr(getattr(self, k))) for k in self.__slots__])
+
+
 # data type expected for the buffer
 data_type = np.complex64
 
@@ -80,6 +212,15 @@ END_OF_MEASURE = False
 # mutex guarding the variable above
 EOM_cond = Condition()
 
+# number of packets per frontend sent by the server as reported by the end of measurement message, None if not reported
+EOM_PACKETS = None
+
+# time at which the end of measurement message has been received, used for the EOM to file closed latency
+EOM_TIME = None
+
+# time Packets_to_file() waits for a packet before checking the end of measurement again (seconds)
+EOM_POLL_SECONDS = 0.02
+
 # becomes true when a communication error occured
 ERROR_STATUS = False
 
@@ -115,6 +256,17 @@ CLIENT_STATUS["Sync_RX_status"] = False
 CLIENT_STATUS["keyboard_disconnect"] = False
 CLIENT_STATUS["keyboard_disconnect_attemp"] = 0
 CLIENT_STATUS["measure_running_now"] = False
+# packet sequence counters of the current measure (see sequence_tracker)
+CLIENT_STATUS["lost_packets"] = 0
+CLIENT_STATUS["duplicate_packets"] = 0
+CLIENT_STATUS["sequence_gaps"] = 0
+# seconds between the end of measurement message and the file closed in the last measure, None if no EOM received
+CLIENT_STATUS["eom_close_latency"] = None
+# bytes and packets received by the Sync_RX process since it started
+CLIENT_STATUS["rx_bytes"] = 0
+CLIENT_STATUS["rx_packets"] = 0
+# last sample of the acquisition telemetry (see acquisition_telemetry)
+CLIENT_STATUS["telemetry"] = None
 
 # threading condition variables for controlling Sync RX thread activity
 Sync_RX_condition = manager.Condition()
@@ -276,3 +428,58 @@ def quantize_tones(tones, rate, bins):
         )
     print_debug("Average tone quantization error: %.1f Hz"%average_tones_diff(tones,quantized_tones))
     return np.asarray(quantized_tones)
+
+
+def raw_data_len(rx_param):
+    '''
+    Compute the number of samples per channel the GPU server streams for a RX frontend descriptor.
+    With CHIRP the server averages each tone of the swipe on decim tones so it sends one sample every
+    decim * chirp_t * rate / swipe_s input samples.
+
+    :param rx_param: the parameter dictionary of a RX frontend (i.e. global_parameter().parameters['A_RX2']).
+
+    :return the number of samples per channel or None if the DSP descriptor is not recognized.
+    '''
+    wave_type = rx_param['wave_type'][0]
+    decim = int(rx_param['decim'])
+    samples = int(rx_param['samples'])
+    if wave_type == "TONES":
+        return int(np.ceil(samples / float(max(int(rx_param['fft_tones']), 1) * max(decim, 1))))
+    elif wave_type in ["DIRECT", "NOISE", "NODSP"]:
+        return int(np.ceil(samples / float(max(decim, 1))))
+    elif wave_type == "CHIRP":
+        if decim == 0:
+            return samples
+        num_steps = float(rx_param['swipe_s'][0])
+        if num_steps < 1:
+            num_steps = rx_param['chirp_t'][0] * rx_param['rate']
+        tone_len = max(int(rx_param['chirp_t'][0] * rx_param['rate'] / max(num_steps, 1)), 1)
+        return samples // (tone_len * decim)
+    return None
+
+
+def raw_data_alloc_len(rx_param):
+    '''
+    Compute the number of samples per channel to allocate for a RX frontend descriptor when the dataset cannot be
+    resized ('contiguous' raw data layout). The GPU server acquires until it has sent whole packets of buffer_len
+    samples, so the measure is rounded up to a multiple of buffer_len.
+
+    :param rx_param: the parameter dictionary of a RX frontend.
+
+    :return the number of samples per channel or None if the DSP descriptor is not recognized.
+    '''
+    buffer_len = int(rx_param.get('buffer_len', 0))
+    samples = int(rx_param['samples'])
+    if buffer_len <= 0 or samples <= 0:
+        return raw_data_len(rx_param)
+    packets = int(np.ceil(samples / float(buffer_len)))
+    padded = dict(rx_param)
+    padded['samples'] = packets * buffer_len
+    single = dict(rx_param)
+    single['samples'] = buffer_len
+    padded_len = raw_data_len(padded)
+    packet_len = raw_data_len(single)
+    if padded_len is None or packet_len is None:
+        return None
+    # each packet is processed on its own: the rounding of the DSP applies per packet
+    return max(padded_len, packets * packet_len)
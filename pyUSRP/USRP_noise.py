@@ -69,6 +69,7 @@ def dual_get_noise(tones_A, tones_B, measure_t, rate, decimation = None, amplitu
         - kwargs:
             * verbose: additional prints. Default is False.
             * push_queue: queue for post writing samples.
+            * push_policy: what happens when the push_queue consumer is slow, see push_subscriber. Default is PUSH_POLICY.
 
     Note:
         - In the PFB acquisition scheme the decimation factor and bin width are directly correlated. This function execute a check
@@ -96,7 +97,7 @@ def dual_get_noise(tones_A, tones_B, measure_t, rate, decimation = None, amplitu
         elif mode == "PFB":
             pf_average = 4
     try:
-        push_queue = kwargs['push_queue']
+        push_queue = kwargs.pop('push_queue')
     except KeyError:
         push_queue = None
 
@@ -404,6 +405,7 @@ def Get_noise(tones, measure_t, rate, decimation = None, amplitudes = None, RF =
         - kwargs:
             * verbose: additional prints. Default is False.
             * push_queue: queue for post writing samples.
+            * push_policy: what happens when the push_queue consumer is slow, see push_subscriber. Default is PUSH_POLICY.
 
 
     Note:
@@ -433,7 +435,7 @@ def Get_noise(tones, measure_t, rate, decimation = None, amplitudes = None, RF =
         verbose = False
 
     try:
-        push_queue = kwargs['push_queue']
+        push_queue = kwargs.pop('push_queue')
     except KeyError:
         push_queue = None
 
@@ -0,0 +1,344 @@
+########################################################################################
+##                                                                                    ##
+##  THIS LIBRARY IS PART OF THE SOFTWARE DEVELOPED BY THE JET PROPULSION LABORATORY   ##
+##  IN THE CONTEXT OF THE GPU ACCELERATED FLEXIBLE RADIOFREQUENCY READOUT PROJECT     ##
+##                                                                                    ##
+########################################################################################
+
+import numpy as np
+import socket
+import struct
+import json
+import time
+from threading import Thread, Event
+
+# import submodules
+from USRP_low_level import *
+
+# front end names as encoded in the RX_wrapper header (see Decode_Sync_Header())
+SIMULATOR_FRONTEND_CODES = {
+    "A_TXRX": 'A',
+    "A_RX2": 'B',
+    "B_TXRX": 'C',
+    "B_RX2": 'D'
+}
+
+# standard deviation of the gaussian noise added to the synthesized signals
+SIMULATOR_NOISE_LEVEL = 1e-3
+
+
+def simulated_data_len(rx_param):
+    '''
+    Compute the number of samples per channel and the number of channels the GPU server would stream for a RX
+    frontend descriptor.
+
+    :param rx_param: the parameter dictionary of a RX frontend (i.e. global_parameter().parameters['A_RX2']).
+
+    :return tuple (samples_per_channel, channels).
+    '''
+    samples_per_channel = raw_data_len(rx_param)
+    if samples_per_channel is None:
+        samples_per_channel = int(rx_param['samples'])
+    if rx_param['wave_type'][0] in ["TONES", "DIRECT"]:
+        return samples_per_channel, len(rx_param['wave_type'])
+    return samples_per_channel, 1
+
+
+def synthesize_packet(rx_param, first_sample, samples_per_channel, channels):
+    '''
+    Synthesize a packet of data similar to what the GPU server would produce.
+
+    :param rx_param: the parameter dictionary of a RX frontend.
+    :param first_sample: index of the first sample per channel in the measure (used for phase continuity).
+    :param samples_per_channel: number of samples per channel in the packet.
+    :param channels: number of channels in the packet.
+
+    :return complex64 array interleaved as the server does: ch0_t0, ch1_t0, ch0_t1, ch1_t1...
+    '''
+    wave_type = rx_param['wave_type'][0]
+    rate = float(max(rx_param['rate'], 1))
+    t = (first_sample + np.arange(samples_per_channel)) / rate
+    block = np.empty((channels, samples_per_channel), dtype=np.complex64)
+
+    if wave_type == "TONES" or wave_type == "DIRECT":
+        # demodulated tones: constant phasor per channel slowly rotating
+        for ch in range(channels):
+            try:
+                ampl = float(rx_param['ampl'][ch])
+            except (IndexError, TypeError):
+                ampl = 1. / channels
+            block[ch] = ampl * np.exp(1j * (2 * np.pi * 1e-3 * ch * t + ch))
+    elif wave_type == "CHIRP":
+        try:
+            f0 = float(rx_param['freq'][0])
+            f1 = float(rx_param['chirp_f'][0])
+            duration = float(rx_param['chirp_t'][0])
+        except (IndexError, TypeError):
+            f0, f1, duration = 0., rate / 4., 1.
+        k = (f1 - f0) / max(duration, 1e-9)
+        block[0] = np.exp(1j * 2 * np.pi * (f0 * t + 0.5 * k * t ** 2))
+    else:
+        block[:] = 0
+
+    block += (np.random.normal(scale=SIMULATOR_NOISE_LEVEL, size=block.shape) +
+              1j * np.random.normal(scale=SIMULATOR_NOISE_LEVEL, size=block.shape)).astype(np.complex64)
+
+    return np.ascontiguousarray(block.T).reshape(-1)
+
+
+def encode_sync_header(usrp_number, front_end, packet_number, length, errors, channels):
+    '''
+    Build the RX_wrapper header of a packet as the GPU server would send it.
+
+    :return string of header_type.itemsize bytes.
+    '''
+    header = np.zeros(1, dtype=header_type)
+    header[0]['usrp_number'] = usrp_number
+    header[0]['front_end_code'] = SIMULATOR_FRONTEND_CODES[front_end]
+    header[0]['packet_number'] = packet_number
+    header[0]['length'] = length
+    header[0]['errors'] = errors
+    header[0]['channels'] = channels
+    return header.tostring()
+
+
+def encode_async_response(response_type, payload):
+    '''
+    Build an async message from the server to the client: two int header (0, length) and JSON payload.
+
+    :param response_type: "ack" or "nack".
+    :param payload: string payload.
+
+    :return the string to send on the command socket.
+    '''
+    message = json.dumps({"type": response_type, "payload": payload})
+    return struct.pack('i', 0) + struct.pack('i', len(message)) + message
+
+
+class loopback_server(object):
+    '''
+    Pure python stand-in for the GPU server. Speaks the async JSON protocol on the command port and streams
+    synthesized packets on the data port so that Connect(), Async_send(), Sync_RX() and Packets_to_file() can be
+    exercised without the C++ server and a USRP.
+
+    Each JSON command received is answered with an ack, the RX frontends described are streamed as TONES, CHIRP,
+    NOISE, DIRECT or NODSP packets and an "EOM" ack reporting the packets sent per frontend is sent when the stream is
+    complete (see Decode_EOM_packets()).
+
+    :param address: ip address to listen on. Default is USRP_IP_ADDR.
+    :param command_port: port of the async command socket.
+    :param data_port: port of the sync data socket.
+    :param packet_samples: samples per channel in each packet. Default is derived from buffer_len and decimation.
+    :param throttle: samples per second per channel the stream is paced at. Default is as fast as possible.
+    :param precompute: if True synthesize a single packet per frontend and send it repeatedly. This keeps the
+        simulator from becoming the bottleneck when measuring client throughput.
+    :param usrp_number: the usrp number written in each header.
+
+    Example:
+    >>> sim = loopback_server()
+    >>> sim.start()
+    >>> Connect()
+    >>> Get_noise(...)
+    >>> Disconnect()
+    >>> sim.stop()
+    '''
+
+    def __init__(self, address=None, command_port=None, data_port=None, packet_samples=None, throttle=None,
+                 precompute=True, usrp_number=0):
+
+        if address is None:
+            address = USRP_IP_ADDR
+        if command_port is None:
+            command_port = USRP_server_address[1]
+        if data_port is None:
+            data_port = USRP_server_address_data[1]
+
+        self.command_address = (address, int(command_port))
+        self.data_address = (address, int(data_port))
+        self.packet_samples = packet_samples
+        self.throttle = throttle
+        self.precompute = precompute
+        self.usrp_number = int(usrp_number)
+
+        # statistics of the last measure
+        self.packets_sent = 0
+        self.bytes_sent = 0
+        self.stream_time = 0
+        self.last_packets = {}
+
+        self._running = Event()
+        self._data_connected = Event()
+        self._command_socket = None
+        self._data_socket = None
+        self._data_client = None
+        self._command_thread = None
+        self._data_thread = None
+
+    def _listen(self, address):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind(address)
+        sock.listen(1)
+        sock.settimeout(0.5)
+        return sock
+
+    def start(self):
+        '''
+        Start listening on the command and data ports in background threads.
+        '''
+        self._running.set()
+        self._command_socket = self._listen(self.command_address)
+        self._data_socket = self._listen(self.data_address)
+        self._command_thread = Thread(target=self._command_loop, name="Simulator_command")
+        self._command_thread.daemon = True
+        self._data_thread = Thread(target=self._data_accept_loop, name="Simulator_data")
+        self._data_thread.daemon = True
+        self._command_thread.start()
+        self._data_thread.start()
+        print_debug("Loopback server listening on ports %d (command) and %d (data)" % (
+            self.command_address[1], self.data_address[1]))
+
+    def stop(self):
+        '''
+        Stop the server and close all the sockets.
+        '''
+        self._running.clear()
+        for th in [self._command_thread, self._data_thread]:
+            if th is not None:
+                th.join()
+        for sock in [self._command_socket, self._data_socket, self._data_client]:
+            try:
+                if sock is not None:
+                    sock.close()
+            except socket.error:
+                pass
+        print_debug("Loopback server stopped")
+
+    def _data_accept_loop(self):
+        while self._running.is_set():
+            try:
+                client, addr = self._data_socket.accept()
+            except socket.timeout:
+                continue
+            if self._data_client is not None:
+                try:
+                    self._data_client.close()
+                except socket.error:
+                    pass
+            self._data_client = client
+            self._data_connected.set()
+
+    def _recv_exactly(self, client, size):
+        data = ""
+        while len(data) < size and self._running.is_set():
+            try:
+                chunk = client.recv(size - len(data))
+            except socket.timeout:
+                continue
+            if len(chunk) == 0:
+                return None
+            data += chunk
+        return data
+
+    def _command_loop(self):
+        while self._running.is_set():
+            try:
+                client, addr = self._command_socket.accept()
+            except socket.timeout:
+                continue
+            client.settimeout(0.5)
+            while self._running.is_set():
+                header = self._recv_exactly(client, 8)
+                if not header:
+                    break
+                code, size = struct.unpack('II', header)
+                payload = self._recv_exactly(client, size)
+                if payload is None:
+                    break
+                self._handle_command(client, payload)
+            client.close()
+
+    def _handle_command(self, client, payload):
+        try:
+            command = json.loads(payload)
+        except ValueError:
+            client.sendall(encode_async_response("nack", "Cannot convert JSON to params"))
+            return
+
+        client.sendall(encode_async_response("ack", "Message received"))
+
+        rx_params = []
+        for ant in SIMULATOR_FRONTEND_CODES:
+            try:
+                if command[ant]['mode'] == "RX":
+                    rx_params.append((ant, command[ant]))
+            except KeyError:
+                pass
+
+        self.last_packets = {}
+        if len(rx_params) > 0:
+            if not self._data_connected.wait(10):
+                print_warning("Loopback server: no data client connected, measure skipped")
+            else:
+                self.stream(rx_params)
+
+        client.sendall(encode_async_response("ack", "EOM: end of measurement " + json.dumps(
+            {"packets": self.last_packets})))
+
+    def stream(self, rx_params):
+        '''
+        Stream the packets corresponding to a list of RX frontends on the connected data socket.
+
+        :param rx_params: list of tuples (frontend name, parameter dictionary).
+        '''
+        streams = []
+        for ant, param in rx_params:
+            total, channels = simulated_data_len(param)
+            if self.packet_samples is not None:
+                spc = int(self.packet_samples)
+            else:
+                spc = max(int(param['buffer_len']) / max(int(param['decim']), 1), 1)
+                if param['wave_type'][0] == "TONES":
+                    spc = max(int(param['buffer_len']) / max(int(param['fft_tones']), 1), 1)
+            template = synthesize_packet(param, 0, spc, channels) if self.precompute else None
+            streams.append({'ant': ant, 'param': param, 'total': total, 'channels': channels, 'spc': spc,
+                            'sent': 0, 'packet_number': 0, 'template': template})
+
+        self.packets_sent = 0
+        self.bytes_sent = 0
+        start = time.time()
+        active = True
+        while active and self._running.is_set():
+            active = False
+            for s in streams:
+                if s['sent'] >= s['total']:
+                    continue
+                active = True
+                spc = min(s['spc'], s['total'] - s['sent'])
+                if self.precompute:
+                    data = s['template'][:spc * s['channels']]
+                else:
+                    data = synthesize_packet(s['param'], s['sent'], spc, s['channels'])
+                s['packet_number'] += 1
+                message = encode_sync_header(self.usrp_number, s['ant'], s['packet_number'], spc * s['channels'], 0,
+                                             s['channels']) + data.tostring()
+                try:
+                    self._data_client.sendall(message)
+                except socket.error as msg:
+                    print_warning("Loopback server: data client disconnected: %s" % str(msg))
+                    self._data_connected.clear()
+                    return
+                s['sent'] += spc
+                self.packets_sent += 1
+                self.bytes_sent += len(message)
+
+            if self.throttle is not None and active:
+                # pace on the slowest stream
+                sent = min([s['sent'] for s in streams])
+                delay = sent / float(self.throttle) - (time.time() - start)
+                if delay > 0:
+                    time.sleep(delay)
+
+        self.stream_time = time.time() - start
+        for s in streams:
+            self.last_packets[s['ant']] = s['packet_number']
@@ -0,0 +1,310 @@
+########################################################################################
+##                                                                                    ##
+##  THIS LIBRARY IS PART OF THE SOFTWARE DEVELOPED BY THE JET PROPULSION LABORATORY   ##
+##  IN THE CONTEXT OF THE GPU ACCELERATED FLEXIBLE RADIOFREQUENCY READOUT PROJECT     ##
+##                                                                                    ##
+########################################################################################
+
+import numpy as np
+import h5py
+import socket
+import json
+import time
+import os
+from collections import deque
+from threading import Thread, Event, Lock
+
+# import submodules
+from USRP_low_level import *
+
+# seconds between two telemetry samples
+TELEMETRY_SECONDS = 1.
+
+# number of recent packets the writer latency percentiles are computed on
+TELEMETRY_LATENCY_SAMPLES = 4096
+
+# fields of a telemetry sample, in the order of the CSV and HDF5 logs
+TELEMETRY_FIELDS = [
+    'time',                 # epoch of the sample
+    'elapsed',              # seconds since the start of the acquisition
+    'rx_bytes_per_s',       # bytes per second received by Sync_RX
+    'rx_packets_per_s',     # packets per second received by Sync_RX
+    'bytes_per_s',          # bytes per second consumed by Packets_to_file()
+    'packets_per_s',        # packets per second consumed by Packets_to_file()
+    'queue_depth',          # packets waiting between Sync_RX and Packets_to_file()
+    'pipeline_depth',       # packets waiting in the pipeline stages of Packets_to_file()
+    'latency_p50',          # writer latency percentiles in seconds
+    'latency_p90',
+    'latency_p99',
+    'latency_max',
+    'flush_time',           # seconds spent flushing the write behind buffers
+    'server_errors',        # packets flagged with errors by the server
+    'lost_packets',         # packets lost (see sequence_tracker)
+]
+
+
+class telemetry_log(object):
+    '''
+    Append telemetry samples to a CSV file or to the \"telemetry\" dataset of a HDF5 file, depending on the extension
+    of the filename (.csv or .h5).
+
+    :param filename: name of the log file. An existing log is appended to.
+    '''
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.h5 = os.path.splitext(filename)[1] in [".h5", ".hdf5"]
+        if self.h5:
+            self._file = h5py.File(filename, 'a')
+            if "telemetry" not in self._file:
+                self._file.create_dataset("telemetry", (0,), maxshape=(None,), chunks=True,
+                                          dtype=np.dtype([(field, np.float64) for field in TELEMETRY_FIELDS]))
+            self._dataset = self._file["telemetry"]
+        else:
+            new = not os.path.exists(filename) or os.path.getsize(filename) == 0
+            self._file = open(filename, 'a')
+            if new:
+                self._file.write(",".join(TELEMETRY_FIELDS) + "\n")
+
+    def append(self, sample):
+        values = [float(sample[field]) if sample[field] is not None else np.nan for field in TELEMETRY_FIELDS]
+        if self.h5:
+            n = self._dataset.shape[0]
+            self._dataset.resize((n + 1,))
+            self._dataset[n] = tuple(values)
+        else:
+            self._file.write(",".join([repr(v) for v in values]) + "\n")
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class acquisition_telemetry(object):
+    '''
+    Throughput and backlog counters of an acquisition, sampled every interval seconds by Packets_to_file().
+    Each sample is a dictionary with the TELEMETRY_FIELDS keys, copied to CLIENT_STATUS[\"telemetry\"] and, optionally,
+    served on a local UNIX socket (see read_telemetry()) and appended to a log (see telemetry_log).
+
+    The received side counters come from the Sync_RX process through CLIENT_STATUS[\"rx_bytes\"] and
+    CLIENT_STATUS[\"rx_packets\"].
+
+    :param socket_path: path of the UNIX socket. Default does not serve the samples.
+    :param log: name of a .csv or .h5 log file. Default does not log.
+    :param interval: seconds between two samples.
+
+    Example:
+    >>> t = acquisition_telemetry(socket_path = "/tmp/usrp_telemetry", log = "USRP_telemetry.csv")
+    >>> Packets_to_file(noise_command, telemetry = t)
+    >>> # from another process:
+    >>> read_telemetry("/tmp/usrp_telemetry")['rx_bytes_per_s']
+    '''
+
+    def __init__(self, socket_path=None, log=None, interval=TELEMETRY_SECONDS):
+        self.socket_path = socket_path
+        self.log_filename = log
+        self.interval = float(interval)
+        self.last = None
+        self._latencies = deque(maxlen=TELEMETRY_LATENCY_SAMPLES)
+        self._lock = Lock()
+        self._log = None
+        self._server = None
+        self._server_thread = None
+        self._running = Event()
+        self._reset()
+
+    def _reset(self):
+        self.bytes = 0
+        self.packets = 0
+        self.server_errors = 0
+        self._start = time.time()
+        self._previous = {'time': self._start, 'bytes': 0, 'packets': 0, 'rx_bytes': None, 'rx_packets': None}
+        self._latencies.clear()
+
+    def start(self, status=None):
+        '''
+        Reset the counters and open the socket and the log.
+
+        :param status: the CLIENT_STATUS dictionary the received side counters are read from.
+        '''
+        self._reset()
+        if status is not None:
+            self._previous['rx_bytes'] = status.get("rx_bytes")
+            self._previous['rx_packets'] = status.get("rx_packets")
+        if self.log_filename is not None:
+            self._log = telemetry_log(self.log_filename)
+        if self.socket_path is not None:
+            self._serve()
+
+    def packet(self, metadata):
+        '''
+        Count a packet consumed by Packets_to_file().
+        '''
+        self.packets += 1
+        self.bytes += 8 * metadata.length
+        if metadata.errors != 0:
+            self.server_errors += 1
+
+    def record_latency(self, seconds):
+        '''
+        Record the time a packet took from the receive queue to the file.
+        '''
+        self._latencies.append(seconds)
+
+    def due(self):
+        '''
+        :return True if interval seconds elapsed since the last sample: the callers check it before gathering the
+            counters passed to update().
+        '''
+        return (time.time() - self._previous['time']) >= self.interval
+
+    def update(self, status=None, queue_depth=None, pipeline_depth=None, flush_time=None, lost_packets=None,
+               force=False):
+        '''
+        Take a sample if interval seconds elapsed since the last one.
+
+        :param status: the CLIENT_STATUS dictionary: the received side counters are read from it and the sample is
+            written in it.
+        :param queue_depth: packets waiting between Sync_RX and Packets_to_file().
+        :param pipeline_depth: packets waiting in the pipeline stages.
+        :param flush_time: seconds spent flushing the write behind buffers.
+        :param lost_packets: packets lost so far.
+        :param force: take the sample regardless of the time elapsed.
+
+        :return the sample or None.
+        '''
+        now = time.time()
+        dt = now - self._previous['time']
+        if not force and dt < self.interval:
+            return None
+        dt = max(dt, 1e-9)
+
+        rx_bytes_rate = rx_packets_rate = None
+        if status is not None:
+            rx_bytes = status.get("rx_bytes")
+            rx_packets = status.get("rx_packets")
+            if rx_bytes is not None and self._previous['rx_bytes'] is not None:
+                rx_bytes_rate = max(rx_bytes - self._previous['rx_bytes'], 0) / dt
+                rx_packets_rate = max(rx_packets - self._previous['rx_packets'], 0) / dt
+            self._previous['rx_bytes'] = rx_bytes
+            self._previous['rx_packets'] = rx_packets
+
+        latencies = list(self._latencies)
+        if len(latencies) > 0:
+            p50, p90, p99 = np.percentile(latencies, [50, 90, 99])
+            latency_max = max(latencies)
+        else:
+            p50 = p90 = p99 = latency_max = None
+
+        sample = {
+            'time': now,
+            'elapsed': now - self._start,
+            'rx_bytes_per_s': rx_bytes_rate,
+            'rx_packets_per_s': rx_packets_rate,
+            'bytes_per_s': (self.bytes - self._previous['bytes']) / dt,
+            'packets_per_s': (self.packets - self._previous['packets']) / dt,
+            'queue_depth': queue_depth,
+            'pipeline_depth': pipeline_depth,
+            'latency_p50': p50,
+            'latency_p90': p90,
+            'latency_p99': p99,
+            'latency_max': latency_max,
+            'flush_time': flush_time,
+            'server_errors': self.server_errors,
+            'lost_packets': lost_packets,
+        }
+        self._previous['time'] = now
+        self._previous['bytes'] = self.bytes
+        self._previous['packets'] = self.packets
+
+        with self._lock:
+            self.last = sample
+        if status is not None:
+            status["telemetry"] = sample
+        if self._log is not None:
+            self._log.append(sample)
+        return sample
+
+    def stop(self, status=None, **kwargs):
+        '''
+        Take a last sample and close the socket and the log.
+
+        :param status: see update().
+        :param kwargs: arguments of update().
+
+        :return the last sample.
+        '''
+        sample = self.update(status, force=True, **kwargs)
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+        if self._server is not None:
+            self._running.clear()
+            self._server_thread.join()
+            self._server.close()
+            self._server = None
+            try:
+                os.unlink(self.socket_path)
+            except OSError:
+                pass
+        return sample
+
+    def _serve(self):
+        try:
+            os.unlink(self.socket_path)
+        except OSError:
+            pass
+        self._server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._server.bind(self.socket_path)
+        self._server.listen(4)
+        self._server.settimeout(0.5)
+        self._running.set()
+        self._server_thread = Thread(target=self._serve_loop, name="Telemetry_server")
+        self._server_thread.daemon = True
+        self._server_thread.start()
+
+    def _serve_loop(self):
+        while self._running.is_set():
+            try:
+                client, addr = self._server.accept()
+            except socket.timeout:
+                continue
+            except socket.error:
+                break
+            with self._lock:
+                message = json.dumps(self.last)
+            try:
+                client.sendall(message + "\n")
+            except socket.error:
+                pass
+            client.close()
+
+
+def read_telemetry(socket_path, timeout=1.):
+    '''
+    Read the last telemetry sample of an acquisition running in another process (see acquisition_telemetry).
+
+    :param socket_path: path of the UNIX socket given to acquisition_telemetry.
+    :param timeout: seconds to wait for the sample.
+
+    :return the sample dictionary or None if no sample has been taken yet or the socket is not available.
+    '''
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    client.settimeout(timeout)
+    message = ""
+    try:
+        client.connect(socket_path)
+        while True:
+            chunk = client.recv(4096)
+            if len(chunk) == 0:
+                break
+            message += chunk
+    except socket.error as msg:
+        print_warning("Cannot read telemetry from %s: %s" % (socket_path, str(msg)))
+        return None
+    finally:
+        client.close()
+    try:
+        return json.loads(message)
+    except ValueError:
+        return None
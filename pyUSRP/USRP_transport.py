@@ -0,0 +1,728 @@
+########################################################################################
+##                                                                                    ##
+##  THIS LIBRARY IS PART OF THE SOFTWARE DEVELOPED BY THE JET PROPULSION LABORATORY   ##
+##  IN THE CONTEXT OF THE GPU ACCELERATED FLEXIBLE RADIOFREQUENCY READOUT PROJECT     ##
+##                                                                                    ##
+########################################################################################
+
+import numpy as np
+import socket
+import select
+import struct
+import json
+import os
+import errno
+import time
+import Queue
+import multiprocessing
+from threading import Thread, Event, Lock
+
+# import submodules
+from USRP_low_level import *
+from USRP_connections import *
+
+# time the command and data sockets wait for the server when connecting (seconds)
+TRANSPORT_CONNECT_TIMEOUT = 10
+
+# after the end of measurement message, time the data socket has to stay idle before the measure is complete (seconds)
+TRANSPORT_EOM_LINGER = 0.05
+
+# upper bound on the time the event loop waits without any event (seconds)
+TRANSPORT_SELECT_TIMEOUT = 1.
+
+
+class transport_timeout(Exception):
+    '''
+    Raised by transport_future.result() when the result is not available within the timeout.
+    '''
+    pass
+
+
+class transport_future(object):
+    '''
+    Result of an operation of the event_transport that completes in the event loop thread.
+    Similar to the futures of concurrent.futures (not available in python 2 without external packages).
+    '''
+
+    def __init__(self):
+        self._done = Event()
+        self._lock = Lock()
+        self._result = None
+        self._exception = None
+        self._callbacks = []
+
+    def done(self):
+        '''
+        :return True if the result or an exception has been set.
+        '''
+        return self._done.is_set()
+
+    def result(self, timeout=None):
+        '''
+        Wait for the result.
+
+        :param timeout: seconds to wait. Default waits forever.
+
+        :return the result of the operation.
+
+        :raise transport_timeout: if the result is not available within timeout.
+        :raise the exception of the operation if it failed.
+        '''
+        if not self._done.wait(timeout):
+            raise transport_timeout("Operation not completed within %s seconds" % str(timeout))
+        if self._exception is not None:
+            raise self._exception
+        return self._result
+
+    def add_done_callback(self, callback):
+        '''
+        Call callback(future) when the future completes (immediately if already completed).
+        '''
+        with self._lock:
+            if not self._done.is_set():
+                self._callbacks.append(callback)
+                return
+        callback(self)
+
+    def _complete(self):
+        with self._lock:
+            self._done.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback(self)
+            except Exception as err:
+                print_warning("Transport future callback raised: %s" % str(err))
+
+    def set_result(self, result):
+        self._result = result
+        self._complete()
+
+    def set_exception(self, exception):
+        self._exception = exception
+        self._complete()
+
+
+class measure_source(object):
+    '''
+    Packets of a measure received by an event_transport, as consumed by Packets_to_file(source = ...).
+    A (None, None) element follows the last packet.
+    '''
+
+    def __init__(self):
+        self.queue = Queue.Queue()
+        self.eom = Event()
+        self.eom_packets = None
+        self.eom_time = None
+        self.last_packet = {}
+        self.packets = 0
+
+    def put(self, metadata, data):
+        self.packets += 1
+        if metadata.packet_number > self.last_packet.get(metadata.front_end_code, 0):
+            self.last_packet[metadata.front_end_code] = metadata.packet_number
+        self.queue.put((metadata, data))
+
+    def set_end_of_measure(self, eom_packets=None):
+        self.eom_packets = eom_packets
+        self.eom_time = time.time()
+        self.eom.set()
+
+    def get(self, timeout=None):
+        '''
+        :raise Empty: in case no packet is available within timeout.
+        '''
+        return self.queue.get(timeout=timeout)
+
+    def end_of_measure(self):
+        return self.eom.is_set()
+
+
+class event_transport(object):
+    '''
+    Event driven client for the command and data connections of a GPU server.
+    A single thread waits on both sockets with select(): the messages decoded by Decode_Async_payload() and the packets
+    are handled as soon as they arrive, without the sleep back-offs of Async_thread() and Sync_RX().
+    Commands return futures resolved by the ack/nack of the server and acquisitions return futures resolved when the
+    file has been closed. To acquire from several servers at once use multi_acquisition, which runs a transport per
+    process.
+
+    This replaces the asyncio coroutines of python 3, not available to this library.
+
+    :param address: ip address of the server. Default is USRP_IP_ADDR.
+    :param command_port: port of the command connection.
+    :param data_port: port of the data connection.
+    :param link_profile: socket options applied to the connections (see get_link_profile()). Default is LINK_PROFILE.
+
+    Example:
+    >>> t = event_transport()
+    >>> t.connect()
+    >>> filename = t.acquire(noise_command, filename = "USRP_Noise").result()
+    >>> t.close()
+
+    Note:
+        - The module level Connect()/Disconnect() interface is unaffected: the two can not be used on the same server at
+          the same time.
+    '''
+
+    def __init__(self, address=None, command_port=None, data_port=None, link_profile=None):
+        if address is None:
+            address = USRP_IP_ADDR
+        if command_port is None:
+            command_port = USRP_server_address[1]
+        if data_port is None:
+            data_port = USRP_server_address_data[1]
+        self.command_address = (address, int(command_port))
+        self.data_address = (address, int(data_port))
+        self.link_profile = get_link_profile(link_profile)
+        self.link_report = {}
+
+        self._command_socket = None
+        self._data_socket = None
+        self._wake_read = None
+        self._wake_write = None
+        self._thread = None
+        self._running = Event()
+        self._lock = Lock()
+
+        # command connection state
+        self._outgoing = ""
+        self._pending = []
+        self._command_header = ""
+        self._command_size = None
+        self._command_payload = ""
+
+        # data connection state
+        self._header_buffer = bytearray(header_type.itemsize)
+        self._header_received = 0
+        self._metadata = None
+        self._payload = None
+        self._payload_view = None
+        self._payload_bytes = 0
+        self._payload_received = 0
+        self._last_data = 0
+
+        # current measure
+        self._source = None
+        self._measure = None
+        self._eom_time = None
+
+        # filename of the last server side file
+        self.remote_filename = None
+
+        # statistics
+        self.packets_received = 0
+        self.bytes_received = 0
+
+    def _connect_socket(self, address, timeout, apply_profile):
+        start = time.time()
+        verbose = True
+        while True:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            self.link_report.update(apply_profile(sock, self.link_profile, verbose=verbose))
+            verbose = False
+            sock.settimeout(max(timeout - (time.time() - start), 0.1))
+            try:
+                sock.connect(address)
+                sock.setblocking(0)
+                return sock
+            except socket.error as msg:
+                sock.close()
+                if time.time() - start > timeout:
+                    print_warning("Cannot connect to %s:%d: %s" % (address[0], address[1], str(msg)))
+                    return None
+                time.sleep(0.1)
+
+    def connect(self, timeout=TRANSPORT_CONNECT_TIMEOUT):
+        '''
+        Connect the data and command sockets and start the event loop thread.
+
+        :param timeout: seconds to wait for the server.
+
+        :return True if both the connections are established.
+        '''
+        self._data_socket = self._connect_socket(self.data_address, timeout, apply_data_socket_profile)
+        if self._data_socket is None:
+            return False
+        self._command_socket = self._connect_socket(self.command_address, timeout, apply_command_socket_profile)
+        if self._command_socket is None:
+            self._data_socket.close()
+            return False
+        self._wake_read, self._wake_write = os.pipe()
+        self._running.set()
+        self._thread = Thread(target=self._loop, name="Event_transport")
+        self._thread.daemon = True
+        self._thread.start()
+        print_debug("Event transport connected to %s" % self.command_address[0])
+        return True
+
+    def close(self):
+        '''
+        Stop the event loop and close the connections. Pending futures fail with a socket.error.
+        '''
+        if self._thread is None:
+            return
+        self._running.clear()
+        self._wake()
+        self._thread.join()
+        self._thread = None
+        for sock in [self._command_socket, self._data_socket]:
+            try:
+                sock.close()
+            except socket.error:
+                pass
+        os.close(self._wake_read)
+        os.close(self._wake_write)
+        for future in self._pending:
+            future.set_exception(socket.error("Connection closed"))
+        self._pending = []
+
+    def connected(self):
+        return self._running.is_set()
+
+    def _wake(self):
+        try:
+            os.write(self._wake_write, "x")
+        except OSError:
+            pass
+
+    def send(self, payload):
+        '''
+        Send a JSON command to the server.
+
+        :param payload: JSON string.
+
+        :return a transport_future resolved with the payload of the ack of the server. A nack of the server sets a
+            ValueError exception.
+        '''
+        future = transport_future()
+        if not self._running.is_set():
+            future.set_exception(socket.error("The transport is not connected"))
+            return future
+        with self._lock:
+            self._pending.append(future)
+            self._outgoing += Encode_async_message(payload)
+        self._wake()
+        return future
+
+    def acquire(self, parameters, **kwargs):
+        '''
+        Send a measure command and write the packets received with Packets_to_file() in a separate thread.
+
+        :param parameters: global_parameter object describing the measure.
+        :param kwargs: arguments of Packets_to_file() (filename, dpc_expected, trigger, tags...).
+
+        :return a transport_future resolved with the filename when the file has been closed.
+        '''
+        measure = transport_future()
+        if self._measure is not None and not self._measure.done():
+            measure.set_exception(ValueError("A measure is already running on this transport"))
+            return measure
+
+        self._source = measure_source()
+        self._measure = measure
+        self._eom_time = None
+        source = self._source
+
+        def writer():
+            try:
+                measure.set_result(Packets_to_file(parameters, source = source, **kwargs))
+            except Exception as err:
+                measure.set_exception(err)
+
+        th = Thread(target=writer, name="Event_transport_writer")
+        th.daemon = True
+        th.start()
+
+        accepted = self.send(parameters.to_json())
+
+        def check_accepted(future):
+            if future._exception is not None:
+                # the server will not send data: let the writer close the file
+                source.set_end_of_measure()
+                source.queue.put((None, None))
+
+        accepted.add_done_callback(check_accepted)
+        return measure
+
+    def _handle_message(self, message):
+        '''
+        Same decoding of Decode_Async_payload() acting on the state of the transport instead of the module globals.
+        '''
+        try:
+            res = json.loads(message)
+            atype = res['type']
+            payload = str(res['payload'])
+        except (ValueError, KeyError):
+            print_warning("Cannot decode response from server.")
+            return
+        if atype == 'ack' and payload.find("EOM") != -1:
+            print_debug("Async message from server: Measure finished")
+            self._eom_time = time.time()
+            if self._source is not None:
+                self._source.set_end_of_measure(Decode_EOM_packets(payload))
+            return
+        if atype == 'ack' and payload.find("filename") != -1:
+            self.remote_filename = payload.split("\"")[1]
+            return
+        if atype == 'nack':
+            print_warning("Server detected an error.")
+            if self._eom_time is None and self._source is not None and len(self._pending) == 0:
+                # error during the measure: no end of measurement will follow
+                self._eom_time = time.time()
+                self._source.set_end_of_measure()
+                return
+        with self._lock:
+            future = self._pending.pop(0) if len(self._pending) > 0 else None
+        if future is None:
+            return
+        if atype == 'ack':
+            future.set_result(payload)
+        else:
+            future.set_exception(ValueError("Server error: " + payload))
+
+    def _read_command(self):
+        try:
+            chunk = self._command_socket.recv(65536)
+        except socket.error as msg:
+            if msg.errno in (errno.EAGAIN, errno.EWOULDBLOCK, errno.EINTR):
+                return True
+            print_error("Event transport command connection: " + str(msg))
+            return False
+        if len(chunk) == 0:
+            print_warning("Event transport: command connection closed by the server")
+            return False
+        buf = self._command_header + self._command_payload + chunk
+        self._command_header = ""
+        self._command_payload = ""
+        while True:
+            if self._command_size is None:
+                if len(buf) < 8:
+                    self._command_header = buf
+                    return True
+                self._command_size = Decode_Async_header(buf[:8])
+                buf = buf[8:]
+            if len(buf) < self._command_size:
+                self._command_payload = buf
+                return True
+            message, buf = buf[:self._command_size], buf[self._command_size:]
+            self._command_size = None
+            self._handle_message(message)
+
+    def _read_data(self):
+        try:
+            if self._metadata is None:
+                n = self._data_socket.recv_into(memoryview(self._header_buffer)[self._header_received:],
+                                                header_type.itemsize - self._header_received)
+            else:
+                n = self._data_socket.recv_into(self._payload_view[self._payload_received:],
+                                                self._payload_bytes - self._payload_received)
+        except socket.error as msg:
+            if msg.errno in (errno.EAGAIN, errno.EWOULDBLOCK, errno.EINTR):
+                return True
+            print_error("Event transport data connection: " + str(msg))
+            return False
+        if n == 0:
+            print_warning("Event transport: data connection closed by the server")
+            return False
+        self._last_data = time.time()
+        self.bytes_received += n
+        if self._metadata is None:
+            self._header_received += n
+            if self._header_received == header_type.itemsize:
+                self._header_received = 0
+                self._metadata = Decode_Sync_Header(bytes(self._header_buffer))
+                if self._metadata is None:
+                    return False
+                self._payload = np.empty(self._metadata.length, dtype=data_type)
+                self._payload_view = memoryview(self._payload.view(np.uint8))
+                # py2 memoryview has no nbytes
+                self._payload_bytes = self._payload.nbytes
+                self._payload_received = 0
+        else:
+            self._payload_received += n
+        if self._metadata is not None and self._payload_received == self._payload_bytes:
+            self.packets_received += 1
+            if self._source is not None:
+                self._source.put(self._metadata, self._payload)
+            self._metadata = None
+            self._payload = None
+            self._payload_view = None
+        return True
+
+    def _complete_measure(self):
+        '''
+        Close the current measure when the end of measurement has been received and either all the packets it reports
+        have been received or the data connection is idle.
+        '''
+        if self._eom_time is None or self._source is None:
+            return
+        if self._metadata is not None:
+            return
+        complete = self._source.eom_packets is not None and EOM_complete(self._source.eom_packets,
+                                                                          self._source.last_packet)
+        if complete or time.time() - max(self._eom_time, self._last_data) >= TRANSPORT_EOM_LINGER:
+            self._source.queue.put((None, None))
+            self._source = None
+            self._eom_time = None
+
+    def _loop(self):
+        try:
+            self._select_loop()
+        except Exception as err:
+            print_error("Event transport: " + str(err))
+        finally:
+            # nothing will complete the measure and the commands anymore
+            self._running.clear()
+            if self._source is not None:
+                self._source.set_end_of_measure()
+                self._source.queue.put((None, None))
+                self._source = None
+            with self._lock:
+                pending, self._pending = self._pending, []
+            for future in pending:
+                future.set_exception(socket.error("Event transport stopped"))
+
+    def _select_loop(self):
+        while self._running.is_set():
+            with self._lock:
+                writing = [self._command_socket] if len(self._outgoing) > 0 else []
+            timeout = TRANSPORT_SELECT_TIMEOUT
+            if self._eom_time is not None:
+                timeout = TRANSPORT_EOM_LINGER
+            try:
+                readable, writable, failed = select.select(
+                    [self._command_socket, self._data_socket, self._wake_read], writing, [], timeout)
+            except select.error as msg:
+                if msg[0] == errno.EINTR:
+                    continue
+                print_error("Event transport: " + str(msg))
+                break
+
+            if self._wake_read in readable:
+                os.read(self._wake_read, 4096)
+
+            if self._data_socket in readable:
+                if not self._read_data():
+                    break
+
+            if self._command_socket in readable:
+                if not self._read_command():
+                    break
+
+            if self._command_socket in writable:
+                with self._lock:
+                    try:
+                        sent = self._command_socket.send(self._outgoing)
+                        self._outgoing = self._outgoing[sent:]
+                    except socket.error as msg:
+                        if msg.errno not in (errno.EAGAIN, errno.EWOULDBLOCK, errno.EINTR):
+                            print_error("Event transport: cannot send command: " + str(msg))
+                            break
+
+            self._complete_measure()
+
+
+def device_status():
+    '''
+    :return a shared dictionary with the acquisition keys of CLIENT_STATUS, written by the Packets_to_file() of a device
+        running in another process (see multi_acquisition).
+    '''
+    status = manager.dict()
+    status["measure_running_now"] = False
+    status["lost_packets"] = 0
+    status["duplicate_packets"] = 0
+    status["sequence_gaps"] = 0
+    status["eom_close_latency"] = None
+    status["telemetry"] = None
+    return status
+
+
+def _device_process(server, link_profile, connect_timeout, status, commands, results):
+    '''
+    Body of the process of a multi_acquisition device: connect an event_transport to the server and acquire the
+    measures received on the commands queue until a None command. The outcome of the connection and of each measure
+    is put on the results queue.
+    '''
+    # the parent process handles the keyboard interrupt and closes the devices
+    Signal.signal(Signal.SIGINT, Signal.SIG_IGN)
+    transport = event_transport(*server, link_profile=link_profile)
+    connected = transport.connect(connect_timeout)
+    results.put(connected)
+    if not connected:
+        return
+    try:
+        while True:
+            command = commands.get()
+            if command is None:
+                break
+            parameters, kwargs = command
+            try:
+                results.put((transport.acquire(parameters, status=status, **kwargs).result(), None))
+            except Exception as err:
+                # the exception may not be picklable
+                results.put((None, "%s: %s" % (type(err).__name__, str(err))))
+    finally:
+        transport.close()
+
+
+class multi_acquisition(object):
+    '''
+    Drive several GPU servers in parallel, i.e. the boards of a cryostat. Each server is handled by its own process,
+    with its own event_transport and Packets_to_file() writer: the receivers do not share the interpreter lock and the
+    writers do not share the HDF5 library lock, which serializes the writes of a process even to separate files.
+    The device number of a server is its position in the list and names its raw data group (raw_data<device>).
+
+    At the end of a measure the devices are aligned by start epoch (see H5_align_devices()) and, with single_file,
+    a file linking the raw data groups of all the device files is created (see H5_link_devices()).
+
+    :param servers: list of server ip addresses or of (address, command_port, data_port) tuples.
+    :param link_profile: socket options applied to all the connections (see get_link_profile()).
+
+    Example:
+    >>> m = multi_acquisition(["192.168.10.2", "192.168.10.3"])
+    >>> m.connect()
+    >>> filename = m.acquire(noise_command, filename = "USRP_Noise").result()
+    >>> print m.status[1]["lost_packets"]
+    >>> data = openH5devices(filename)
+    >>> m.close()
+
+    Note:
+        - the state of the acquisition of each device (the measure keys of CLIENT_STATUS) is in status[device].
+        - the parameters and the Packets_to_file() arguments are sent to the device processes: they have to be
+          picklable and push queues have to be multiprocessing queues.
+        - the device files are named <filename>_dev<device>.h5 and have to be kept next to the linking file.
+    '''
+
+    def __init__(self, servers, link_profile=None):
+        self.servers = []
+        for server in servers:
+            if isinstance(server, basestring):
+                server = (server,)
+            self.servers.append(tuple(server))
+        self.link_profile = link_profile
+        self.status = dict([(device, device_status()) for device in range(len(self.servers))])
+        self._processes = []
+        self._commands = []
+        self._results = []
+
+    def connect(self, timeout=TRANSPORT_CONNECT_TIMEOUT):
+        '''
+        Start a process per server and connect it.
+
+        :return True if all the servers are connected. Otherwise all the connections are closed.
+        '''
+        self.close()
+        for device, server in enumerate(self.servers):
+            commands = multiprocessing.Queue()
+            results = multiprocessing.Queue()
+            process = multiprocessing.Process(target=_device_process, name="Device_%d" % device, args=(
+                server, self.link_profile, timeout, self.status[device], commands, results))
+            process.daemon = True
+            process.start()
+            self._processes.append(process)
+            self._commands.append(commands)
+            self._results.append(results)
+        connected = True
+        for device, results in enumerate(self._results):
+            try:
+                # the connection of the device process gives up after timeout
+                ok = results.get(timeout=timeout + TRANSPORT_CONNECT_TIMEOUT)
+            except Queue.Empty:
+                ok = False
+            if not ok:
+                print_error("Cannot connect to the server %s" % self.servers[device][0])
+                connected = False
+        if not connected:
+            self.close()
+        return connected
+
+    def close(self):
+        '''
+        Close the connections and stop the device processes. A measure still running is interrupted.
+        '''
+        for commands in self._commands:
+            commands.put(None)
+        for process in self._processes:
+            process.join(TRANSPORT_CONNECT_TIMEOUT)
+            if process.is_alive():
+                process.terminate()
+                process.join()
+        self._processes = []
+        self._commands = []
+        self._results = []
+
+    def acquire(self, parameters, filename=None, single_file=True, **kwargs):
+        '''
+        Start a measure on all the servers.
+
+        :param parameters: global_parameter object sent to all the servers or list of one global_parameter per server.
+        :param filename: name of the measure. Default is datetime.
+        :param single_file: if True create the file <filename>.h5 linking the raw data groups of all the devices.
+        :param kwargs: arguments of Packets_to_file() (dpc_expected, layout, tags...).
+
+        :return a transport_future resolved with the filename if single_file is True, with the list of device
+            files otherwise.
+        '''
+        if len(self._processes) != len(self.servers):
+            err_msg = "The servers are not connected"
+            print_error(err_msg)
+            raise ValueError(err_msg)
+        if not isinstance(parameters, list):
+            parameters = [parameters] * len(self.servers)
+        if len(parameters) != len(self.servers):
+            err_msg = "%d parameter sets given for %d servers" % (len(parameters), len(self.servers))
+            print_error(err_msg)
+            raise ValueError(err_msg)
+        if filename is None:
+            filename = "USRP_DATA_" + get_timestamp()
+        filename = os.path.splitext(filename)[0]
+
+        result = transport_future()
+        device_files = [filename + "_dev%d" % device for device in range(len(self.servers))]
+        measures = []
+        for device in range(len(self.servers)):
+            device_kwargs = dict(kwargs)
+            device_kwargs.update({'filename': device_files[device], 'device': device})
+            self._commands[device].put((parameters[device], device_kwargs))
+            measures.append(transport_future())
+
+        def wait_device(device):
+            # the result queue of a device is read by this thread only
+            try:
+                device_file, err_msg = self._results[device].get()
+            except (EOFError, IOError) as err:
+                device_file, err_msg = None, str(err)
+            if err_msg is not None:
+                measures[device].set_exception(ValueError("Device %d: %s" % (device, err_msg)))
+            else:
+                measures[device].set_result(device_file)
+
+        remaining = [len(measures)]
+        lock = Lock()
+
+        def measure_done(future):
+            with lock:
+                remaining[0] -= 1
+                if remaining[0] > 0:
+                    return
+            for measure in measures:
+                if measure._exception is not None:
+                    result.set_exception(measure._exception)
+                    return
+            files = [format_filename(measure.result()) for measure in measures]
+            try:
+                H5_align_devices(files)
+                if single_file:
+                    result.set_result(H5_link_devices(filename, files))
+                else:
+                    result.set_result(files)
+            except (IOError, KeyError, RuntimeError) as err:
+                result.set_exception(err)
+
+        for device, measure in enumerate(measures):
+            measure.add_done_callback(measure_done)
+            th = Thread(target=wait_device, args=(device,), name="Device_%d_result" % device)
+            th.daemon = True
+            th.start()
+        return result
@@ -18,6 +18,8 @@ class trigger_template(object):
     The user is responible for the initialization of the object.
     The internal variable trigger_coltrol determines if the trigger dataset bookeep whenever the trigger method returns metadata['length']>0 or if it's controlled by the user.
     In case the trigger_control is not set on \'AUTO\' the user must take care of expanding the dataset before writing.
+    With \'AUTO\' the lists of the class named in the optional trigger_lists member are expected to only grow: their
+    new elements are appended to the trigger_<name> datasets of the file.
     '''
 
     def __init__(self, rate):
@@ -53,7 +55,7 @@ class trigger_template(object):
         Make modification to the data and metadata accordingly and return them.
 
         :param data: the data packet from the GPU server
-        :param metadata: the metadata packet from the GPU server
+        :param metadata: the metadata packet from the GPU server as a packet_descriptor: fields can be read and written as attributes (metadata.length) or as dictionary items (metadata['length'])
 
         :return same as argument but with modified content.
 
@@ -136,6 +138,8 @@ class amplitude_trigger(object):
         self.nglitch = []
         self.glitch_indices = [] ##glitch times (by packet.)
         self.samples_per_packet = []
+        # lists written in the trigger_<name> datasets of the file (see trigger_writer)
+        self.trigger_lists = ["bounds", "nglitch", "glitch_indices", "samples_per_packet"]
 
         vna_file = h5py.File(self.vna, 'r')
         calibration = vna_file['VNA_0'].attrs['calibration']
@@ -0,0 +1,724 @@
+########################################################################################
+##                                                                                    ##
+##  THIS LIBRARY IS PART OF THE SOFTWARE DEVELOPED BY THE JET PROPULSION LABORATORY   ##
+##  IN THE CONTEXT OF THE GPU ACCELERATED FLEXIBLE RADIOFREQUENCY READOUT PROJECT     ##
+##                                                                                    ##
+########################################################################################
+
+import numpy as np
+import h5py
+import time
+import os
+import json
+import Queue
+import multiprocessing
+from threading import Thread
+
+# import submodules
+from USRP_low_level import *
+from USRP_files import *
+
+# size in bytes of the blocks accumulated by the write behind buffer before writing them on disk
+WRITE_BEHIND_BYTES = int(16e6)
+
+# maximum time in seconds a sample can wait in the write behind buffer before being written on disk
+WRITE_BEHIND_SECONDS = 1.
+
+
+class write_behind_buffer(object):
+    '''
+    Accumulate the packets directed to a (channels, samples) raw data dataset in a contiguous block and write the
+    block on disk only when it is full or when the oldest sample waited more than flush_seconds.
+    The block length is a multiple of the dataset chunk length along the time axis so that full blocks cover whole
+    chunks. The "samples" and "start_epoch" attributes of the dataset are updated only on flush. The attributes are
+    modified in place so that the buffer can be used on files in single writer multiple reader mode.
+
+    :param dataset: h5py dataset to write.
+    :param channels: number of channels in the packets.
+    :param flush_bytes: approximate size of the block in bytes.
+    :param flush_seconds: maximum latency between the reception of a sample and its write on disk.
+
+    Note:
+        - The close() method has to be called before closing the file.
+    '''
+
+    def __init__(self, dataset, channels, flush_bytes=WRITE_BEHIND_BYTES, flush_seconds=WRITE_BEHIND_SECONDS):
+        self.dataset = dataset
+        self.channels = int(channels)
+        self.flush_seconds = flush_seconds
+
+        if dataset.chunks is not None:
+            chunk_len = dataset.chunks[1]
+        else:
+            chunk_len = 1
+        n_chunks = max(1, int(flush_bytes // (chunk_len * self.channels * dataset.dtype.itemsize)))
+        self.block_len = n_chunks * chunk_len
+        self.block = np.empty((self.channels, self.block_len), dtype=dataset.dtype)
+
+        # dataset index of the first sample in the block
+        self.block_start = 0
+        # samples in the block and how many of them are already on disk
+        self.fill = 0
+        self.flushed = 0
+
+        # time of reception of the oldest sample not on disk
+        self.oldest = None
+
+        self.samples = 0
+        self.start_epoch = None
+        self.epoch_written = False
+        self.resize_warning = True
+
+        # statistics
+        self.flush_count = 0
+        self.flush_time = 0.
+
+    def append(self, packet, index):
+        '''
+        Add a packet to the buffer.
+
+        :param packet: array of shape (channels, samples).
+        :param index: dataset index of the first sample of the packet.
+        '''
+        if index == 0 and self.start_epoch is None:
+            self.start_epoch = time.time()
+
+        if index != self.block_start + self.fill:
+            # not contiguous with the buffered data: start a new block
+            self.flush()
+            self.block_start = index
+            self.fill = 0
+            self.flushed = 0
+
+        spc = np.shape(packet)[1]
+        done = 0
+        while done < spc:
+            n = min(spc - done, self.block_len - self.fill)
+            self.block[:, self.fill:self.fill + n] = packet[:, done:done + n]
+            self.fill += n
+            done += n
+            if self.oldest is None:
+                self.oldest = time.time()
+            if self.fill == self.block_len:
+                self.flush()
+                self.block_start += self.block_len
+                self.fill = 0
+                self.flushed = 0
+
+        if self.oldest is not None and (time.time() - self.oldest) > self.flush_seconds:
+            self.flush()
+
+    def flush(self):
+        '''
+        Write on disk the buffered samples that are not already there and update the dataset attributes.
+        '''
+        if self.fill <= self.flushed:
+            return
+        t0 = time.time()
+        start = self.block_start + self.flushed
+        end = self.block_start + self.fill
+        shape = self.dataset.shape
+        if shape[0] < self.channels:
+            print_warning("Main dataset in H5 file not initialized.")
+            self.dataset.resize(self.channels, 0)
+        if end > shape[1]:
+            # datasets of triggered measures start empty and are expected to grow
+            if self.resize_warning and shape[1] > 0:
+                print_warning("Main dataset in H5 file not correctly sized. Dynamically extending dataset...")
+            self.resize_warning = False
+            self.dataset = raw_data_grow(self.dataset, max(end, self.block_start + self.block_len))
+        self.dataset[:, start:end] = self.block[:, self.flushed:self.fill]
+        self.flushed = self.fill
+        self.oldest = None
+
+        self.samples = max(self.samples, end)
+        self.dataset.attrs.modify("samples", self.samples)
+        if self.start_epoch is not None and not self.epoch_written:
+            self.dataset.attrs.modify("start_epoch", self.start_epoch)
+            self.epoch_written = True
+
+        self.flush_count += 1
+        self.flush_time += time.time() - t0
+
+    def close(self):
+        '''
+        Flush the buffer. In case the dataset was dynamically extended, trim it to the samples received (see
+        raw_data_trim()).
+        '''
+        self.flush()
+        if not self.resize_warning:
+            raw_data_trim(self.dataset)
+
+
+# number of trigger indices buffered before appending them to the trigger dataset
+TRIGGER_BLOCK_LEN = 1024
+
+
+class trigger_writer(object):
+    '''
+    Bookkeeping of a trigger with trigger_control set to \'AUTO\' in a raw data group: buffers the dataset index of
+    each triggered packet and appends the indices to the "trigger" dataset in blocks of block_len.
+    The lists named in the trigger_lists member of the trigger class (if any) grow with each trigger: their new
+    elements are appended to the extensible datasets "trigger_<name>" at each flush. The datasets are created on the
+    first flush with the shape of the list elements.
+
+    :param group: h5py raw data group containing the "trigger" dataset.
+    :param trigger: trigger class (see the Trigger section of the documentation).
+    :param block_len: number of indices buffered before a write.
+    :param written: dictionary of the elements of each trigger list already written, updated by the writer. Passing
+        the same dictionary to the writer of the next file of a rolled over acquisition (see Packets_to_file()) makes
+        each file contain only the new elements.
+
+    Note:
+        - The close() method has to be called before closing the file.
+    '''
+
+    def __init__(self, group, trigger, block_len=TRIGGER_BLOCK_LEN, written=None):
+        self.group = group
+        self.trigger = trigger
+        self.block_len = int(block_len)
+        self.indices = []
+        # elements of each trigger list already written
+        self.written = {} if written is None else written
+        for name in getattr(trigger, 'trigger_lists', []):
+            self.written.setdefault(name, 0)
+
+        # statistics
+        self.flush_count = 0
+
+    def packet(self, index):
+        '''
+        Record a triggered packet.
+
+        :param index: dataset index of the first sample of the packet.
+        '''
+        self.indices.append(index)
+        if len(self.indices) >= self.block_len:
+            self.flush()
+
+    def _append(self, name, values, dtype):
+        if len(values) == 0:
+            return
+        values = np.asarray(values, dtype=dtype)
+        if name not in self.group:
+            self.group.create_dataset(name, shape=(0,) + values.shape[1:], dtype=values.dtype,
+                                      maxshape=(None,) + values.shape[1:], chunks=True)
+        dataset = self.group[name]
+        current = dataset.shape[0]
+        dataset.resize(current + len(values), 0)
+        dataset[current:] = values
+
+    def flush(self):
+        '''
+        Append the buffered indices and the new elements of the trigger lists to the datasets.
+        '''
+        self._append("trigger", self.indices, np.int64)
+        self.indices = []
+        for name in self.written:
+            # the trigger thread only appends to the lists
+            new = list(getattr(self.trigger, name)[self.written[name]:])
+            self._append("trigger_" + name, new, None)
+            self.written[name] += len(new)
+        self.flush_count += 1
+
+    def close(self):
+        '''
+        Write the buffered information.
+        '''
+        self.flush()
+
+
+# seconds between two updates of the sequence counters in CLIENT_STATUS
+SEQUENCE_STATUS_SECONDS = 1.
+
+# maximum number of packets waiting between two stages of the writer pipeline
+PIPELINE_QUEUE_SIZE = 256
+
+
+class pipeline_stage(Thread):
+    '''
+    Thread consuming a bounded queue, applying a function to each element and pushing the result in the queue of
+    the next stage. Used by Packets_to_file() to decouple the network side from the trigger, the disk and the
+    external fan-out.
+
+    The function receives an element and returns the element for the next stage or None to drop it.
+    A None element in the input queue stops the stage and is forwarded to the next one.
+
+    :param name: name of the stage, used in the reports.
+    :param function: function applied to each element.
+    :param output: the pipeline_stage the results are sent to. Default is to discard them.
+    :param maxsize: size of the input queue.
+    :param latency_callback: function called with the seconds each element spent in the stage (queue and function).
+
+    Note:
+        - Exceptions raised by the function are reported and the element is dropped.
+    '''
+
+    def __init__(self, name, function, output=None, maxsize=PIPELINE_QUEUE_SIZE, latency_callback=None):
+        Thread.__init__(self, name=name)
+        self.daemon = True
+        self.function = function
+        self.output = output
+        self.latency_callback = latency_callback
+        self.queue = Queue.Queue(maxsize=maxsize)
+
+        # statistics
+        self.items = 0
+        self.errors = 0
+        self.max_occupancy = 0
+        self.busy_time = 0.
+        self.max_latency = 0.
+        self.queue_time = 0.
+
+    def put(self, element):
+        '''
+        Enqueue an element. Blocks when the stage is full.
+        '''
+        self.queue.put((time.time(), element))
+
+    def stop(self):
+        '''
+        Send the stop element and wait for the stage and the following ones to finish.
+        '''
+        self.put(None)
+        stage = self
+        while stage is not None:
+            stage.join()
+            stage = stage.output
+
+    def run(self):
+        while True:
+            self.max_occupancy = max(self.max_occupancy, self.queue.qsize())
+            t_in, element = self.queue.get()
+            if element is None:
+                if self.output is not None:
+                    self.output.put(None)
+                return
+            t0 = time.time()
+            self.queue_time += t0 - t_in
+            try:
+                result = self.function(element)
+            except Exception as err:
+                print_error("Pipeline stage %s dropped an element: %s" % (self.name, str(err)))
+                self.errors += 1
+                result = None
+            t1 = time.time()
+            latency = t1 - t0
+            self.busy_time += latency
+            self.max_latency = max(self.max_latency, latency)
+            self.items += 1
+            if self.latency_callback is not None:
+                self.latency_callback(t1 - t_in)
+            if result is not None and self.output is not None:
+                self.output.put(result)
+
+    def stats(self):
+        '''
+        :return a dictionary with the occupancy and latency counters of the stage.
+        '''
+        return {
+            'items': self.items,
+            'errors': self.errors,
+            'occupancy': self.queue.qsize() / float(self.queue.maxsize),
+            'max_occupancy': self.max_occupancy / float(self.queue.maxsize),
+            'busy_time': self.busy_time,
+            'mean_latency': self.busy_time / max(self.items, 1),
+            'max_latency': self.max_latency,
+            'mean_queue_time': self.queue_time / max(self.items, 1)
+        }
+
+    def report(self):
+        '''
+        Print the counters of the stage.
+        '''
+        s = self.stats()
+        print_debug("Stage %s: %d packets, max occupancy %.1f%%, mean latency %.2f ms, max latency %.2f ms, mean wait %.2f ms" % (
+            self.name, s['items'], 100 * s['max_occupancy'], 1e3 * s['mean_latency'], 1e3 * s['max_latency'],
+            1e3 * s['mean_queue_time']))
+
+
+class sequence_tracker(object):
+    '''
+    Check the packet_number of the packets of each (usrp_number, front_end_code) stream. The GPU server numbers the
+    packets of each stream consecutively: a jump forward is a gap (lost packets), a number already seen is a
+    duplicate or a late packet.
+
+    The check costs a dictionary lookup per packet. The events are kept in memory to be written in the \"sequence\"
+    dataset of the file; the counters can be copied to CLIENT_STATUS with update_status().
+    '''
+
+    def __init__(self):
+        self.expected = {}
+        self.lost_packets = 0
+        self.duplicate_packets = 0
+        self.sequence_gaps = 0
+        self._last_status = 0
+
+    def check(self, metadata):
+        '''
+        Check a packet.
+
+        :param metadata: the metadata of the packet as returned by Decode_Sync_Header().
+
+        :return a tuple (missing, expected) where missing is the number of packets lost before this one, 0 if the
+            packet is in sequence or negative for a duplicate/late packet, and expected is the packet number expected.
+        '''
+        key = (metadata['usrp_number'], metadata['front_end_code'])
+        received = metadata['packet_number']
+        expected = self.expected.get(key)
+        if expected is None or received == expected:
+            self.expected[key] = received + 1
+            return 0, received
+        missing = received - expected
+        if missing > 0:
+            self.lost_packets += missing
+            self.sequence_gaps += 1
+            self.expected[key] = received + 1
+        else:
+            self.duplicate_packets += 1
+        return missing, expected
+
+    def update_status(self, status, force=False):
+        '''
+        Copy the counters in a status dictionary (i.e. CLIENT_STATUS) at most every SEQUENCE_STATUS_SECONDS.
+
+        :param status: the dictionary.
+        :param force: update regardless of the time elapsed.
+        '''
+        now = time.time()
+        if force or (now - self._last_status) > SEQUENCE_STATUS_SECONDS:
+            status["lost_packets"] = self.lost_packets
+            status["duplicate_packets"] = self.duplicate_packets
+            status["sequence_gaps"] = self.sequence_gaps
+            self._last_status = now
+
+
+# fan-out policies of the packets pushed to external queues (see push_subscriber)
+PUSH_POLICIES = ["block", "drop_oldest", "decimate", "latest"]
+
+# policy used for queues given to Packets_to_file() without one
+PUSH_POLICY = "drop_oldest"
+
+# maximum number of packets waiting in an unbounded subscriber queue before the policy applies
+PUSH_MAX_PENDING = 64
+
+
+class push_subscriber(object):
+    '''
+    External queue receiving the (metadata, data) packets of an acquisition, with a policy deciding what happens when
+    the consumer does not keep up:
+        - "block": wait for room in the queue, up to block_timeout seconds. The consumer can slow down the writer.
+        - "drop_oldest": remove the oldest packet in the queue to make room for the new one.
+        - "decimate": push one packet every decimation packets of each frontend; drop the new one if the queue is full.
+        - "latest": the queue only holds the most recent packet.
+
+    Except for "block" the push never waits, so a live display cannot slow down the file writing.
+
+    :param push_queue: Queue.Queue or multiprocessing.Queue object.
+    :param policy: one of PUSH_POLICIES. Default is PUSH_POLICY.
+    :param decimation: one packet out of decimation is pushed with the "decimate" policy.
+    :param max_pending: the queue is considered full above this number of packets, for queues created without
+        maxsize. Default is PUSH_MAX_PENDING.
+    :param block_timeout: seconds the "block" policy waits before dropping the packet. Default waits forever.
+
+    Note:
+        - the counters pushed, dropped, decimated and errors are updated by the writer; a subscriber given to
+          Packets_to_file() can be inspected after the acquisition.
+    '''
+
+    def __init__(self, push_queue, policy=None, decimation=10, max_pending=PUSH_MAX_PENDING, block_timeout=None):
+        if policy is None:
+            policy = PUSH_POLICY
+        if policy not in PUSH_POLICIES:
+            err_msg = "Push policy \'%s\' not recognized, accepted values are %s" % (str(policy), str(PUSH_POLICIES))
+            print_error(err_msg)
+            raise ValueError(err_msg)
+        self.queue = push_queue
+        self.policy = policy
+        self.decimation = max(int(decimation), 1)
+        self.max_pending = max_pending
+        self.block_timeout = block_timeout
+
+        self.pushed = 0
+        self.dropped = 0
+        self.decimated = 0
+        self.errors = 0
+        self._counters = {}
+
+    def _full(self):
+        if self.queue.full():
+            return True
+        if self.max_pending is None:
+            return False
+        try:
+            return self.queue.qsize() >= self.max_pending
+        except NotImplementedError:
+            return False
+
+    def _drop_one(self):
+        try:
+            self.queue.get_nowait()
+            self.dropped += 1
+            return True
+        except Queue.Empty:
+            return False
+
+    def push(self, element):
+        '''
+        Push a (metadata, data) element according to the policy.
+        '''
+        try:
+            if self.policy == "block":
+                self.queue.put(element, True, self.block_timeout)
+            elif self.policy == "decimate":
+                key = (element[0].usrp_number, element[0].front_end_code)
+                count = self._counters.get(key, 0)
+                self._counters[key] = count + 1
+                if count % self.decimation != 0:
+                    self.decimated += 1
+                    return
+                if self._full():
+                    self.dropped += 1
+                    return
+                self.queue.put_nowait(element)
+            elif self.policy == "latest":
+                while self._drop_one():
+                    pass
+                self.queue.put_nowait(element)
+            else:
+                while self._full() and self._drop_one():
+                    pass
+                self.queue.put_nowait(element)
+            self.pushed += 1
+        except Queue.Full:
+            self.dropped += 1
+        except Exception as err:
+            if self.errors == 0:
+                print_warning("Cannot push packets into external queue: %s" % str(err))
+            self.errors += 1
+
+    def stats(self):
+        '''
+        :return a dictionary with the counters of the subscriber.
+        '''
+        return {'policy': self.policy, 'pushed': self.pushed, 'dropped': self.dropped, 'decimated': self.decimated,
+                'errors': self.errors}
+
+
+def push_subscribers(push_queue, policy=None):
+    '''
+    Build the list of subscribers of an acquisition.
+
+    :param push_queue: None, a queue, a push_subscriber or a list of queues and push_subscriber objects.
+    :param policy: policy of the queues given without a push_subscriber. Default is PUSH_POLICY.
+
+    :return a list of push_subscriber objects.
+    '''
+    if push_queue is None:
+        return []
+    if not isinstance(push_queue, (list, tuple)):
+        push_queue = [push_queue]
+    return [q if isinstance(q, push_subscriber) else push_subscriber(q, policy) for q in push_queue]
+
+
+class spool_writer(object):
+    '''
+    Write the packets of an acquisition to flat binary files with large sequential writes, in place of the H5 file.
+    For each raw data group and frontend the payloads are appended as received to a data file and a record of type
+    spool_index_type is appended to an index file. The parameters of the measure and the tags are saved in a JSON
+    description. The folder is named <filename>.spool (see spool_folder()).
+
+    The standard H5 layout is produced by spool_to_H5() and the spool can be read directly with openH5file().
+
+    :param filename: name of the acquisition.
+    :param parameters: global_parameter object describing the measure.
+    :param buffer_bytes: buffer size of the files.
+    :param kwargs: tags of the measure, as in Param_to_H5().
+    '''
+
+    def __init__(self, filename, parameters, buffer_bytes=SPOOL_BUFFER_BYTES, **kwargs):
+        self.folder = spool_folder(filename)
+        if os.path.exists(self.folder):
+            count = 0
+            path, name = os.path.split(filename)
+            while os.path.exists(spool_folder(os.path.join(path, "old(" + str(count) + ")_" + name))):
+                count += 1
+            old_folder = spool_folder(os.path.join(path, "old(" + str(count) + ")_" + name))
+            print_warning("Spool %s is already present in the folder, renaming it %s" % (self.folder, old_folder))
+            os.rename(self.folder, old_folder)
+        os.mkdir(self.folder)
+
+        self.buffer_bytes = int(buffer_bytes)
+        self.info = {
+            'parameters': json.loads(parameters.to_json()),
+            'tags': kwargs,
+            'streams': {}
+        }
+        self.files = {}
+        self.bytes_written = 0
+        self._write_info()
+
+    def _write_info(self):
+        with open(os.path.join(self.folder, "spool.json"), 'w') as info_file:
+            json.dump(self.info, info_file, indent=4,
+                      default=lambda obj: obj.tolist() if hasattr(obj, "tolist") else str(obj))
+
+    def write(self, metadata, data):
+        '''
+        Append a packet to the spool.
+
+        :param metadata: the metadata of the packet as returned by Decode_Sync_Header().
+        :param data: the payload of the packet.
+        '''
+        dev_name = "raw_data" + str(int(metadata['usrp_number']))
+        front_end = metadata['front_end_code']
+        key = (dev_name, front_end)
+        if key not in self.files:
+            stream = {
+                'data': dev_name + "_" + front_end + ".dat",
+                'index': dev_name + "_" + front_end + ".idx",
+                'channels': int(metadata['channels']),
+                'start_epoch': time.time()
+            }
+            self.info['streams'].setdefault(dev_name, {})[front_end] = stream
+            self.files[key] = {
+                'data': open(os.path.join(self.folder, stream['data']), 'wb', self.buffer_bytes),
+                'index': open(os.path.join(self.folder, stream['index']), 'wb', self.buffer_bytes),
+                'offset': 0
+            }
+            self._write_info()
+
+        files = self.files[key]
+        payload = np.ascontiguousarray(data[:metadata['length']], dtype=np.complex64)
+        record = np.zeros(1, dtype=spool_index_type)
+        record['packet_number'] = metadata['packet_number']
+        record['front_end_code'] = front_end
+        record['length'] = metadata['length']
+        record['errors'] = metadata['errors']
+        record['channels'] = metadata['channels']
+        record['offset'] = files['offset']
+        files['data'].write(payload.data)
+        files['index'].write(record.data)
+        files['offset'] += payload.nbytes
+        self.bytes_written += payload.nbytes
+
+    def close(self):
+        '''
+        Close the spool files.
+        '''
+        for key in self.files:
+            self.files[key]['data'].close()
+            self.files[key]['index'].close()
+        self._write_info()
+
+
+def spool_sequence(index):
+    '''
+    Rebuild the events of the "sequence" dataset written by Packets_to_file() in H5 mode from the index of a spool
+    stream, checking the packet numbers with a sequence_tracker in the order they were received. The zero filled
+    blocks (packet number -1) are not checked: the gap is recorded at their first sample, as in H5 mode.
+
+    :param index: array of spool_index_type records of a stream.
+
+    :return a tuple (events, packet_samples): events is a (3, N) array as in the "sequence" dataset, packet_samples
+        is the samples per channel of the packets replaced by the zero filled blocks or None if there is none.
+    '''
+    tracker = sequence_tracker()
+    itemsize = np.dtype(np.complex64).itemsize
+    events = []
+    fill_start = None
+    first_samples = None
+    for record in index:
+        position = int(record['offset']) / (int(record['channels']) * itemsize)
+        if record['packet_number'] < 0:
+            if fill_start is None:
+                fill_start = position
+            continue
+        if first_samples is None and record['length'] > 0:
+            first_samples = int(record['length']) / int(record['channels'])
+        missing, expected = tracker.check({'usrp_number': 0, 'front_end_code': record['front_end_code'],
+                                           'packet_number': int(record['packet_number'])})
+        if missing != 0:
+            events.append([position if fill_start is None else fill_start, expected, int(record['packet_number'])])
+        fill_start = None
+    events = np.asarray(events, dtype=np.int64).reshape(-1, 3).T
+    if np.any(index['packet_number'] < 0):
+        return events, first_samples
+    return events, None
+
+
+def spool_to_H5(filename, layout=None, block_samples=int(1e6), remove_spool=False):
+    '''
+    Convert an acquisition written in spool mode to the standard H5 layout created by Packets_to_file().
+
+    :param filename: name of the acquisition.
+    :param layout: raw data layout policy (see raw_data_layout()).
+    :param block_samples: samples per channel copied at once.
+    :param remove_spool: remove the spool folder after a succesfull conversion.
+
+    :return the name of the H5 file or None if the conversion failed.
+    '''
+    h5_name = format_filename(filename)
+    if os.path.exists(h5_name):
+        print_error("Cannot convert spool %s: file %s already exists" % (spool_folder(filename), h5_name))
+        return None
+
+    info = get_spool_info(filename)
+    parameters = global_parameter()
+    parameters.initialize()
+    parameters.parameters.update(info['parameters'])
+
+    fv = h5py.File(h5_name, 'w')
+    Param_to_H5(fv, parameters, layout=layout, **info['tags'])
+    for dev_name in info['streams']:
+        for front_end in info['streams'][dev_name]:
+            source = spool_dataset(filename, usrp_number=int(dev_name[len("raw_data"):]), front_end=front_end)
+            group = fv[dev_name][front_end]
+            dataset = group["data"]
+            channels, samples = source.shape
+            if dataset.chunks is None:
+                # contiguous layout: the dataset cannot be resized, the "samples" attribute trims the allocation
+                if dataset.shape[0] != channels or dataset.shape[1] < samples:
+                    del group["data"]
+                    dataset = group.create_dataset("data", (channels, samples), dtype=np.complex64)
+            else:
+                dataset.resize((channels, samples))
+            for first in range(0, samples, block_samples):
+                last = min(first + block_samples, samples)
+                dataset[:, first:last] = np.ascontiguousarray(source[:, first:last])
+            dataset.attrs.modify("samples", samples)
+            if source.attrs['start_epoch'] is not None:
+                dataset.attrs.modify("start_epoch", source.attrs['start_epoch'])
+            errors = source.errors()
+            if np.shape(errors)[0] > 0:
+                group["errors"].resize(np.shape(errors))
+                group["errors"][:] = errors
+            # gaps and duplicates, as recorded by Packets_to_file() in H5 mode
+            events, packet_samples = spool_sequence(source.index)
+            if np.shape(events)[1] > 0:
+                group["sequence"].resize(np.shape(events)[1], 1)
+                group["sequence"][:] = events
+                if packet_samples is not None:
+                    group["sequence"].attrs.create("packet_samples", packet_samples)
+            source.close()
+    fv.close()
+
+    if remove_spool:
+        for name in os.listdir(spool_folder(filename)):
+            os.remove(os.path.join(spool_folder(filename), name))
+        os.rmdir(spool_folder(filename))
+
+    print_debug("Spool %s converted to %s" % (spool_folder(filename), h5_name))
+    return h5_name
+
+
+def start_spool_conversion(filename, layout=None, remove_spool=False):
+    '''
+    Run spool_to_H5() in a background process.
+
+    :return the multiprocessing.Process object doing the conversion.
+    '''
+    converter = multiprocessing.Process(target=spool_to_H5, name="Spool_to_H5", args=(filename,),
+                                        kwargs={'layout': layout, 'remove_spool': remove_spool})
+    converter.start()
+    return converter
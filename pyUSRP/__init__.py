@@ -8,7 +8,12 @@
 try:
     from .USRP_data_analysis import *
     from .USRP_low_level import *
+    from .USRP_buffers import *
+    from .USRP_writer import *
+    from .USRP_link import *
+    from .USRP_telemetry import *
     from .USRP_connections import *
+    from .USRP_transport import *
     from .USRP_files import *
     from .USRP_fitting import *
     from .USRP_delay import *
@@ -17,6 +22,8 @@ try:
     from .USRP_full_spec import *
     from .USRP_plotting import *
     from .USRP_triggers import *
+    from .USRP_simulator import *
+    from .USRP_benchmark import *
 
 except ImportError as err:
     print("\033[1;31mERROR\033[0m: Import error from pyUSRP lib. Try running the install modules script.")
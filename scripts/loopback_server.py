@@ -0,0 +1,40 @@
+import sys,os,time
+try:
+    import pyUSRP as u
+except ImportError:
+    try:
+        sys.path.append('..')
+        import pyUSRP as u
+    except ImportError:
+        print "Cannot find the pyUSRP package"
+
+import argparse
+
+def run(address, command_port, data_port, packet_samples, throttle, regenerate):
+
+    sim = u.loopback_server(address = address, command_port = command_port, data_port = data_port,
+                            packet_samples = packet_samples, throttle = throttle, precompute = not regenerate)
+    sim.start()
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        u.print_warning("Keyboard interrupt received, stopping the loopback server")
+    sim.stop()
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description='Pure python stand-in for the GPU server. Streams synthesized packets to the client for end-to-end tests and benchmarks.')
+
+    parser.add_argument('--address', '-a', help='IP address to listen on', type=str, default = u.USRP_IP_ADDR)
+    parser.add_argument('--command_port', '-cp', help='Port of the async command socket', type=int, default = u.USRP_server_address[1])
+    parser.add_argument('--data_port', '-dp', help='Port of the sync data socket', type=int, default = u.USRP_server_address_data[1])
+    parser.add_argument('--packet_samples', '-ps', help='Samples per channel in each packet. Default is derived from the command buffer_len', type=int)
+    parser.add_argument('--throttle', '-th', help='Pace the stream at this many samples per second per channel. Default is as fast as possible', type=float)
+    parser.add_argument('--regenerate', '-rg', help='Synthesize every packet instead of repeating a precomputed one', action='store_true')
+
+    args = parser.parse_args()
+
+    run(address = args.address, command_port = args.command_port, data_port = args.data_port,
+        packet_samples = args.packet_samples, throttle = args.throttle, regenerate = args.regenerate)
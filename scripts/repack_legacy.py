@@ -0,0 +1,45 @@
+import sys,os,glob
+
+try:
+    import pyUSRP as u
+except ImportError:
+    try:
+        sys.path.append('..')
+        import pyUSRP as u
+    except ImportError:
+        print "Cannot find the pyUSRP package"
+
+import argparse
+
+def run(files, layout, replace, index_only, jobs):
+    if index_only:
+        for f in files:
+            print "%s: %d group(s) indexed" % (f, u.index_legacy_H5(f))
+        return
+    for f, repacked in zip(files, u.repack_legacy_files(files, layout = layout, replace = replace, n_jobs = jobs)):
+        if repacked is None:
+            print "%s: conversion failed" % f
+        else:
+            print "%s -> %s" % (f, repacked)
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description='Convert files written by the old server (dataset_1..dataset_N) to the current raw data layout')
+
+    parser.add_argument('--folder', '-fn', help='Name of the folder in which the data are stored', type=str, default = "data")
+    parser.add_argument('--files', '-f', help='Files to convert. Default is all the .h5 files in the folder', nargs='+')
+    parser.add_argument('--layout', '-l', help='Raw data layout policy of the repacked files', type=str, default = None)
+    parser.add_argument('--replace', '-r', help='Replace the original files with the repacked ones', action="store_true")
+    parser.add_argument('--index', '-i', help='Only write the index of the datasets in the original files', action="store_true")
+    parser.add_argument('--jobs', '-j', help='Number of files converted at the same time', type=int, default = 4)
+
+    args = parser.parse_args()
+
+    os.chdir(args.folder)
+
+    if args.files is None:
+        files = glob.glob("*.h5")
+    else:
+        files = args.files
+
+    run(files = files, layout = args.layout, replace = args.replace, index_only = args.index, jobs = args.jobs)
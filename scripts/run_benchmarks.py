@@ -0,0 +1,34 @@
+import sys,os
+try:
+    import pyUSRP as u
+except ImportError:
+    try:
+        sys.path.append('..')
+        import pyUSRP as u
+    except ImportError:
+        print "Cannot find the pyUSRP package"
+
+import argparse
+
+def run(folder, output, quick, selection, loopback):
+
+    results = u.run_benchmarks(folder = folder, quick = quick, selection = selection, loopback = loopback)
+    filename = u.save_benchmark_results(results, output)
+    u.print_debug("Benchmark results written in %s" % filename)
+
+    return filename
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description='Run the benchmark suite on synthetic files and write the results in a JSON file.')
+
+    parser.add_argument('--folder', '-fn', help='Name of the folder in which the synthetic files will be stored', type=str, default = "benchmark")
+    parser.add_argument('--output', '-o', help='Name of the JSON output file. Default is USRP_benchmark_<timestamp>.json', type=str)
+    parser.add_argument('--quick', '-q', help='Use reduced sizes', action='store_true')
+    parser.add_argument('--only', '-b', nargs='+', help='Run only these benchmarks: sync_rx_decode loopback_acquisition link_profile packets_to_file raw_data_layout openH5file calculate_noise vna_fit extimate_peak_number')
+    parser.add_argument('--loopback', '-l', help='Run also the end to end acquisition against the loopback server simulator', action='store_true')
+
+    args = parser.parse_args()
+
+    run(folder = args.folder, output = args.output, quick = args.quick, selection = args.only, loopback = args.loopback)